@@ -1,8 +1,43 @@
 """
 Learn CLI package containing Typer and Click example applications.
+
+兩個應用程式在第一次被存取時才導入，只用其中一個框架時不必載入另一個。
 """
 
-from .click_app import cli as click_cli
-from .typer_app import app as typer_app
+import importlib
+import sys
+import types
+
+# 公開名稱 → (模組, 屬性)
+_LAZY_ATTRS = {
+    "click_cli": (".click_app", "cli"),
+    "typer_app": (".typer_app", "app"),
+}
 
 __all__ = ["click_cli", "typer_app"]
+
+
+def __getattr__(name: str) -> object:
+    try:
+        module_name, attr = _LAZY_ATTRS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module_name, __name__), attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
+
+
+class _Package(types.ModuleType):
+    def __setattr__(self, name: str, value: object) -> None:
+        # 導入子模組 typer_app 時，導入系統會把子模組綁定到同名的屬性上；
+        # 略過這次綁定，讓公開名稱 typer_app 仍然指向應用程式物件
+        if name in _LAZY_ATTRS and isinstance(value, types.ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
@@ -0,0 +1,128 @@
+"""
+generate_report 的行數快取
+
+以 SQLite 記錄每個檔案的行數，鍵為 (絕對路徑, 大小, 修改時間 ns)。
+重複對同一個目錄生成報告時，只有新增或變更過的檔案需要重新讀取。
+"""
+
+import os
+import time
+from collections.abc import Iterable
+from pathlib import Path
+
+# 修改時間距離掃描開始不到這麼久的檔案不寫入快取：
+# 同一個時間刻度內再被修改且大小不變時，(大小, 修改時間) 無法分辨新舊內容
+RACY_WINDOW_NS = 1_000_000_000
+
+# (大小, 修改時間 ns, 行數)
+CacheEntry = tuple[int, int, int]
+
+
+def scan_root(directory: Path, pattern: str) -> Path:
+    """
+    檔案模式實際掃描的根目錄 (絕對路徑)
+
+    模式開頭不含萬用字元的目錄部分也算進根目錄，並以 os.path.abspath 正規化，
+    "../data/*.txt" 這類模式掃到的檔案才會落在快取查詢的路徑前綴內。
+    """
+    parts = []
+    for part in Path(pattern).parts[:-1]:
+        if any(c in part for c in "*?["):
+            break
+        parts.append(part)
+    return Path(os.path.abspath(os.path.join(directory, *parts)))
+
+
+def default_cache_path() -> Path:
+    """預設的快取檔位置 ($XDG_CACHE_HOME 或 ~/.cache 底下)"""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "learn-clicktyper-automation" / "report-lines.sqlite3"
+
+
+class LineCountCache:
+    """
+    檔案行數快取
+
+    load() 取出某個目錄底下的所有紀錄，掃描完成後以 store() 寫回新的行數，
+    並刪除目錄中已經不存在的檔案的紀錄。
+    """
+
+    def __init__(self, path: Path, *, rebuild: bool = False) -> None:
+        # 只有 generate_report 需要 sqlite3，延後到真的開啟快取時才導入
+        import sqlite3
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=5)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " lines INTEGER NOT NULL)"
+        )
+        self._rebuild = rebuild
+        self._started_ns = time.time_ns()
+
+    def __enter__(self) -> "LineCountCache":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    @staticmethod
+    def _prefix_range(directory: Path) -> tuple[str, str]:
+        prefix = os.path.join(os.path.abspath(directory), "")
+        # 以字串範圍查詢取代 LIKE，不必處理 % 與 _ 的跳脫
+        return prefix, prefix + "\U0010ffff"
+
+    def load(self, directory: Path) -> dict[str, CacheEntry]:
+        """取出目錄底下所有檔案的快取紀錄 (重建快取時視為沒有紀錄)"""
+        if self._rebuild:
+            return {}
+        rows = self._db.execute(
+            "SELECT path, size, mtime_ns, lines FROM files"
+            " WHERE path >= ? AND path < ?",
+            self._prefix_range(directory),
+        )
+        return {path: (size, mtime_ns, lines) for path, size, mtime_ns, lines in rows}
+
+    def store(
+        self,
+        directory: Path,
+        entries: Iterable[tuple[str, CacheEntry]],
+        *,
+        seen: set[str],
+    ) -> None:
+        """
+        寫入新的紀錄，並刪除目錄中已不存在的檔案的紀錄
+
+        seen 是這次掃描到的所有檔案；不在其中的舊紀錄若檔案已不存在就刪除
+        (可能只是不符合這次的檔案模式，所以還要確認檔案是否存在)。
+        """
+        racy_after = self._started_ns - RACY_WINDOW_NS
+        with self._db:
+            if self._rebuild:
+                self._db.execute(
+                    "DELETE FROM files WHERE path >= ? AND path < ?",
+                    self._prefix_range(directory),
+                )
+            else:
+                stale = [
+                    (path,)
+                    for path in self.load(directory)
+                    if path not in seen and not os.path.exists(path)
+                ]
+                self._db.executemany("DELETE FROM files WHERE path = ?", stale)
+
+            self._db.executemany(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, lines)"
+                " VALUES (?, ?, ?, ?)",
+                (
+                    (path, size, mtime_ns, lines)
+                    for path, (size, mtime_ns, lines) in entries
+                    if mtime_ns < racy_after
+                ),
+            )
@@ -0,0 +1,356 @@
+"""
+計算功能 - calc 與 calc-bulk 共用的運算
+
+單筆計算直接查運算表；大量計算把輸入分塊讀成欄位陣列 (運算代碼、a、b)，
+以整個陣列為單位運算。安裝了 NumPy 時使用其 ufunc，否則退回標準函式庫的
+array 模組，以 map 搭配 operator 的內建函式在 C 層逐項運算。
+
+除數為零的列不會中斷計算：結果記為 nan，並記錄列號供呼叫端回報。
+"""
+
+import operator
+import sys
+from array import array
+from collections.abc import Callable, Iterable, Iterator
+from itertools import batched, chain
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from . import compat
+
+# 運算名稱 → 函式；順序即為運算代碼 (二進位輸入的第一欄)
+OPERATIONS: dict[str, Callable[[float, float], float]] = {
+    "add": operator.add,
+    "sub": operator.sub,
+    "mul": operator.mul,
+    "div": operator.truediv,
+}
+
+SYMBOLS = {"add": "+", "sub": "-", "mul": "*", "div": "/"}
+
+OP_CODES = {name: code for code, name in enumerate(OPERATIONS)}
+
+_DIV = OP_CODES["div"]
+
+_FUNCTIONS = tuple(OPERATIONS.values())
+
+# 大量計算每次處理的列數
+CALC_CHUNK_ROWS = 1 << 20
+
+# 回報除數為零時最多列出的列號數
+MAX_REPORTED_ROWS = 10
+
+INPUT_FORMATS = ("csv", "ndjson", "binary")
+
+OUTPUT_FORMATS = ("text", "binary")
+
+_NAN = float("nan")
+
+
+def calculate(operation: str, a: float, b: float) -> float | None:
+    """單筆計算；除數為零時回傳 None"""
+    if operation == "div" and b == 0:
+        return None
+    return OPERATIONS[operation](a, b)
+
+
+class Columns(NamedTuple):
+    """
+    一塊輸入的欄位：運算代碼 (所有列同一個運算時為 None)、a、b
+
+    各欄為 array 模組的陣列，或 (二進位輸入且有 NumPy 時) ndarray。
+    """
+
+    codes: Any
+    a: Any
+    b: Any
+
+
+def _parse_records(
+    records: list[Any], keys: tuple[Any, Any, Any], operation: str | None, start: int
+) -> Columns:
+    """
+    把一塊紀錄 (CSV 的列或 NDJSON 的物件) 轉成欄位陣列
+
+    keys 為 (運算, a, b) 在紀錄中的索引或鍵；start 是這塊第一列的列號。
+    """
+    op_key, a_key, b_key = keys
+    try:
+        codes = (
+            None
+            if operation
+            else array("b", [OP_CODES[record[op_key].strip()] for record in records])
+        )
+        a = array("d", [float(record[a_key]) for record in records])
+        b = array("d", [float(record[b_key]) for record in records])
+    except (KeyError, IndexError, TypeError, ValueError, AttributeError):
+        # 找出第一個有問題的列，回報列號
+        for number, record in enumerate(records, start):
+            try:
+                if not operation:
+                    OP_CODES[record[op_key].strip()]
+                float(record[a_key])
+                float(record[b_key])
+            except (KeyError, IndexError, TypeError, ValueError, AttributeError):
+                raise ValueError(f"第 {number} 列無法解析: {record!r}") from None
+        raise
+    return Columns(codes, a, b)
+
+
+def _csv_keys(first_row: list[str], operation: str | None) -> tuple[bool, tuple]:
+    """
+    判斷 CSV 第一列是否為標題列，回傳 (是否為標題列, 欄位索引)
+
+    有標題列時依欄名 operation、a、b 找欄位；沒有時依位置
+    (指定 --op 時為 a、b 兩欄，否則為 operation、a、b 三欄)。
+    """
+    positions = (None, 0, 1) if operation else (0, 1, 2)
+    try:
+        float(first_row[positions[1]])
+        return False, positions
+    except (ValueError, IndexError):
+        pass
+    header = [name.strip() for name in first_row]
+    names = ("a", "b") if operation else ("operation", "a", "b")
+    missing = [name for name in names if name not in header]
+    if missing:
+        raise ValueError(f"CSV 標題列缺少欄位: {', '.join(missing)}")
+    indexes = [header.index(name) for name in names]
+    return True, (None, *indexes) if operation else tuple(indexes)
+
+
+def read_csv(
+    path: Path, *, operation: str | None = None, chunk_rows: int = CALC_CHUNK_ROWS
+) -> Iterator[Columns]:
+    """分塊讀取 CSV (標題列可有可無)"""
+    import csv
+
+    with path.open(newline="", encoding="utf-8") as f:
+        rows = (row for row in csv.reader(f) if row)
+        first = next(rows, None)
+        if first is None:
+            return
+        is_header, keys = _csv_keys(first, operation)
+        if not is_header:
+            rows = chain([first], rows)
+        start = 1
+        for chunk in batched(rows, chunk_rows, strict=False):
+            yield _parse_records(list(chunk), keys, operation, start)
+            start += len(chunk)
+
+
+def read_ndjson(
+    path: Path, *, operation: str | None = None, chunk_rows: int = CALC_CHUNK_ROWS
+) -> Iterator[Columns]:
+    """分塊讀取 NDJSON，每行一個 {"operation": ..., "a": ..., "b": ...} 物件"""
+    import json
+
+    with path.open(encoding="utf-8") as f:
+        lines = (line for line in f if line.strip())
+        start = 1
+        for chunk in batched(lines, chunk_rows, strict=False):
+            try:
+                records = [json.loads(line) for line in chunk]
+            except json.JSONDecodeError as e:
+                raise ValueError(f"無法解析 JSON: {e}") from e
+            yield _parse_records(records, ("operation", "a", "b"), operation, start)
+            start += len(chunk)
+
+
+def _binary_codes(op_values: Any, start: int) -> Any:
+    """檢查二進位輸入的運算代碼欄並轉成整數"""
+    valid = {0.0, 1.0, 2.0, 3.0}
+    np = compat.load_numpy()
+    if np is not None:
+        bad = np.flatnonzero(~np.isin(op_values, list(valid)))
+        if bad.size:
+            number = start + int(bad[0])
+            raise ValueError(f"第 {number} 列的運算代碼無效: {op_values[bad[0]]}")
+        return op_values.astype(np.int8)
+    if not set(op_values) <= valid:
+        for number, code in enumerate(op_values, start):
+            if code not in valid:
+                raise ValueError(f"第 {number} 列的運算代碼無效: {code}")
+    return array("b", map(int, op_values))
+
+
+def read_binary(
+    path: Path, *, operation: str | None = None, chunk_rows: int = CALC_CHUNK_ROWS
+) -> Iterator[Columns]:
+    """
+    分塊讀取二進位浮點數檔案 (little-endian float64)
+
+    每列為 (運算代碼, a, b) 三個數字；指定 --op 時每列只有 (a, b)。
+    有 NumPy 時各欄直接是檔案內容上的 ndarray 視圖，不必逐項複製。
+    """
+    np = compat.load_numpy()
+    width = 2 if operation else 3
+    record_size = width * 8
+    with path.open("rb") as f:
+        start = 1
+        while data := f.read(chunk_rows * record_size):
+            if len(data) % record_size:
+                raise ValueError(f"檔案大小不是每列 {record_size} 位元組的整數倍")
+            if np is not None:
+                values = np.frombuffer(data, dtype="<f8")
+            else:
+                values = array("d", data)
+                if sys.byteorder == "big":
+                    values.byteswap()
+            codes = None if operation else _binary_codes(values[0::3], start)
+            yield Columns(codes, values[width - 2 :: width], values[width - 1 :: width])
+            start += len(values) // width
+
+
+class Evaluated(NamedTuple):
+    """一塊的運算結果與其中除數為零的列索引 (從 0 開始)"""
+
+    result: Any
+    zero_rows: list[int]
+
+
+READERS = {"csv": read_csv, "ndjson": read_ndjson, "binary": read_binary}
+
+
+def _apply(code: int, a: float, b: float) -> float:
+    if code == _DIV and b == 0:
+        return _NAN
+    return _FUNCTIONS[code](a, b)
+
+
+def _safe_div(a: float, b: float) -> float:
+    return a / b if b else _NAN
+
+
+def _evaluate_array(columns: Columns, operation: str | None) -> Evaluated:
+    """以 array 與 map 運算 (沒有 NumPy 時)"""
+    codes, a, b = columns
+    has_zero = 0.0 in b
+    if codes is not None:
+        result = array("d", map(_apply, codes, a, b))
+        zero_rows = (
+            [
+                i
+                for i, (code, y) in enumerate(zip(codes, b, strict=True))
+                if code == _DIV and y == 0
+            ]
+            if has_zero
+            else []
+        )
+        return Evaluated(result, zero_rows)
+    if operation == "div" and has_zero:
+        result = array("d", map(_safe_div, a, b))
+        return Evaluated(result, [i for i, y in enumerate(b) if y == 0])
+    return Evaluated(array("d", map(OPERATIONS[operation], a, b)), [])
+
+
+def _evaluate_numpy(np: Any, columns: Columns, operation: str | None) -> Evaluated:
+    """以 NumPy 的 ufunc 整塊運算"""
+    ufuncs = (np.add, np.subtract, np.multiply, np.divide)
+    a = np.asarray(columns.a, dtype=np.float64)
+    b = np.asarray(columns.b, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if columns.codes is None:
+            result = ufuncs[OP_CODES[operation]](a, b)
+            if operation != "div":
+                return Evaluated(result, [])
+            zero = b == 0
+        else:
+            codes = np.asarray(columns.codes, dtype=np.int8)
+            result = np.empty_like(a)
+            for code, ufunc in enumerate(ufuncs):
+                mask = codes == code
+                if mask.any():
+                    ufunc(a, b, out=result, where=mask)
+            zero = (codes == _DIV) & (b == 0)
+    result[zero] = np.nan
+    return Evaluated(result, np.flatnonzero(zero).tolist())
+
+
+def evaluate(columns: Columns, operation: str | None = None) -> Evaluated:
+    """
+    運算一塊欄位，回傳結果陣列 (NumPy 的 ndarray 或 array("d")) 與除數為零的列索引
+
+    operation 為 None 時依每列的運算代碼運算；除數為零的列結果為 nan。
+    """
+    np = compat.load_numpy()
+    if np is not None:
+        return _evaluate_numpy(np, columns, operation)
+    return _evaluate_array(columns, operation)
+
+
+class BulkCalc:
+    """
+    逐塊產生大量計算的結果
+
+    迭代結束後 rows 為總列數，zero_division 為除數為零的列數，
+    zero_division_rows 為其中前 MAX_REPORTED_ROWS 個列號 (從 1 開始)。
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        input_format: str = "csv",
+        *,
+        operation: str | None = None,
+        chunk_rows: int = CALC_CHUNK_ROWS,
+    ) -> None:
+        if input_format not in READERS:
+            raise ValueError(f"不支援的輸入格式: {input_format}")
+        if operation is not None and operation not in OPERATIONS:
+            raise ValueError(f"不支援的操作: {operation}")
+        self.path = path
+        self.input_format = input_format
+        self.operation = operation
+        self.chunk_rows = chunk_rows
+        self.rows = 0
+        self.zero_division = 0
+        self.zero_division_rows: list[int] = []
+
+    def __iter__(self) -> Iterator[Any]:
+        reader = READERS[self.input_format]
+        for columns in reader(
+            self.path, operation=self.operation, chunk_rows=self.chunk_rows
+        ):
+            result, zero_rows = evaluate(columns, self.operation)
+            if zero_rows:
+                self.zero_division += len(zero_rows)
+                room = MAX_REPORTED_ROWS - len(self.zero_division_rows)
+                self.zero_division_rows += [self.rows + i + 1 for i in zero_rows[:room]]
+            self.rows += len(columns.a)
+            yield result
+
+    def zero_division_warning(self) -> str | None:
+        """除數為零的警告訊息 (沒有除數為零的列時為 None，迭代結束後才正確)"""
+        if not self.zero_division:
+            return None
+        rows = ", ".join(map(str, self.zero_division_rows))
+        more = " ..." if self.zero_division > len(self.zero_division_rows) else ""
+        return (
+            f"警告: {self.zero_division} 列除數為零，結果記為 nan (第 {rows}{more} 列)"
+        )
+
+
+def format_results(
+    chunks: Iterable[Any], output_format: str = "text"
+) -> Iterator[bytes]:
+    """
+    把結果陣列編碼成輸出的位元組
+
+    text 每列一個數字 (與 calc 的輸出相同的寫法)；
+    binary 為 little-endian float64，除數為零的列為 NaN。
+    """
+    for result in chunks:
+        if output_format == "binary":
+            np = compat.load_numpy()
+            if np is not None and not isinstance(result, array):
+                yield result.astype("<f8", copy=False).tobytes()
+            else:
+                if sys.byteorder == "big":
+                    result = array("d", result)
+                    result.byteswap()
+                yield result.tobytes()
+        else:
+            values = result.tolist()
+            if values:
+                yield ("\n".join(map(str, values)) + "\n").encode()
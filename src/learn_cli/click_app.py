@@ -5,10 +5,32 @@ Click CLI 範例 - 一個簡單的文字處理工具
 Click 是一個 Python 命令列介面創建工具包，功能強大且靈活。
 """
 
+from contextlib import ExitStack
+from itertools import chain
 from pathlib import Path
 
 import click
 
+from . import calculator, engine, output, sampling
+from .cache import default_cache_path
+
+# 大量輸出的命令共用的 --flush-every 選項
+flush_every_option = click.option(
+    "--flush-every",
+    type=click.IntRange(min=1),
+    help="每輸出 N 行就 flush 一次 (預設：終端機逐行，否則緩衝後大塊寫入)",
+)
+
+# JSON 輸出的共用選項
+compact_option = click.option(
+    "--compact", is_flag=True, help="JSON 不縮排也不含空白 (給程式讀取)"
+)
+
+
+def buffered_stdout(flush_every: int | None) -> output.LineBuffer:
+    """標準輸出的緩衝區，取代熱迴圈中逐行的 click.echo"""
+    return output.LineBuffer(click.get_text_stream("stdout"), flush_every=flush_every)
+
 
 # 創建主要的 Click 群組
 @click.group()
@@ -22,13 +44,15 @@ def cli():
 @click.argument("name")
 @click.option("--count", "-c", default=1, help="重複問候的次數")
 @click.option("--polite", "-p", is_flag=True, help="使用禮貌的問候方式")
-def greet(name, count, polite):
+@flush_every_option
+def greet(name, count, polite, flush_every):
     """
     問候指定的人
     """
     greeting = "您好" if polite else "你好"
-    for _ in range(count):
-        click.echo(f"{greeting}, {name}!")
+    # 每次的內容都相同，組成一次後整塊重複寫入
+    with buffered_stdout(flush_every) as out:
+        out.repeat(f"{greeting}, {name}!\n", count)
 
 
 @cli.command()
@@ -36,14 +60,14 @@ def greet(name, count, polite):
 @click.argument("mom_name")
 @click.option("--count", "-c", default=1, help="重複問候的次數")
 @click.option("--polite", "-p", is_flag=True, help="使用禮貌的問候方式")
-def greet_mom(name, mom_name, count, polite):
+@flush_every_option
+def greet_mom(name, mom_name, count, polite, flush_every):
     """
     問候指定的人和他的媽媽
     """
     greeting = "您好" if polite else "你好"
-    for _ in range(count):
-        click.echo(f"{greeting}, {name}!")
-        click.echo(f"{greeting}, {mom_name}!")
+    with buffered_stdout(flush_every) as out:
+        out.repeat(f"{greeting}, {name}!\n{greeting}, {mom_name}!\n", count)
 
 
 @cli.command()
@@ -51,34 +75,124 @@ def greet_mom(name, mom_name, count, polite):
 @click.argument("title")  # 模仿 mv 的 dest
 @click.option("--prefix", "-p", default=">>> ", help="問候詞前綴")  # 普通 optional
 @click.option("--greeting", "-g", multiple=True, help="多種問候詞")  # 陣列 optional
-def greet_all(names, prefix, title, greeting):
+@click.option(
+    "--names-file",
+    type=click.Path(exists=True, dir_okay=False, allow_dash=True),
+    help="從檔案讀取更多人名 (每行一個，- 表示標準輸入)",
+)
+@click.option(
+    "--greetings-file",
+    type=click.Path(exists=True, dir_okay=False, allow_dash=True),
+    help="從檔案讀取更多問候詞 (每行一個，- 表示標準輸入)",
+)
+@click.option("--dry-run", is_flag=True, help="只計算會輸出的行數與位元組數")
+@flush_every_option
+def greet_all(
+    names,
+    prefix,
+    title,
+    greeting,
+    names_file,
+    greetings_file,
+    dry_run,
+    flush_every,
+):
     """
     綜合測試：問候 + 多選項 + 類似 mv 介面
+
+    人名檔案逐批讀取並輸出，不必全部放進記憶體。
     """
+    from . import greetings
+
+    if names_file == "-" and greetings_file == "-":
+        click.echo("錯誤: 人名與問候詞不能都從標準輸入讀取", err=True)
+        raise click.Abort()
+
     click.echo(f"人名列表: {names}")
     click.echo(f"稱謂: {title}")
     click.echo(f"prefix: {prefix}")
     click.echo(f"問候詞: {greeting}")
-    click.echo("===== 問候結果 =====")
-
-    for name in names:
-        for g in greeting:
-            click.echo(f"{prefix}{g}, {title} {name}!")
+    if names_file:
+        click.echo(f"人名檔案: {names_file}")
+    if greetings_file:
+        click.echo(f"問候詞檔案: {greetings_file}")
+
+    with ExitStack() as stack:
+        all_greetings = list(greeting)
+        if greetings_file:
+            f = stack.enter_context(click.open_file(greetings_file, encoding="utf-8"))
+            all_greetings.extend(greetings.read_values(f))
+        all_names = iter(names)
+        if names_file:
+            f = stack.enter_context(click.open_file(names_file, encoding="utf-8"))
+            all_names = chain(names, greetings.read_values(f))
+        heads = greetings.line_heads(all_greetings, prefix, title)
+
+        if dry_run:
+            result = greetings.estimate(all_names, heads)
+            click.echo(f"將輸出 {result.lines} 行，共 {result.bytes} 位元組 (UTF-8)")
+            return
+
+        click.echo("===== 問候結果 =====")
+        with buffered_stdout(flush_every) as out:
+            for text in greetings.greeting_chunks(all_names, heads):
+                out.write(text)
 
 
 @cli.command()
-@click.argument("text")
+@click.argument("text", required=False)
 @click.option("--chars", "-c", is_flag=True, help="同時顯示字元數")
-def count_words(text, chars):
+@click.option("--lines", "-l", is_flag=True, help="同時顯示行數")
+@click.option(
+    "--file",
+    "-f",
+    "file_paths",
+    multiple=True,
+    type=click.Path(exists=True, dir_okay=False, allow_dash=True, path_type=Path),
+    help="改為計算 UTF-8 檔案的字數 (可重複指定，- 表示標準輸入)",
+)
+@click.option("--jobs", "-j", default=1, help="平行處理的行程數 (0 表示使用所有 CPU)")
+@click.option(
+    "--top",
+    type=click.IntRange(min=1),
+    help="改為以 JSON 輸出出現最多的 K 個單字 (記憶體用量有上限)",
+)
+@compact_option
+def count_words(text, chars, lines, file_paths, jobs, top, compact):
     """
     計算文字的字數
+
+    檔案以二進位逐塊串流計算，不建立單字列表；
+    多個檔案或大檔案可以用 --jobs 分給多個行程計算。
     """
-    words = len(text.split())
-    click.echo(f"字數: {words}")
+    if (text is None) == (not file_paths):
+        click.echo("錯誤: 請指定文字或以 --file 指定檔案 (擇一)", err=True)
+        raise click.Abort()
 
-    if chars:
-        char_count = len(text)
-        click.echo(f"字元數: {char_count}")
+    if top:
+        from . import wordfreq
+
+        try:
+            if file_paths:
+                stdin = click.get_binary_stream("stdin")
+                counts = wordfreq.file_word_counts(file_paths, jobs=jobs, stdin=stdin)
+            else:
+                counts = wordfreq.text_word_counts(text)
+            report = wordfreq.top_words(counts, top)
+            click.echo(wordfreq.format_json(report, compact=compact))
+        except OSError as e:
+            click.echo(f"錯誤: {e}", err=True)
+            raise click.Abort() from e
+        return
+
+    stdin = click.get_binary_stream("stdin")
+    scan = engine.WordCountScan(text, file_paths, jobs=jobs, stdin=stdin)
+    try:
+        for line in engine.format_word_counts(scan, chars=chars, lines=lines):
+            click.echo(line)
+    except OSError as e:
+        click.echo(f"錯誤: {e}", err=True)
+        raise click.Abort() from e
 
 
 @cli.command()
@@ -86,31 +200,26 @@ def count_words(text, chars):
 @click.option("--output", "-o", type=click.Path(path_type=Path), help="輸出檔案路徑")
 @click.option("--uppercase", "-u", is_flag=True, help="轉換為大寫")
 @click.option("--line-numbers", "-n", is_flag=True, help="加上行號")
-def process_file(file_path, output, uppercase, line_numbers):
+@flush_every_option
+def process_file(file_path, output, uppercase, line_numbers, flush_every):
     """
     處理文字檔案
     """
     try:
-        # 讀取檔案
-        content = file_path.read_text(encoding="utf-8")
-        lines = content.splitlines()
-
-        # 處理內容
-        processed_lines = []
-        for i, line in enumerate(lines, 1):
-            processed_line = line.upper() if uppercase else line
-            if line_numbers:
-                processed_line = f"{i:3}: {processed_line}"
-            processed_lines.append(processed_line)
-
-        result = "\n".join(processed_lines)
+        # 逐塊讀取、處理並寫出，記憶體用量與檔案大小無關
+        pieces = engine.process_file(
+            file_path, uppercase=uppercase, line_numbers=line_numbers
+        )
 
         # 輸出結果
         if output:
-            output.write_text(result, encoding="utf-8")
+            engine.write_file(output, pieces, source=file_path)
             click.echo(f"處理完成，結果已儲存至: {output}")
         else:
-            click.echo(result)
+            with buffered_stdout(flush_every) as out:
+                for piece in pieces:
+                    out.write(piece)
+                out.line()
 
     except Exception as e:
         click.echo(f"錯誤: {e}", err=True)
@@ -118,7 +227,7 @@ def process_file(file_path, output, uppercase, line_numbers):
 
 
 @cli.command()
-@click.argument("operation", type=click.Choice(["add", "sub", "mul", "div"]))
+@click.argument("operation", type=click.Choice(list(calculator.OPERATIONS)))
 @click.argument("a", type=float)
 @click.argument("b", type=float)
 def calc(operation, a, b):
@@ -129,20 +238,67 @@ def calc(operation, a, b):
     A: 第一個數字
     B: 第二個數字
     """
-    operations = {
-        "add": lambda x, y: x + y,
-        "sub": lambda x, y: x - y,
-        "mul": lambda x, y: x * y,
-        "div": lambda x, y: x / y if y != 0 else None,
-    }
-
-    result = operations[operation](a, b)
+    result = calculator.calculate(operation, a, b)
     if result is None:
         click.echo("錯誤: 除數不能為零", err=True)
         raise click.Abort()
 
-    op_symbols = {"add": "+", "sub": "-", "mul": "*", "div": "/"}
-    click.echo(f"{a} {op_symbols[operation]} {b} = {result}")
+    click.echo(f"{a} {calculator.SYMBOLS[operation]} {b} = {result}")
+
+
+@cli.command()
+@click.argument(
+    "input_file", type=click.Path(exists=True, dir_okay=False, path_type=Path)
+)
+@click.option(
+    "--format",
+    "-f",
+    "input_format",
+    type=click.Choice(calculator.INPUT_FORMATS),
+    default="csv",
+    help="輸入格式 (csv/ndjson/binary)",
+)
+@click.option(
+    "--op",
+    "operation",
+    type=click.Choice(list(calculator.OPERATIONS)),
+    help="所有列套用同一個運算 (輸入只有 a、b 兩欄)",
+)
+@click.option("--output", "-o", type=click.Path(path_type=Path), help="輸出檔案路徑")
+@click.option(
+    "--output-format",
+    type=click.Choice(calculator.OUTPUT_FORMATS),
+    default="text",
+    help="輸出格式 (text 每列一個數字，binary 為 float64)",
+)
+def calc_bulk(input_file, input_format, operation, output, output_format):
+    """
+    大量計算 - 對檔案中的每一列 (operation, a, b) 進行計算
+
+    CSV 與 NDJSON 的欄位為 operation、a、b；二進位檔為 little-endian float64，
+    運算代碼 0-3 依序為 add/sub/mul/div。除數為零的列結果為 nan，不會中斷計算。
+    """
+    scan = calculator.BulkCalc(input_file, input_format, operation=operation)
+    chunks = calculator.format_results(scan, output_format)
+    try:
+        if output:
+            with engine.open_output(output, source=input_file) as sink:
+                for chunk in chunks:
+                    sink.write(chunk)
+        else:
+            stdout = click.get_binary_stream("stdout")
+            for chunk in chunks:
+                stdout.write(chunk)
+            stdout.flush()
+    except (OSError, ValueError) as e:
+        click.echo(f"錯誤: {e}", err=True)
+        raise click.Abort() from e
+
+    warning = scan.zero_division_warning()
+    if warning:
+        click.echo(warning, err=True)
+    if output:
+        click.echo(f"計算完成，共 {scan.rows} 列，結果已儲存至: {output}")
 
 
 @cli.command()
@@ -154,60 +310,92 @@ def calc(operation, a, b):
     default="text",
     help="輸出格式",
 )
-@click.argument("items", nargs=-1, required=True)
-def list_items(items, output_format):
+@click.option(
+    "--file",
+    "-i",
+    "item_files",
+    multiple=True,
+    type=click.Path(exists=True, dir_okay=False, allow_dash=True),
+    help="從檔案讀取更多項目 (每行一個，可重複指定，- 表示標準輸入)",
+)
+@compact_option
+@flush_every_option
+@click.argument("items", nargs=-1)
+def list_items(items, output_format, item_files, compact, flush_every):
     """
     列出並格式化項目
 
+    項目逐項讀取並逐段輸出，數量再多也不必全部放進記憶體。
+
     ITEMS: 要列出的項目 (可以是多個)
     """
-    if output_format == "json":
-        import json
+    from . import listing
 
-        result = json.dumps(list(items), ensure_ascii=False, indent=2)
-    elif output_format == "csv":
-        result = ",".join(items)
-    else:  # text
-        result = "\n".join(f"- {item}" for item in items)
+    if not items and not item_files:
+        click.echo("錯誤: 請指定項目或以 --file 指定項目檔案", err=True)
+        raise click.Abort()
 
-    click.echo(result)
+    def file_items():
+        for path in item_files:
+            with click.open_file(path, encoding="utf-8") as f:
+                yield from listing.read_items(f)
+
+    all_items = chain(items, file_items())
+    if output_format == "json":
+        pieces = listing.encode_json(all_items, compact=compact)
+    else:
+        pieces = listing.ENCODERS[output_format](all_items)
+    with buffered_stdout(flush_every) as out:
+        for piece in pieces:
+            out.write(piece)
+        out.line()
 
 
 @cli.command()
 @click.argument("file_path", type=click.Path(exists=True, path_type=Path))
-@click.argument("search_term")
-@click.argument("replace_term")
+@click.argument("search_term", required=False)
+@click.argument("replace_term", required=False)
 @click.option("--output", "-o", type=click.Path(path_type=Path), help="輸出檔案路徑")
 @click.option("--case-sensitive/--ignore-case", default=True, help="區分大小寫")
-def search_replace(file_path, search_term, replace_term, output, case_sensitive):
+@click.option("--jobs", "-j", default=1, help="平行處理的行程數 (0 表示使用所有 CPU)")
+@click.option(
+    "--rules",
+    "-r",
+    "rules_path",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="搜尋替換規則檔 (TSV 或 JSON)，一次掃描套用所有規則",
+)
+@click.option("--count-only", is_flag=True, help="只計算符合次數，不輸出替換結果")
+def search_replace(
+    file_path,
+    search_term,
+    replace_term,
+    output,
+    case_sensitive,
+    jobs,
+    rules_path,
+    count_only,
+):
     """
     在檔案中搜尋並替換文字
 
     FILE_PATH: 要搜尋的檔案路徑
-    SEARCH_TERM: 要搜尋的文字
-    REPLACE_TERM: 要替換的文字
+    SEARCH_TERM: 要搜尋的文字 (使用 --rules 時省略)
+    REPLACE_TERM: 要替換的文字 (使用 --rules 時省略)
     """
+    messages = engine.search_replace_output(
+        file_path,
+        search_term,
+        replace_term,
+        output=output,
+        rules_path=rules_path,
+        case_sensitive=case_sensitive,
+        jobs=jobs,
+        count_only=count_only,
+    )
     try:
-        content = file_path.read_text(encoding="utf-8")
-
-        if case_sensitive:
-            new_content = content.replace(search_term, replace_term)
-            count = content.count(search_term)
-        else:
-            import re
-
-            new_content = re.sub(
-                re.escape(search_term), replace_term, content, flags=re.IGNORECASE
-            )
-            count = len(re.findall(re.escape(search_term), content, re.IGNORECASE))
-
-        if output:
-            output.write_text(new_content, encoding="utf-8")
-            click.echo(f"已替換 {count} 處，結果儲存至: {output}")
-        else:
-            click.echo(new_content)
-            click.echo(f"\n已替換 {count} 處", err=True)
-
+        for text, err in messages:
+            click.echo(text, nl=False, err=err)
     except Exception as e:
         click.echo(f"錯誤: {e}", err=True)
         raise click.Abort() from e
@@ -224,77 +412,70 @@ def search_replace(file_path, search_term, replace_term, output, case_sensitive)
     "--format",
     "-f",
     "output_format",
-    type=click.Choice(["text", "json"]),
+    type=click.Choice(["text", "json", "ndjson", "csv", "binary", "arrow", "parquet"]),
     default="text",
-    help="輸出格式",
+    help="輸出格式 (ndjson 會逐檔串流輸出；csv/binary/arrow/parquet 為欄位式)",
+)
+@click.option("--jobs", "-j", default=1, help="平行處理的工作數 (0 表示使用所有 CPU)")
+@click.option(
+    "--executor",
+    type=click.Choice(["thread", "process"]),
+    default="thread",
+    help="平行方式：thread 適合 I/O 為主，process 適合大量行數計算",
 )
-def generate_report(directory, pattern, output_format):
+@click.option("--no-cache", is_flag=True, help="不讀取也不更新行數快取")
+@click.option("--rebuild-cache", is_flag=True, help="忽略既有快取，重新計算所有檔案")
+@compact_option
+@flush_every_option
+def generate_report(
+    directory,
+    pattern,
+    output_format,
+    jobs,
+    executor,
+    no_cache,
+    rebuild_cache,
+    compact,
+    flush_every,
+):
     """
     生成目錄中檔案的統計報告
 
+    行數會快取在 $XDG_CACHE_HOME (預設 ~/.cache) 底下，
+    重複執行時只重新讀取大小或修改時間有變的檔案。
+
+    csv、binary、arrow、parquet 每個檔案一列，大小、行數與修改時間保留原始型別，
+    適合載入資料框或直接記憶體映射 (arrow 與 parquet 需要 pyarrow)。
+
     DIRECTORY: 要分析的目錄路徑
     """
-    import glob
-    import json
-    from datetime import datetime
-
     try:
-        pattern_path = str(directory / pattern)
-        files = glob.glob(pattern_path, recursive=True)
-
-        report_data = {
-            "生成時間": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "目錄": str(directory),
-            "檔案模式": pattern,
-            "檔案數量": len(files),
-            "檔案詳情": [],
-        }
-
-        total_lines = 0
-        total_size = 0
-
-        for file_path in files:
-            try:
-                path_obj = Path(file_path)
-                stat = path_obj.stat()
-                lines = len(path_obj.read_text(encoding="utf-8").splitlines())
-
-                file_info = {
-                    "檔案名": path_obj.name,
-                    "路徑": str(path_obj),
-                    "大小(bytes)": stat.st_size,
-                    "行數": lines,
-                    "修改時間": datetime.fromtimestamp(stat.st_mtime).strftime(
-                        "%Y-%m-%d %H:%M:%S"
-                    ),
-                }
-
-                report_data["檔案詳情"].append(file_info)
-                total_lines += lines
-                total_size += stat.st_size
-
-            except Exception as e:
-                click.echo(f"警告: 無法處理檔案 {file_path}: {e}", err=True)
-
-        report_data["總行數"] = total_lines
-        report_data["總大小(bytes)"] = total_size
-
-        if output_format == "json":
-            click.echo(json.dumps(report_data, ensure_ascii=False, indent=2))
+        scan = engine.ReportScan(
+            directory,
+            pattern,
+            on_error=lambda path, e: click.echo(
+                f"警告: 無法處理檔案 {path}: {e}", err=True
+            ),
+            jobs=jobs,
+            executor=executor,
+            cache_path=None if no_cache else default_cache_path(),
+            rebuild_cache=rebuild_cache,
+        )
+        if output_format not in ("text", "json", "ndjson"):
+            # 欄位式格式：每個檔案一列，保留原始的數值型別
+            from . import columnar
+
+            stdout = click.get_binary_stream("stdout")
+            columnar.write_report(scan.records(), output_format, stdout)
+            return
+        if output_format == "ndjson":
+            # 每處理完一個檔案就輸出一行，不必等整個目錄掃描完
+            lines = engine.iter_ndjson_report(scan)
         else:
-            click.echo("📊 檔案分析報告")
-            click.echo("=" * 40)
-            click.echo(f"生成時間: {report_data['生成時間']}")
-            click.echo(f"分析目錄: {report_data['目錄']}")
-            click.echo(f"檔案模式: {report_data['檔案模式']}")
-            click.echo(f"檔案數量: {report_data['檔案數量']}")
-            click.echo(f"總行數: {report_data['總行數']:,}")
-            click.echo(f"總大小: {report_data['總大小(bytes)']:,} bytes")
-            click.echo("\n📁 檔案詳情:")
-            for file_info in report_data["檔案詳情"]:
-                click.echo(
-                    f"  • {file_info['檔案名']} ({file_info['行數']} 行, {file_info['大小(bytes)']} bytes)"
-                )
+            lines = engine.format_report(scan.report(), output_format, compact=compact)
+        with buffered_stdout(flush_every) as out:
+            for line in lines:
+                out.line(line)
 
     except Exception as e:
         click.echo(f"錯誤: {e}", err=True)
@@ -361,32 +542,154 @@ def interactive_demo():
 @click.option("--min-val", default=1, help="最小值")
 @click.option("--max-val", default=100, help="最大值")
 @click.option("--sort/--no-sort", default=False, help="是否排序結果")
-def random_numbers(count, min_val, max_val, sort):
+@click.option(
+    "--generator",
+    "-g",
+    type=click.Choice(sampling.GENERATORS),
+    help="secure: os.urandom (預設)；fast: 可指定種子的快速產生器",
+)
+@click.option("--seed", type=int, help="fast 產生器的種子 (指定時預設使用 fast)")
+@click.option(
+    "--format",
+    "-f",
+    "output_format",
+    type=click.Choice(sampling.OUTPUT_FORMATS),
+    default="list",
+    help="輸出格式 (list 編號清單；text 每行一個數字；binary/npy 為 int64)",
+)
+@click.option("--output", "-o", type=click.Path(path_type=Path), help="輸出檔案路徑")
+@click.option(
+    "--print/--no-print",
+    "print_numbers",
+    default=True,
+    help="是否輸出數字 (--no-print 只輸出統計，記憶體用量固定)",
+)
+@flush_every_option
+def random_numbers(
+    count,
+    min_val,
+    max_val,
+    sort,
+    generator,
+    seed,
+    output_format,
+    output,
+    print_numbers,
+    flush_every,
+):
     """
     生成隨機數字
+
+    大量生成時可選擇 text、binary 或 npy 格式，統計資訊改為輸出到 stderr
+    (寫入檔案時輸出到 stdout)。統計在生成的同時逐塊累加，
+    包含標準差與近似的百分位數。
     """
-    import random
+    from . import stats
 
     if min_val >= max_val:
         click.echo("錯誤: 最小值必須小於最大值", err=True)
         raise click.Abort()
+    if not print_numbers and output:
+        click.echo("錯誤: --no-print 不能與 --output 同時使用", err=True)
+        raise click.Abort()
+    if output_format in ("binary", "npy") and not (
+        sampling.INT64_MIN <= min_val and max_val <= sampling.INT64_MAX
+    ):
+        click.echo("錯誤: binary 與 npy 格式的範圍必須在 int64 之內", err=True)
+        raise click.Abort()
 
-    # Using random.SystemRandom for better randomness (addresses B311)
-    secure_random = random.SystemRandom()
-    numbers = [secure_random.randint(min_val, max_val) for _ in range(count)]
+    generator = generator or ("fast" if seed is not None else "secure")
+    try:
+        blocks = sampling.random_blocks(
+            count, min_val, max_val, generator=generator, seed=seed
+        )
+    except ValueError as e:
+        click.echo(f"錯誤: {e}", err=True)
+        raise click.Abort() from e
+    # 只輸出統計時不需要排序
+    if sort and print_numbers:
+        blocks = sampling.sort_blocks(blocks, min_val, max_val)
+
+    # 統計資訊在輸出的同時累加，不需要再走訪一次
+    summary = stats.RunningStats()
+
+    def counted(blocks):
+        for block in blocks:
+            summary.update(block)
+            yield block
+
+    stats_to_stderr = print_numbers and output_format != "list" and not output
+    if not print_numbers:
+        for _block in counted(blocks):
+            pass
+    elif output_format == "list":
+        header = f"生成 {count} 個隨機數字 (範圍: {min_val}-{max_val}):"
+        lines = chain([header], sampling.listing_lines(counted(blocks)))
+        if output:
+            with engine.open_output(output, source=None) as sink:
+                for text in lines:
+                    sink.write(f"{text}\n".encode())
+            click.echo(f"已生成 {count} 個隨機數字，結果已儲存至: {output}")
+        else:
+            with buffered_stdout(flush_every) as out:
+                for text in lines:
+                    out.line(text)
+    else:
+        chunks = sampling.encode_blocks(counted(blocks), output_format, count)
+        if output:
+            with engine.open_output(output, source=None) as sink:
+                for chunk in chunks:
+                    sink.write(chunk)
+            click.echo(f"已生成 {count} 個隨機數字，結果已儲存至: {output}")
+        else:
+            stdout = click.get_binary_stream("stdout")
+            for chunk in chunks:
+                stdout.write(chunk)
+            stdout.flush()
+
+    if summary.count:
+        click.echo("\n📊 統計:", err=stats_to_stderr)
+        click.echo(f"  平均值: {summary.mean:.2f}", err=stats_to_stderr)
+        click.echo(f"  最大值: {summary.maximum}", err=stats_to_stderr)
+        click.echo(f"  最小值: {summary.minimum}", err=stats_to_stderr)
+        if summary.stdev is not None:
+            click.echo(f"  標準差: {summary.stdev:.2f}", err=stats_to_stderr)
+        percentiles = ", ".join(
+            f"p{p}={summary.quantile(p / 100):.2f}" for p in stats.PERCENTILES
+        )
+        click.echo(f"  百分位數 (近似): {percentiles}", err=stats_to_stderr)
 
-    if sort:
-        numbers.sort()
 
-    click.echo(f"生成 {count} 個隨機數字 (範圍: {min_val}-{max_val}):")
-    for i, num in enumerate(numbers, 1):
-        click.echo(f"  {i:2d}. {num}")
+@cli.command()
+@click.argument("input_file", type=click.File("r", encoding="utf-8"), default="-")
+@click.option(
+    "--jobs", "-j", type=int, default=1, help="平行執行的工作行程數 (0 表示 CPU 核心數)"
+)
+@click.pass_context
+def batch(ctx, input_file, jobs):
+    """
+    批次執行命令 - 每行一個命令 (例如 calc add 1 2)，依序輸出結果
 
-    # 統計資訊
-    click.echo("\n📊 統計:")
-    click.echo(f"  平均值: {sum(numbers) / len(numbers):.2f}")
-    click.echo(f"  最大值: {max(numbers)}")
-    click.echo(f"  最小值: {min(numbers)}")
+    從檔案或標準輸入 (-) 讀取，全部在同一個行程中執行；
+    空白行與 # 開頭的行會被略過，失敗的命令會在 stderr 標示行號與結束代碼。
+    """
+    from . import runner
+
+    prog_name = ctx.find_root().info_name
+    failed = 0
+    lines = engine.read_lines(input_file)
+    for result in runner.run_batch("click", prog_name, lines, jobs=jobs):
+        if result.stdout:
+            click.echo(result.stdout, nl=False)
+        if result.stderr:
+            click.echo(result.stderr, nl=False, err=True)
+        if result.code:
+            failed += 1
+            click.echo(f"第 {result.line} 行: 結束代碼 {result.code}", err=True)
+
+    if failed:
+        click.echo(f"{failed} 個命令執行失敗", err=True)
+        ctx.exit(1)
 
 
 if __name__ == "__main__":
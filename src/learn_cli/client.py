@@ -0,0 +1,85 @@
+"""
+常駐伺服器的用戶端
+
+把命令轉送給 `learn-clicktyper-automation serve` 啟動的伺服器執行，
+省去每次呼叫都要啟動 Python 並導入 CLI 框架的時間。
+
+這個模組只依賴標準函式庫中啟動很快的部分，讓轉送的成本盡量低。
+
+通訊協定 (Unix socket)：
+
+    請求：4 位元組長度 + 以 NUL 分隔的 [工作目錄, 程式名稱, 框架, 參數...]，
+          並以 SCM_RIGHTS 附上用戶端的 stdin、stdout、stderr 檔案描述符
+    回應：4 位元組有號整數的結束代碼
+
+伺服器直接寫入用戶端傳來的檔案描述符，所以輸出會即時串流給呼叫端，
+不需要經過 socket 轉送。
+"""
+
+import os
+import socket
+
+# 對應 sys.stdin、sys.stdout、sys.stderr 的檔案描述符
+STANDARD_FDS = (0, 1, 2)
+
+
+def default_socket_path() -> str:
+    """預設的 socket 位置 ($XDG_RUNTIME_DIR 或暫存目錄底下，依使用者區分)"""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "learn-clicktyper-automation.sock")
+    return f"/tmp/learn-clicktyper-automation-{os.getuid()}.sock"
+
+
+def encode_request(cwd: str, prog_name: str, framework: str, args: list[str]) -> bytes:
+    """把一次呼叫編碼成請求訊息"""
+    payload = b"\0".join(
+        os.fsencode(part) for part in [cwd, prog_name, framework, *args]
+    )
+    return len(payload).to_bytes(4, "big") + payload
+
+
+def decode_request(payload: bytes) -> tuple[str, str, str, list[str]]:
+    """解碼請求訊息 (不含長度前綴)"""
+    cwd, prog_name, framework, *args = (
+        os.fsdecode(part) for part in payload.split(b"\0")
+    )
+    return cwd, prog_name, framework, args
+
+
+def recv_exactly(conn: socket.socket, size: int) -> bytes:
+    """從 socket 讀取剛好 size 個位元組，連線提早中斷時丟出 ConnectionError"""
+    data = bytearray()
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("連線在訊息結束前中斷")
+        data += chunk
+    return bytes(data)
+
+
+def forward(
+    socket_path: str,
+    framework: str,
+    args: list[str],
+    *,
+    prog_name: str = "learn-clicktyper-automation",
+    fds: tuple[int, int, int] = STANDARD_FDS,
+) -> int | None:
+    """
+    把命令轉送給伺服器執行，回傳結束代碼
+
+    伺服器沒有在執行 (socket 不存在或拒絕連線) 時回傳 None，
+    讓呼叫端改為在目前的行程中執行。
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        try:
+            conn.connect(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None
+        request = encode_request(os.getcwd(), prog_name, framework, args)
+        # 檔案描述符隨第一段資料送出，較長的請求其餘部分再補送
+        sent = socket.send_fds(conn, [request], list(fds))
+        if sent < len(request):
+            conn.sendall(request[sent:])
+        return int.from_bytes(recv_exactly(conn, 4), "big", signed=True)
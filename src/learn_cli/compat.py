@@ -0,0 +1,48 @@
+"""
+選用的相依套件
+
+這些套件沒有安裝時，呼叫端退回標準函式庫的實作。
+"""
+
+from functools import cache
+from typing import Any
+
+
+@cache
+def load_numpy() -> Any | None:
+    """取得 NumPy 模組，沒有安裝時回傳 None"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+@cache
+def load_orjson() -> Any | None:
+    """取得 orjson 模組，沒有安裝時回傳 None"""
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+@cache
+def load_msgspec_json() -> Any | None:
+    """取得 msgspec.json 模組，沒有安裝 msgspec 時回傳 None"""
+    try:
+        import msgspec.json
+    except ImportError:
+        return None
+    return msgspec.json
+
+
+@cache
+def load_pyarrow() -> Any | None:
+    """取得 pyarrow 模組，沒有安裝時回傳 None"""
+    try:
+        import pyarrow
+    except ImportError:
+        return None
+    return pyarrow
@@ -0,0 +1,1335 @@
+"""
+文字處理引擎 - Click 與 Typer 共用的核心邏輯
+
+這個模組不依賴任何 CLI 框架，只負責資料的讀取、轉換與寫出。
+兩個 CLI 前端只處理參數與訊息輸出，實際工作都交給這裡的函式。
+
+資料以管線 (pipeline) 的方式流動，每個階段都是「接收一個可迭代物件、
+回傳一個可迭代物件」的函式：
+
+    read_chunks → decode → 轉換 → encode → write
+
+所有階段都逐塊處理，記憶體用量不隨檔案大小成長。
+"""
+
+import codecs
+import io
+import os
+import sys
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from functools import lru_cache, partial, reduce
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO, NamedTuple, TextIO
+
+if TYPE_CHECKING:
+    import mmap
+    import re
+
+    from .cache import CacheEntry
+
+# 每次讀取的位元組數
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# count-words 平行計算時，每個工作處理的檔案片段大小
+COUNT_SEGMENT_SIZE = 32 << 20
+
+# search_replace 每個工作區塊的最小字元數
+REPLACE_CHUNK_SIZE = 4 << 20
+
+# 往回尋找安全切點的次數上限，超過時改為從區塊開頭依序比對
+SAFE_CUT_ATTEMPTS = 8
+
+# str.splitlines() 視為換行的所有字元
+LINE_BREAKS = frozenset("\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029")
+
+# 管線階段：接收上一階段的輸出，產生下一階段的輸入
+Stage = Callable[[Iterable[Any]], Iterable[Any]]
+
+
+class BlockCount(NamedTuple):
+    """
+    一段 UTF-8 位元組的統計，記錄頭尾的狀態以便合併相鄰區塊
+
+    頭尾是否在單字中決定跨越邊界的單字；開頭的 \n 與結尾的 \r 決定跨越邊界的 \r\n。
+    """
+
+    words: int
+    chars: int
+    starts_in_word: bool
+    ends_in_word: bool
+    breaks: int = 0
+    starts_with_lf: bool = False
+    ends_with_cr: bool = False
+    ends_with_break: bool = False
+    size: int = 0
+
+
+class TextCount(NamedTuple):
+    """count-words 的串流統計結果"""
+
+    lines: int
+    words: int
+    chars: int
+    size: int
+
+
+class FileRecord(NamedTuple):
+    """報告中一筆檔案詳情的原始數值 (欄位式輸出用，修改時間為 Unix 奈秒)"""
+
+    path: str
+    name: str
+    size: int
+    lines: int
+    mtime_ns: int
+
+
+# ===== 管線基礎 =====
+
+
+def run_pipeline(source: Iterable[Any], *stages: Stage) -> Iterator[Any]:
+    """依序串接各個階段，回傳最後一個階段的輸出"""
+    stream = source
+    for stage in stages:
+        stream = stage(stream)
+    yield from stream
+
+
+def parallel_map(
+    fn: Callable[[Any], Any],
+    items: Iterable[Any],
+    *,
+    jobs: int = 1,
+    executor: str = "process",
+) -> Iterator[Any]:
+    """
+    平行執行 fn，並依輸入順序產生結果
+
+    executor 為 "process" (CPU 密集工作) 或 "thread" (I/O 密集工作)。
+    同時在處理中的工作數量有上限，輸入可以是無限長的串流。
+    jobs 為 1 時直接在目前的行程執行；為 0 時使用所有 CPU。
+    """
+    from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+    pool_types: dict[str, type[Executor]] = {
+        "process": ProcessPoolExecutor,
+        "thread": ThreadPoolExecutor,
+    }
+    if executor not in pool_types:
+        raise ValueError(f"不支援的執行方式 '{executor}'，請使用 process 或 thread")
+
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    if jobs <= 1:
+        yield from map(fn, items)
+        return
+
+    with pool_types[executor](max_workers=jobs) as pool:
+        pending: deque[Any] = deque()
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= jobs * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def read_chunks(path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """以固定大小逐塊讀取檔案的原始位元組"""
+    with path.open("rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def read_lines(stream: TextIO) -> Iterator[str]:
+    """
+    逐行讀取文字串流 (保留換行字元)
+
+    以 readline 讀取而不是直接迭代：CliRunner 的輸入串流在迭代到結尾時
+    會丟出 EOFError，readline 則是回傳空字串。
+    """
+    return iter(stream.readline, "")
+
+
+def decode(encoding: str = "utf-8", *, translate_newlines: bool = True) -> Stage:
+    """
+    解碼階段
+
+    使用增量解碼器，多位元組字元被切在兩個區塊之間也能正確解碼。
+    translate_newlines 與 Path.read_text 相同，把 "\\r\\n" 與 "\\r" 轉為 "\\n"。
+    """
+
+    def stage(chunks: Iterable[bytes]) -> Iterator[str]:
+        decoder: codecs.IncrementalDecoder | io.IncrementalNewlineDecoder
+        decoder = codecs.getincrementaldecoder(encoding)()
+        if translate_newlines:
+            decoder = io.IncrementalNewlineDecoder(decoder, translate=True)
+
+        for chunk in chunks:
+            if text := decoder.decode(chunk):
+                yield text
+        if text := decoder.decode(b"", final=True):
+            yield text
+
+    return stage
+
+
+def encode(encoding: str = "utf-8") -> Stage:
+    """編碼階段"""
+
+    def stage(chunks: Iterable[str]) -> Iterator[bytes]:
+        encoder = codecs.getincrementalencoder(encoding)()
+        for chunk in chunks:
+            if data := encoder.encode(chunk):
+                yield data
+        if data := encoder.encode("", final=True):
+            yield data
+
+    return stage
+
+
+@contextmanager
+def open_output(path: Path, *, source: Path | None = None) -> Iterator[BinaryIO]:
+    """
+    以二進位模式開啟輸出檔案
+
+    串流處理時來源尚未讀完就會開始寫出，若輸出與來源是同一個檔案，
+    先寫入同目錄的暫存檔，完成後再取代原檔。
+    """
+    if source is None or not path.exists() or not os.path.samefile(path, source):
+        with path.open("wb") as sink:
+            yield sink
+        return
+
+    import tempfile
+
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with open(fd, "wb") as sink:
+            yield sink
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+@contextmanager
+def map_file(path: Path) -> Iterator["mmap.mmap | bytes"]:
+    """
+    以唯讀記憶體映射開啟檔案
+
+    內容直接由作業系統的分頁快取提供，不需要先讀入並解碼成字串。
+    空檔案無法映射，改為回傳空的 bytes。
+    """
+    import mmap
+
+    with path.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def write_file(
+    path: Path,
+    chunks: Iterable[str],
+    *,
+    source: Path | None = None,
+    encoding: str = "utf-8",
+) -> None:
+    """編碼並寫出文字片段 (管線的最後兩個階段)"""
+    with open_output(path, source=source) as sink:
+        sink.writelines(run_pipeline(chunks, encode(encoding)))
+
+
+def read_text(
+    path: Path, encoding: str = "utf-8", chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> str:
+    """讀取整個檔案為字串 (與 Path.read_text 相同的換行處理)"""
+    return "".join(run_pipeline(read_chunks(path, chunk_size), decode(encoding)))
+
+
+# ===== process_file =====
+
+
+def process_lines(*, uppercase: bool = False, line_numbers: bool = False) -> Stage:
+    """
+    逐行轉換階段 (大寫、行號)
+
+    串接所有輸出片段後，結果與 "\\n".join(處理後的 content.splitlines()) 完全相同：
+    行與行之間以 "\\n" 分隔，最後一行之後不加換行。
+    輸入必須已經過換行轉換，讓 "\\r\\n" 先變成 "\\n"。
+    """
+
+    def stage(chunks: Iterable[str]) -> Iterator[str]:
+        line_no = 0
+        in_line = False
+
+        for chunk in chunks:
+            pieces = []
+            for part in chunk.splitlines(keepends=True):
+                if not in_line:
+                    if line_no:
+                        pieces.append("\n")
+                    line_no += 1
+                    if line_numbers:
+                        pieces.append(f"{line_no:3}: ")
+                    in_line = True
+
+                # 換行字元都是單一字元，區塊尾端未結束的行直接輸出，下一塊接著寫
+                if part[-1] in LINE_BREAKS:
+                    part = part[:-1]
+                    in_line = False
+
+                pieces.append(part.upper() if uppercase else part)
+
+            yield "".join(pieces)
+
+    return stage
+
+
+def process_file(
+    path: Path,
+    *,
+    uppercase: bool = False,
+    line_numbers: bool = False,
+    encoding: str = "utf-8",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[str]:
+    """讀取並處理文字檔案，產生輸出片段"""
+    return run_pipeline(
+        read_chunks(path, chunk_size),
+        decode(encoding),
+        process_lines(uppercase=uppercase, line_numbers=line_numbers),
+    )
+
+
+# ===== search_replace =====
+
+
+@lru_cache(maxsize=32)
+def compile_ignore_case(search_term: str) -> "re.Pattern[str]":
+    """把搜尋字串編譯為不分大小寫的正規表示式 (同一個字串只編譯一次)"""
+    import re
+
+    return re.compile(re.escape(search_term), re.IGNORECASE)
+
+
+def replace_text(
+    content: str, search_term: str, replace_term: str, *, case_sensitive: bool = True
+) -> tuple[str, int]:
+    """
+    搜尋並替換文字，回傳 (新內容, 替換次數)
+
+    不分大小寫時以 subn 一次完成替換與計數。
+    區分大小寫時 str.replace + str.count 都是 C 層級的字串搜尋，
+    實測仍比逐一比對的 re.subn 快，因此保留。
+    """
+    if case_sensitive:
+        return content.replace(search_term, replace_term), content.count(search_term)
+
+    return compile_ignore_case(search_term).subn(replace_term, content)
+
+
+class ReplaceStream:
+    """
+    串流替換的結果
+
+    迭代取得輸出片段；迭代結束後 count 為總替換次數。
+    """
+
+    def __init__(self, results: Iterable[tuple[str, int]]) -> None:
+        self._results = results
+        self.count = 0
+
+    def __iter__(self) -> Iterator[str]:
+        for text, count in self._results:
+            self.count += count
+            yield text
+
+
+def split_at_safe_points(
+    texts: Iterable[str],
+    search_term: str,
+    *,
+    case_sensitive: bool = True,
+    chunk_size: int = REPLACE_CHUNK_SIZE,
+) -> Iterator[str]:
+    """
+    把文字串流重新切成至少 chunk_size 字元的區塊，且切點不會落在任何符合項中間
+
+    候選切點 q 前後各保留 len(search_term) - 1 個字元的重疊區，
+    若重疊區內有符合項 (代表它跨越 q)，就把切點移到該符合項的開頭再檢查一次。
+    符合項密集重疊 (例如在 "aaaa..." 中搜尋 "aa") 時找不到這樣的切點，
+    改為從區塊開頭依序比對，切在跨越 q 的那個符合項的開頭。
+    在這樣的切點分開後，各區塊分別替換的結果與整份文字一次替換完全相同，
+    跨越邊界的符合項不會被遺漏，也不會被重複計算。
+    """
+    overlap = len(search_term) - 1
+    if overlap < 0:
+        # 空字串在每個位置都符合，無法安全切分
+        yield "".join(texts)
+        return
+
+    if case_sensitive:
+        import re
+
+        pattern = re.compile(re.escape(search_term))
+
+        def find_spanning(text: str, cut: int) -> int:
+            return text.find(search_term, cut - overlap, cut + overlap)
+
+    else:
+        pattern = compile_ignore_case(search_term)
+
+        def find_spanning(text: str, cut: int) -> int:
+            match = pattern.search(text, cut - overlap, cut + overlap)
+            return match.start() if match else -1
+
+    yield from _split_chunks(texts, find_spanning, pattern, overlap, chunk_size)
+
+
+def _split_chunks(
+    texts: Iterable[str],
+    find_spanning: Callable[[str, int], int],
+    pattern: "re.Pattern[str]",
+    overlap: int,
+    chunk_size: int,
+) -> Iterator[str]:
+    """
+    split_at_safe_points 的共用切分迴圈
+
+    find_spanning(text, cut) 回傳跨越 cut 的符合項起點，沒有則回傳 -1；
+    它最多只會讀到 cut + overlap 的位置。pattern.finditer 的符合項
+    必須與替換時相同。buffer 的開頭一定是安全的切點。
+    """
+    buffer = ""
+    for text in texts:
+        buffer += text
+        if len(buffer) < chunk_size + overlap:
+            continue
+
+        target = len(buffer) - overlap
+        lowest = max(chunk_size // 2, overlap)
+        cut = _step_back_cut(find_spanning, buffer, target, lowest)
+        if cut is None:
+            cut = _greedy_cut(pattern, buffer, target)
+        if cut:
+            yield buffer[:cut]
+            buffer = buffer[cut:]
+
+    if buffer:
+        yield buffer
+
+
+def _step_back_cut(
+    find_spanning: Callable[[str, int], int], text: str, cut: int, lowest: int
+) -> int | None:
+    """
+    從 cut 往回移到跨越它的符合項開頭，直到沒有符合項跨越為止
+
+    最多檢查 SAFE_CUT_ATTEMPTS 次，找不到或切點不大於 lowest 時回傳 None。
+    """
+    for _ in range(SAFE_CUT_ATTEMPTS):
+        if cut <= lowest:
+            return None
+        start = find_spanning(text, cut)
+        if start < 0:
+            return cut
+        cut = start
+    return None
+
+
+def _greedy_cut(pattern: "re.Pattern[str]", text: str, cut: int) -> int:
+    """
+    從 text 的開頭 (安全的切點) 依序比對，回傳跨越 cut 的符合項起點
+
+    替換時的符合項就是這些不重疊的符合項，所以它們的起點都是安全的切點；
+    沒有符合項跨越 cut 時 cut 本身就是安全的。
+    """
+    for match in pattern.finditer(text):
+        if match.end() > cut:
+            return min(match.start(), cut)
+    return cut
+
+
+def search_replace_file(
+    path: Path,
+    search_term: str,
+    replace_term: str,
+    *,
+    case_sensitive: bool = True,
+    jobs: int = 1,
+    encoding: str = "utf-8",
+    chunk_size: int = REPLACE_CHUNK_SIZE,
+) -> ReplaceStream:
+    """
+    分塊搜尋並替換檔案內容
+
+    檔案被切成不會截斷符合項的區塊，各區塊的替換與計數交給行程池平行處理，
+    結果依原本順序串流輸出。
+    """
+    chunks = split_at_safe_points(
+        run_pipeline(read_chunks(path), decode(encoding)),
+        search_term,
+        case_sensitive=case_sensitive,
+        chunk_size=chunk_size,
+    )
+    replace = partial(
+        replace_text,
+        search_term=search_term,
+        replace_term=replace_term,
+        case_sensitive=case_sensitive,
+    )
+    return ReplaceStream(parallel_map(replace, chunks, jobs=jobs))
+
+
+def load_rules(path: Path) -> list[tuple[str, str]]:
+    """
+    讀取搜尋替換規則檔
+
+    .json 檔可以是 {"搜尋": "替換"} 物件或 [["搜尋", "替換"], ...] 陣列；
+    其他副檔名視為 TSV，每行以第一個 tab 分隔搜尋與替換文字，
+    空白行與 # 開頭的註解行會被略過。
+    """
+    text = read_text(path)
+
+    if path.suffix.lower() == ".json":
+        import json
+
+        data = json.loads(text)
+        pairs = list(data.items()) if isinstance(data, dict) else data
+        rules = []
+        for i, pair in enumerate(pairs, 1):
+            if (
+                not isinstance(pair, list | tuple)
+                or len(pair) != 2
+                or not all(isinstance(term, str) for term in pair)
+            ):
+                raise ValueError(f"規則 {i} 必須是 [搜尋, 替換] 字串對")
+            rules.append((pair[0], pair[1]))
+        return rules
+
+    rules = []
+    for line_no, line in enumerate(text.splitlines(), 1):
+        if not line.strip() or line.startswith("#"):
+            continue
+        search_term, tab, replace_term = line.partition("\t")
+        if not tab:
+            raise ValueError(f"規則檔第 {line_no} 行缺少 tab 分隔")
+        rules.append((search_term, replace_term))
+    return rules
+
+
+class ReplaceRules:
+    """
+    一次套用多組搜尋替換規則
+
+    所有搜尋字串合併為一個以字典樹 (trie) 展開的正規表示式，
+    共同前綴只比對一次，每個位置的成本與規則數量無關。
+    比對採「最左最長」語意：從左到右掃描，同一位置有多條規則符合時取最長者；
+    替換後的文字不會再被其他規則比對。
+    """
+
+    def __init__(
+        self, rules: Iterable[tuple[str, str]], *, case_sensitive: bool = True
+    ) -> None:
+        import re
+
+        self.rules = list(rules)
+        self.case_sensitive = case_sensitive
+        if not self.rules:
+            raise ValueError("沒有任何規則")
+
+        self._index: dict[str, int] = {}
+        for i, (search_term, _) in enumerate(self.rules):
+            if not search_term:
+                raise ValueError(f"規則 {i + 1} 的搜尋文字是空的")
+            key = self._key(search_term)
+            if key in self._index:
+                raise ValueError(f"規則 {i + 1} 的搜尋文字重複: {search_term!r}")
+            self._index[key] = i
+
+        self.max_len = max(len(search_term) for search_term, _ in self.rules)
+        flags = 0 if case_sensitive else re.IGNORECASE
+        self.pattern = re.compile(_trie_regex(self._index), flags)
+
+    def _key(self, text: str) -> str:
+        return text if self.case_sensitive else text.lower()
+
+    def _rule_for(self, matched: str) -> int:
+        index = self._index.get(self._key(matched))
+        if index is not None:
+            return index
+        # re 的不分大小寫比對與 str.lower 不完全一致 (例如 K 與 Kelvin 符號)
+        return next(
+            i
+            for i, (search_term, _) in enumerate(self.rules)
+            if compile_ignore_case(search_term).fullmatch(matched)
+        )
+
+    def replace(self, content: str) -> tuple[str, list[int]]:
+        """替換文字，回傳 (新內容, 每條規則的替換次數)"""
+        counts = [0] * len(self.rules)
+
+        def substitute(match: "re.Match[str]") -> str:
+            i = self._rule_for(match.group())
+            counts[i] += 1
+            return self.rules[i][1]
+
+        return self.pattern.sub(substitute, content), counts
+
+    def find_spanning(self, text: str, cut: int) -> int:
+        """回傳跨越 cut 的最長符合項起點，沒有則回傳 -1"""
+        for start in range(max(cut - self.max_len + 1, 0), cut):
+            match = self.pattern.match(text, start)
+            if match and match.end() > cut:
+                return start
+        return -1
+
+
+def _trie_regex(terms: Iterable[str]) -> str:
+    """把字串集合轉為字典樹形狀的正規表示式，分支越長越優先"""
+    import re
+
+    trie: dict[str, Any] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict[str, Any]) -> str:
+        branches = [
+            re.escape(char) + build(child) for char, child in node.items() if char
+        ]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        # 貪婪的 ? 先嘗試更長的分支，都不符合時才在這裡結束
+        return group + "?" if "" in node else group
+
+    return build(trie)
+
+
+class RulesReplaceStream:
+    """
+    多規則串流替換的結果
+
+    迭代取得輸出片段；迭代結束後 counts 為 rules 中每條規則的替換次數。
+    """
+
+    def __init__(
+        self, results: Iterable[tuple[str, list[int]]], rules: list[tuple[str, str]]
+    ) -> None:
+        self._results = results
+        self.rules = rules
+        self.counts = [0] * len(rules)
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def __iter__(self) -> Iterator[str]:
+        for text, counts in self._results:
+            self.counts = [a + b for a, b in zip(self.counts, counts, strict=True)]
+            yield text
+
+
+def search_replace_rules_file(
+    path: Path,
+    rules: ReplaceRules,
+    *,
+    jobs: int = 1,
+    encoding: str = "utf-8",
+    chunk_size: int = REPLACE_CHUNK_SIZE,
+) -> RulesReplaceStream:
+    """以多組規則分塊搜尋並替換檔案內容，一次掃描套用所有規則"""
+    chunks = _split_chunks(
+        run_pipeline(read_chunks(path), decode(encoding)),
+        rules.find_spanning,
+        rules.pattern,
+        rules.max_len - 1,
+        chunk_size,
+    )
+    return RulesReplaceStream(
+        parallel_map(rules.replace, chunks, jobs=jobs), rules.rules
+    )
+
+
+# 不分大小寫比對時，與 ASCII 字母等價的非 ASCII 字元 (İ ı K ſ) 的 UTF-8 編碼
+_IGNORE_CASE_EXTRA = {
+    "i": (b"\xc4\xb0", b"\xc4\xb1"),
+    "k": (b"\xe2\x84\xaa",),
+    "s": (b"\xc5\xbf",),
+}
+
+
+def utf8_search_pattern(
+    search_term: str, *, case_sensitive: bool = True
+) -> "re.Pattern[bytes] | None":
+    """
+    把搜尋字串轉為直接比對 UTF-8 位元組的正規表示式
+
+    UTF-8 可自我同步，編碼後的搜尋字串只會在字元邊界符合，
+    因此在位元組上計數與解碼後計數的結果相同。
+    無法保證相同時回傳 None：空字串、含換行字元 (解碼時會做換行轉換)、
+    或不分大小寫的非 ASCII 搜尋字串。
+    """
+    if not search_term or "\r" in search_term or "\n" in search_term:
+        return None
+
+    import re
+
+    if case_sensitive:
+        return re.compile(re.escape(search_term.encode("utf-8")))
+    if not search_term.isascii():
+        return None
+
+    parts = []
+    for char in search_term:
+        if char.isalpha():
+            alternatives = [f"[{char.lower()}{char.upper()}]".encode("ascii")]
+            alternatives.extend(
+                re.escape(extra) for extra in _IGNORE_CASE_EXTRA.get(char.lower(), ())
+            )
+            parts.append(b"(?:" + b"|".join(alternatives) + b")")
+        else:
+            parts.append(re.escape(char.encode("ascii")))
+    return re.compile(b"".join(parts))
+
+
+def count_matches(
+    path: Path, search_term: str, *, case_sensitive: bool = True, jobs: int = 1
+) -> int:
+    """
+    只計算檔案中的符合次數
+
+    可以的話以記憶體映射直接在位元組上搜尋，完全不解碼；
+    否則退回一般的分塊解碼流程。
+    """
+    pattern = utf8_search_pattern(search_term, case_sensitive=case_sensitive)
+    if pattern is None:
+        stream = search_replace_file(
+            path, search_term, "", case_sensitive=case_sensitive, jobs=jobs
+        )
+        for _ in stream:
+            pass
+        return stream.count
+
+    with map_file(path) as data:
+        return sum(1 for _ in pattern.finditer(data))
+
+
+def search_replace_output(
+    file_path: Path,
+    search_term: str | None,
+    replace_term: str | None,
+    *,
+    output: Path | None = None,
+    rules_path: Path | None = None,
+    case_sensitive: bool = True,
+    jobs: int = 1,
+    count_only: bool = False,
+) -> Iterator[tuple[str, bool]]:
+    """
+    執行 search-replace 並逐段產生要輸出的 (文字, 是否寫到 stderr)
+
+    文字已包含換行，前端原樣寫出即可。替換結果輸出到標準輸出時，
+    次數與每條規則的統計改寫到 stderr，避免混入結果。
+    參數不正確時丟出 ValueError，找不到檔案時丟出附檔名訊息的 FileNotFoundError。
+    """
+    if rules_path is None and (
+        search_term is None or (replace_term is None and not count_only)
+    ):
+        raise ValueError("需要搜尋與替換文字，或以 --rules 指定規則檔")
+    if rules_path is not None and search_term is not None:
+        raise ValueError("使用 --rules 時不能再指定搜尋與替換文字")
+
+    try:
+        if count_only and rules_path is None:
+            # 只計數時以記憶體映射直接搜尋位元組，不解碼也不產生輸出
+            count = count_matches(
+                file_path, search_term, case_sensitive=case_sensitive, jobs=jobs
+            )
+            yield f"找到 {count} 處\n", False
+            return
+
+        result: ReplaceStream | RulesReplaceStream
+        if rules_path is not None:
+            rules = ReplaceRules(load_rules(rules_path), case_sensitive=case_sensitive)
+            result = search_replace_rules_file(file_path, rules, jobs=jobs)
+        else:
+            result = search_replace_file(
+                file_path,
+                search_term,
+                replace_term or "",
+                case_sensitive=case_sensitive,
+                jobs=jobs,
+            )
+
+        to_stdout = not (output or count_only)
+        if count_only:
+            for _ in result:
+                pass
+            yield f"找到 {result.count} 處\n", False
+        elif output:
+            write_file(output, result, source=file_path)
+            yield f"已替換 {result.count} 處，結果儲存至: {output}\n", False
+        else:
+            for piece in result:
+                yield piece, False
+            yield "\n", False
+            yield f"\n已替換 {result.count} 處\n", True
+
+        if isinstance(result, RulesReplaceStream):
+            for (search, replace), count in zip(
+                result.rules, result.counts, strict=True
+            ):
+                yield f"  {search} → {replace}: {count} 處\n", to_stdout
+    except FileNotFoundError as e:
+        raise FileNotFoundError(f"找不到檔案 {e.filename or file_path}") from e
+
+
+# ===== count_words =====
+
+# ASCII 中 str.isspace() 為真的字元 (包含 \x1c-\x1f)
+_ASCII_SPACE = b"\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f "
+
+# 空白位元組轉為 b" "，其他轉為 b"x"
+_WORD_MARKS = bytes(0x20 if byte in _ASCII_SPACE else 0x78 for byte in range(256))
+
+# UTF-8 多位元組字元的後續位元組
+_UTF8_CONTINUATION = bytes(range(0x80, 0xC0))
+
+
+@lru_cache(maxsize=1)
+def _utf8_e2_space() -> "re.Pattern[bytes]":
+    """UTF-8 中以 \xe2 開頭、str.isspace() 為真的字元 (\u2000-\u200a 等)"""
+    import re
+
+    return re.compile(rb"\xe2(?:\x80[\x80-\x8a\xa8\xa9\xaf]|\x81\x9f)")
+
+
+def _replace_multibyte_spaces(block: bytes) -> bytes:
+    """
+    把 UTF-8 中 str.isspace() 為真的多位元組字元換成 b" "
+
+    先以開頭位元組判斷可能出現哪些字元，只對需要的部分做替換；
+    大部分的中文字與表情符號不會用到這些開頭位元組。
+    """
+    if b"\xc2" in block:
+        block = block.replace(b"\xc2\x85", b" ").replace(b"\xc2\xa0", b" ")
+    if b"\xe1\x9a\x80" in block:
+        block = block.replace(b"\xe1\x9a\x80", b" ")
+    if b"\xe2" in block:
+        block = _utf8_e2_space().sub(b" ", block)
+    if b"\xe3\x80\x80" in block:
+        block = block.replace(b"\xe3\x80\x80", b" ")
+    return block
+
+
+def count_utf8_block(block: bytes) -> BlockCount:
+    """
+    直接在 UTF-8 位元組上計算字數、字元數與換行數，不解碼也不建立單字列表
+
+    字數與 str.split() 相同：把空白標成 b" "、其他標成 b"x"，
+    單字數就是 b" x" 的出現次數 (加上開頭就是單字的情況)。
+    字元數是非後續位元組的數量；換行與 str.splitlines() 相同 (\r\n 算一次)。
+    """
+    chars = len(block.translate(None, _UTF8_CONTINUATION))
+    breaks = _count_breaks(block)
+    starts_with_lf = block.startswith(b"\n")
+    ends_with_cr = block.endswith(b"\r")
+    ends_with_break = block.endswith((b"\r", *_LINE_BREAK_BYTES, *_UTF8_LINE_BREAKS))
+    size = len(block)
+    if not block.isascii():
+        block = _replace_multibyte_spaces(block)
+    marks = block.translate(_WORD_MARKS)
+    starts_in_word = marks.startswith(b"x")
+    return BlockCount(
+        words=marks.count(b" x") + starts_in_word,
+        chars=chars,
+        starts_in_word=starts_in_word,
+        ends_in_word=marks.endswith(b"x"),
+        breaks=breaks,
+        starts_with_lf=starts_with_lf,
+        ends_with_cr=ends_with_cr,
+        ends_with_break=ends_with_break,
+        size=size,
+    )
+
+
+_EMPTY_BLOCK = BlockCount(words=0, chars=0, starts_in_word=False, ends_in_word=False)
+
+
+def combine_block_counts(first: BlockCount, second: BlockCount) -> BlockCount:
+    """合併相鄰的兩段統計；跨越邊界的單字與 \r\n 只算一次"""
+    if not (first.chars or first.size):
+        return second
+    if not (second.chars or second.size):
+        return first
+    return BlockCount(
+        words=first.words
+        + second.words
+        - (first.ends_in_word and second.starts_in_word),
+        chars=first.chars + second.chars,
+        starts_in_word=first.starts_in_word,
+        ends_in_word=second.ends_in_word,
+        breaks=first.breaks
+        + second.breaks
+        - (first.ends_with_cr and second.starts_with_lf),
+        starts_with_lf=first.starts_with_lf,
+        ends_with_cr=second.ends_with_cr,
+        ends_with_break=second.ends_with_break,
+        size=first.size + second.size,
+    )
+
+
+def _text_count(block: BlockCount) -> TextCount:
+    """最後一行沒有換行也算一行"""
+    lines = block.breaks + bool(block.size and not block.ends_with_break)
+    return TextCount(lines=lines, words=block.words, chars=block.chars, size=block.size)
+
+
+def count_text(text: str) -> TextCount:
+    """以 UTF-8 位元組計算文字的行數、字數與字元數"""
+    return _text_count(count_utf8_block(text.encode("utf-8", "surrogateescape")))
+
+
+def _utf8_cut(data: bytes) -> int:
+    """最後一個可能不完整的多位元組字元的開頭 (沒有時為資料長度)"""
+    if not data or data[-1] < 0x80:
+        return len(data)
+    for i in range(len(data) - 1, max(len(data) - 5, -1), -1):
+        if data[i] >= 0xC0:
+            return i
+    return len(data)
+
+
+def utf8_chunks(
+    stream: BinaryIO, limit: int | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """
+    從二進位串流逐塊讀取 UTF-8 資料 (最多 limit 個位元組)
+
+    每塊結尾不完整的多位元組字元留到下一塊，所以切點不會落在字元中間。
+    """
+    tail = b""
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = chunk_size if remaining is None else min(chunk_size, remaining)
+        chunk = stream.read(size)
+        if not chunk:
+            break
+        if remaining is not None:
+            remaining -= len(chunk)
+        data = tail + chunk
+        cut = _utf8_cut(data)
+        tail = data[cut:]
+        if cut:
+            yield data[:cut]
+    if tail:
+        yield tail
+
+
+def count_stream(stream: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> TextCount:
+    """計算二進位串流 (例如標準輸入) 的行數、字數與字元數"""
+    blocks = map(count_utf8_block, utf8_chunks(stream, chunk_size=chunk_size))
+    return _text_count(reduce(combine_block_counts, blocks, _EMPTY_BLOCK))
+
+
+def _segments(path: Path, size: int) -> list[tuple[str, int, int]]:
+    """把檔案切成約 size 位元組的片段，切點往後移到字元開頭"""
+    with path.open("rb") as f:
+        total = os.fstat(f.fileno()).st_size
+        cuts = [0]
+        for offset in range(size, total, size):
+            f.seek(offset)
+            head = f.read(4)
+            # 讀到的都是接續位元組時 (字元延伸到檔案結尾)，切點放在讀到的結尾
+            skip = next(
+                (i for i, b in enumerate(head) if not 0x80 <= b < 0xC0), len(head)
+            )
+            cuts.append(offset + skip)
+        cuts.append(total)
+    return [(str(path), start, end) for start, end in zip(cuts, cuts[1:], strict=False)]
+
+
+def _count_segment(segment: tuple[str, int, int]) -> BlockCount:
+    """計算檔案中一個片段的統計 (平行工作的單位)"""
+    path, start, end = segment
+    with open(path, "rb") as f:
+        f.seek(start)
+        blocks = map(count_utf8_block, utf8_chunks(f, end - start))
+        return reduce(combine_block_counts, blocks, _EMPTY_BLOCK)
+
+
+def count_files(
+    paths: Iterable[Path],
+    *,
+    jobs: int = 1,
+    stdin: BinaryIO | None = None,
+    segment_size: int = COUNT_SEGMENT_SIZE,
+) -> Iterator[tuple[Path, TextCount]]:
+    """
+    依序計算每個檔案的行數、字數與字元數，路徑為 - 時讀取 stdin
+
+    檔案切成片段後交給行程池平行計算 (jobs 為 0 時使用所有 CPU)，
+    再依順序合併；所以多個檔案與單一的大檔案都能平行處理。
+    """
+    paths = list(paths)
+    segments = {
+        path: _segments(path, segment_size) for path in paths if str(path) != "-"
+    }
+    results = parallel_map(
+        _count_segment,
+        (segment for path in paths for segment in segments.get(path, ())),
+        jobs=jobs,
+    )
+    for path in paths:
+        if str(path) == "-":
+            yield path, count_stream(stdin if stdin is not None else sys.stdin.buffer)
+            continue
+        parts = [next(results) for _ in segments[path]]
+        yield path, _text_count(reduce(combine_block_counts, parts, _EMPTY_BLOCK))
+
+
+class WordCountScan:
+    """
+    count-words 的計數結果
+
+    逐一產生 (路徑, 計數)，直接計算文字時路徑為 None；
+    迭代結束後 total 是所有結果的總計。
+    """
+
+    def __init__(
+        self,
+        text: str | None,
+        file_paths: Iterable[Path],
+        *,
+        jobs: int = 1,
+        stdin: BinaryIO | None = None,
+    ) -> None:
+        self.text = text
+        self.file_paths = list(file_paths)
+        self.total = TextCount(0, 0, 0, 0)
+        self._jobs = jobs
+        self._stdin = stdin
+
+    def __iter__(self) -> Iterator[tuple[Path | None, TextCount]]:
+        results: Iterable[tuple[Path | None, TextCount]]
+        if self.file_paths:
+            results = count_files(self.file_paths, jobs=self._jobs, stdin=self._stdin)
+        else:
+            results = [(None, count_text(self.text or ""))]
+        for path, result in results:
+            self.total = TextCount(*map(sum, zip(self.total, result, strict=True)))
+            yield path, result
+
+
+def format_word_counts(
+    scan: WordCountScan, *, chars: bool = False, lines: bool = False
+) -> Iterator[str]:
+    """把字數計算格式化為輸出行：多個檔案時先逐檔列出，最後是總計"""
+    for path, result in scan:
+        if len(scan.file_paths) > 1:
+            summary = f"{path}: 字數 {result.words}"
+            if chars:
+                summary += f"，字元數 {result.chars}"
+            if lines:
+                summary += f"，行數 {result.lines}"
+            yield summary
+
+    yield f"字數: {scan.total.words}"
+    if chars:
+        yield f"字元數: {scan.total.chars}"
+    if lines:
+        yield f"行數: {scan.total.lines}"
+
+
+# ===== generate_report =====
+
+
+# generate_report 每個平行工作處理的檔案數
+REPORT_BATCH_SIZE = 256
+
+# 單一位元組的換行字元；\r 另外處理，讓 \r\n 只算一次
+_LINE_BREAK_BYTES = (b"\n", b"\x0b", b"\x0c", b"\x1c", b"\x1d", b"\x1e")
+
+# UTF-8 編碼的多位元組換行字元 (\x85、\u2028、\u2029)
+_UTF8_LINE_BREAKS = (b"\xc2\x85", b"\xe2\x80\xa8", b"\xe2\x80\xa9")
+
+# translate 時要刪除的位元組：換行字元 (與多位元組換行字元的最後一個位元組) 以外的全部
+_NON_BREAK_BYTES = bytes(
+    set(range(256)) - set(b"".join(_LINE_BREAK_BYTES)) - set(b"\r\x85\xa8\xa9")
+)
+
+
+def _count_breaks(data: bytes) -> int:
+    """
+    計算資料中的換行數 (\r\n 算一次)
+
+    先以一次 translate 只留下可能是換行的位元組，大部分的計數在這個小得多的結果上進行；
+    只有真的出現 \r 或多位元組換行的最後一個位元組時，才回到原始資料確認。
+    """
+    kept = data.translate(None, _NON_BREAK_BYTES)
+    if not kept:
+        return 0
+
+    breaks = sum(kept.count(sep) for sep in _LINE_BREAK_BYTES)
+    if b"\r" in kept:
+        breaks += kept.count(b"\r") - data.count(b"\r\n")
+    for sep in _UTF8_LINE_BREAKS:
+        if sep[-1:] in kept:
+            breaks += data.count(sep)
+    return breaks
+
+
+def count_lines(path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    直接在位元組上計算檔案行數，不解碼也不建立行的列表
+
+    結果與 len(path.read_text().splitlines()) 相同：
+    所有 str.splitlines() 認得的換行字元都算，最後一行沒有換行也算一行。
+    只要換行字元與 ASCII 相容 (UTF-8、Latin-1、Big5 等)，不是 UTF-8 的檔案也能計算。
+    """
+    breaks = 0
+    tail = b""
+    for chunk in read_chunks(path, chunk_size):
+        # 接上前一塊結尾的位元組，跨越區塊的 \r\n 與多位元組換行字元才會被算到；
+        # 只出現在 tail 裡的部分在前一塊已經算過，要扣掉
+        data = tail + chunk
+        breaks += _count_breaks(data) - _count_breaks(tail)
+        tail = data[-3:]
+
+    if not tail:
+        return 0
+    ends_with_break = tail.endswith((b"\r", *_LINE_BREAK_BYTES, *_UTF8_LINE_BREAKS))
+    return breaks + (not ends_with_break)
+
+
+def _scan_file(
+    file_path: str, cached: "CacheEntry | None"
+) -> tuple[dict[str, Any], "CacheEntry"]:
+    """
+    統計單一檔案，回傳 (檔案詳情, 快取紀錄)
+
+    大小與修改時間都和快取紀錄相同時直接使用快取的行數，不讀取檔案內容。
+    """
+    from datetime import datetime
+
+    path_obj = Path(file_path)
+    stat = path_obj.stat()
+    if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+        lines = cached[2]
+    else:
+        lines = count_lines(path_obj)
+
+    info = {
+        "檔案名": path_obj.name,
+        "路徑": str(path_obj),
+        "大小(bytes)": stat.st_size,
+        "行數": lines,
+        "修改時間": datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    return info, (stat.st_size, stat.st_mtime_ns, lines)
+
+
+def _file_info_batch(
+    batch: tuple[tuple[str, "CacheEntry | None"], ...],
+) -> list[tuple[str, tuple[dict[str, Any], "CacheEntry"] | Exception]]:
+    """處理一批檔案；失敗的檔案以例外物件代替結果，交回主行程依序回報"""
+    results: list[tuple[str, tuple[dict[str, Any], CacheEntry] | Exception]] = []
+    for file_path, cached in batch:
+        try:
+            results.append((file_path, _scan_file(file_path, cached)))
+        except Exception as e:
+            results.append((file_path, e))
+    return results
+
+
+class ReportScan:
+    """
+    逐一產生報告中的檔案詳情
+
+    檔案由 glob.iglob 逐一取得，處理完就交出，不會把整個目錄的結果留在記憶體中。
+    迭代結束後 file_count、total_lines、total_size 為報告的總計。
+
+    無法處理的檔案會被略過，並以 (檔案路徑, 例外) 呼叫 on_error。
+    jobs 大於 1 時以執行緒 (stat 與讀檔) 或行程 (行數計算) 平行處理，
+    結果依 glob 的順序合併，報告內容與逐一處理時完全相同。
+    指定 cache_path 時，大小與修改時間都沒變的檔案直接使用快取的行數；
+    快取無法使用時同樣以 on_error 回報，報告照常生成。
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        pattern: str,
+        *,
+        on_error: Callable[[str, Exception], None] | None = None,
+        jobs: int = 1,
+        executor: str = "thread",
+        cache_path: Path | None = None,
+        rebuild_cache: bool = False,
+    ) -> None:
+        from datetime import datetime
+
+        self.directory = directory
+        self.pattern = pattern
+        self.generated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.file_count = 0
+        self.total_lines = 0
+        self.total_size = 0
+
+        self._on_error = on_error
+        self._jobs = jobs
+        self._executor = executor
+        self._cache_path = cache_path
+        self._rebuild_cache = rebuild_cache
+
+    def _report_error(self, file_path: str, e: Exception) -> None:
+        if self._on_error is not None:
+            self._on_error(file_path, e)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for info, _entry in self._scan():
+            yield info
+
+    def records(self) -> Iterator[FileRecord]:
+        """逐一產生檔案詳情的原始數值，總計與 __iter__ 相同"""
+        for info, (size, mtime_ns, lines) in self._scan():
+            yield FileRecord(info["路徑"], info["檔案名"], size, lines, mtime_ns)
+
+    def _scan(self) -> Iterator[tuple[dict[str, Any], "CacheEntry"]]:
+        import glob
+        from itertools import batched
+
+        cache = None
+        known: dict[str, CacheEntry] = {}
+        if self._cache_path is not None:
+            from .cache import LineCountCache, scan_root
+
+            root = scan_root(self.directory, self.pattern)
+            try:
+                cache = LineCountCache(self._cache_path, rebuild=self._rebuild_cache)
+                known = cache.load(root)
+            except Exception as e:
+                self._report_error(str(self._cache_path), e)
+                if cache is not None:
+                    cache.close()
+                cache = None
+
+        seen: set[str] = set()
+        updates: list[tuple[str, CacheEntry]] = []
+
+        def files() -> Iterator[tuple[str, "CacheEntry | None"]]:
+            for file_path in glob.iglob(
+                str(self.directory / self.pattern), recursive=True
+            ):
+                self.file_count += 1
+                if cache is None:
+                    yield file_path, None
+                    continue
+                key = os.path.abspath(file_path)
+                seen.add(key)
+                yield file_path, known.get(key)
+
+        batches = parallel_map(
+            _file_info_batch,
+            batched(files(), REPORT_BATCH_SIZE, strict=False),
+            jobs=self._jobs,
+            executor=self._executor,
+        )
+        # 呼叫端中途放棄迭代時 (GeneratorExit) 也要關閉快取連線
+        try:
+            for batch in batches:
+                for file_path, result in batch:
+                    if isinstance(result, Exception):
+                        self._report_error(file_path, result)
+                        continue
+
+                    info, entry = result
+                    self.total_lines += info["行數"]
+                    self.total_size += info["大小(bytes)"]
+                    if cache is not None:
+                        key = os.path.abspath(file_path)
+                        if entry != known.get(key):
+                            updates.append((key, entry))
+                    yield info, entry
+
+            if cache is not None:
+                try:
+                    cache.store(root, updates, seen=seen)
+                except Exception as e:
+                    self._report_error(str(self._cache_path), e)
+        finally:
+            if cache is not None:
+                cache.close()
+
+    def summary(self) -> dict[str, Any]:
+        """報告的摘要欄位 (迭代結束後才有正確的總計)"""
+        return {
+            "生成時間": self.generated_at,
+            "目錄": str(self.directory),
+            "檔案模式": self.pattern,
+            "檔案數量": self.file_count,
+            "總行數": self.total_lines,
+            "總大小(bytes)": self.total_size,
+        }
+
+    def report(self) -> dict[str, Any]:
+        """掃描整個目錄並組成完整的報告資料"""
+        details = list(self)
+        summary = self.summary()
+        return {
+            "生成時間": summary["生成時間"],
+            "目錄": summary["目錄"],
+            "檔案模式": summary["檔案模式"],
+            "檔案數量": summary["檔案數量"],
+            "檔案詳情": details,
+            "總行數": summary["總行數"],
+            "總大小(bytes)": summary["總大小(bytes)"],
+        }
+
+
+def iter_ndjson_report(scan: ReportScan) -> Iterator[str]:
+    """
+    以 NDJSON 串流輸出報告
+
+    每個檔案處理完就輸出一行紀錄，最後一行是 {"摘要": {...}} 總計紀錄，
+    下游可以立即開始讀取，記憶體用量與檔案數量無關。
+    """
+    from . import jsonfmt
+
+    for info in scan:
+        yield jsonfmt.dumps(info, compact=True)
+    yield jsonfmt.dumps({"摘要": scan.summary()}, compact=True)
+
+
+def format_report(
+    report_data: dict[str, Any], output_format: str, *, compact: bool = False
+) -> Iterator[str]:
+    """把報告資料格式化為輸出行 (json 或 text；compact 只影響 json)"""
+    if output_format == "json":
+        from . import jsonfmt
+
+        yield jsonfmt.dumps(report_data, compact=compact)
+        return
+
+    yield "📊 檔案分析報告"
+    yield "=" * 40
+    yield f"生成時間: {report_data['生成時間']}"
+    yield f"分析目錄: {report_data['目錄']}"
+    yield f"檔案模式: {report_data['檔案模式']}"
+    yield f"檔案數量: {report_data['檔案數量']}"
+    yield f"總行數: {report_data['總行數']:,}"
+    yield f"總大小: {report_data['總大小(bytes)']:,} bytes"
+    yield "\n📁 檔案詳情:"
+    for file_info in report_data["檔案詳情"]:
+        yield f"  • {file_info['檔案名']} ({file_info['行數']} 行, {file_info['大小(bytes)']} bytes)"
@@ -0,0 +1,57 @@
+"""
+綜合問候 - greet-all 的人名 × 問候詞
+
+人名與問候詞可以來自命令列參數或檔案 (每行一個)。人名逐批讀取，
+每批與問候詞以 itertools.product 組合成一段文字輸出，
+所以人名清單再大也不必全部放進記憶體；問候詞通常不多，會先全部讀入。
+"""
+
+from collections.abc import Iterable, Iterator
+from itertools import batched, product
+from typing import NamedTuple, TextIO
+
+from .engine import read_lines
+
+# 每批組合的人名數
+GREET_BATCH = 4096
+
+
+class Estimate(NamedTuple):
+    """--dry-run 的結果"""
+
+    lines: int
+    bytes: int
+
+
+def read_values(stream: TextIO) -> Iterator[str]:
+    """逐行讀取值，去掉前後空白並略過空白行"""
+    for line in read_lines(stream):
+        value = line.strip()
+        if value:
+            yield value
+
+
+def line_heads(greetings: Iterable[str], prefix: str, title: str) -> list[str]:
+    """每個問候詞在人名前的固定部分"""
+    return [f"{prefix}{greeting}, {title} " for greeting in greetings]
+
+
+def greeting_chunks(names: Iterable[str], heads: list[str]) -> Iterator[str]:
+    """依人名順序產生問候，每批人名合併成一段文字"""
+    if not heads:
+        return
+    for chunk in batched(names, GREET_BATCH, strict=False):
+        yield "".join([f"{head}{name}!\n" for name, head in product(chunk, heads)])
+
+
+def estimate(
+    names: Iterable[str], heads: list[str], encoding: str = "utf-8"
+) -> Estimate:
+    """不產生輸出，只計算會輸出的行數與位元組數 (人名只走訪一次)"""
+    count = 0
+    name_bytes = 0
+    for name in names:
+        count += 1
+        name_bytes += len(name.encode(encoding))
+    head_bytes = sum(len(f"{head}!\n".encode(encoding)) for head in heads)
+    return Estimate(count * len(heads), count * head_bytes + name_bytes * len(heads))
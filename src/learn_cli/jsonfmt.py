@@ -0,0 +1,69 @@
+"""
+JSON 輸出 - list-items、generate-report 與 count-words --top 共用
+
+有安裝 orjson 或 msgspec 時以它們編碼 (依此順序)，否則使用標準函式庫 json。
+不論使用哪個後端，輸出都不跳脫非 ASCII 字元，而且與標準函式庫相同：
+
+    縮排 (預設): json.dumps(obj, ensure_ascii=False, indent=2)
+    compact:     json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+只有浮點數的寫法 (例如 1e+16 與 1e16) 可能因後端而不同。
+標準函式庫的 json 在真正需要時才匯入，不影響命令列的啟動時間。
+"""
+
+from collections.abc import Iterable, Iterator
+from itertools import batched
+from typing import Any
+
+from . import compat
+
+# encode_array 每次編碼的元素數
+ARRAY_BATCH = 1024
+
+
+def backend() -> str:
+    """目前使用的後端名稱 (orjson、msgspec 或 json)"""
+    if compat.load_orjson() is not None:
+        return "orjson"
+    if compat.load_msgspec_json() is not None:
+        return "msgspec"
+    return "json"
+
+
+def dumps(obj: Any, *, compact: bool = False) -> str:
+    """把物件編碼為 JSON 文字；compact 時不縮排也不含空白"""
+    orjson = compat.load_orjson()
+    if orjson is not None:
+        option = 0 if compact else orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option).decode()
+
+    msgspec_json = compat.load_msgspec_json()
+    if msgspec_json is not None:
+        data = msgspec_json.encode(obj)
+        if not compact:
+            data = msgspec_json.format(data, indent=2)
+        return data.decode()
+
+    import json
+
+    if compact:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+
+def encode_array(
+    items: Iterable[Any], *, compact: bool = False, batch_size: int = ARRAY_BATCH
+) -> Iterator[str]:
+    """
+    逐段產生 JSON 陣列，串接起來與 dumps(list(items)) 相同
+
+    每 batch_size 個元素編碼一次，記憶體用量與元素數量無關。
+    """
+    newline = "" if compact else "\n"
+    opening = "[" + newline
+    for batch in batched(items, batch_size, strict=False):
+        # 去掉這一批自己的 [ ] 與前後換行，只留下以逗號分隔的元素
+        text = dumps(list(batch), compact=compact)
+        yield opening + text[1 + len(newline) : -1 - len(newline)]
+        opening = "," + newline
+    yield "[]" if opening == "[" + newline else newline + "]"
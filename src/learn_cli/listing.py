@@ -0,0 +1,62 @@
+"""
+項目列表 - list-items 的輸入與逐段編碼
+
+項目可以來自命令列參數或檔案 (每行一個)，逐項讀取並逐段編碼輸出，
+記憶體用量與項目數量無關，第一個項目讀到就可以開始輸出：
+
+    json: 與 json.dumps(list, ensure_ascii=False, indent=2) 相同的陣列
+          (compact 時不縮排)，以 jsonfmt 的後端編碼
+    csv:  以 csv 模組處理引號的單一列
+    text: 每行一個 "- 項目"
+
+編碼器產生的文字不含最後的換行。
+"""
+
+import csv
+import io
+from collections.abc import Iterable, Iterator
+from itertools import batched
+from typing import TextIO
+
+from . import jsonfmt
+from .engine import read_lines
+
+# 每次編碼的項目數
+ENCODE_BATCH = 1024
+
+
+def read_items(stream: TextIO) -> Iterator[str]:
+    """逐行讀取項目 (去掉換行字元，略過空行)"""
+    for line in read_lines(stream):
+        item = line.rstrip("\r\n")
+        if item:
+            yield item
+
+
+def encode_json(items: Iterable[str], *, compact: bool = False) -> Iterator[str]:
+    """逐段產生 JSON 陣列"""
+    return jsonfmt.encode_array(items, compact=compact, batch_size=ENCODE_BATCH)
+
+
+def encode_csv(items: Iterable[str]) -> Iterator[str]:
+    """逐段產生一列 CSV，含逗號、引號或換行的項目會加上引號"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="")
+    separator = ""
+    for batch in batched(items, ENCODE_BATCH, strict=False):
+        writer.writerow(batch)
+        yield separator + buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        separator = ","
+
+
+def encode_text(items: Iterable[str]) -> Iterator[str]:
+    """逐段產生每行一個項目的清單"""
+    separator = ""
+    for batch in batched(items, ENCODE_BATCH, strict=False):
+        yield separator + "\n".join([f"- {item}" for item in batch])
+        separator = "\n"
+
+
+ENCODERS = {"json": encode_json, "csv": encode_csv, "text": encode_text}
@@ -0,0 +1,99 @@
+"""
+緩衝輸出
+
+click.echo / typer.echo 每次呼叫都會重新取得串流、檢查編碼並 flush，
+大量輸出時這些額外工作佔了大部分的執行時間。LineBuffer 把文字累積到
+一定大小後才一次寫入串流；輸出到終端機時仍然逐行 flush，互動使用時沒有差別。
+"""
+
+from typing import TextIO
+
+# 累積多少字元後寫入一次
+OUTPUT_BUFFER = 1 << 16
+
+
+def _isatty(stream: TextIO) -> bool:
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+class LineBuffer:
+    """
+    文字輸出緩衝區
+
+    以 with 使用，離開時 (包含發生例外時) 寫出剩下的內容。
+    flush_every 為每幾行 flush 一次；未指定時輸出到終端機就逐行 flush，
+    否則等累積到 size 個字元才寫入。
+    """
+
+    def __init__(
+        self,
+        stream: TextIO,
+        *,
+        flush_every: int | None = None,
+        size: int = OUTPUT_BUFFER,
+    ) -> None:
+        if flush_every is None and _isatty(stream):
+            flush_every = 1
+        self.stream = stream
+        self.flush_every = flush_every
+        self.size = size
+        self._parts: list[str] = []
+        self._chars = 0
+        self._lines = 0
+
+    def write(self, text: str) -> None:
+        """寫入一段文字 (不自動換行)"""
+        self._parts.append(text)
+        self._chars += len(text)
+        if self.flush_every:
+            self._lines += text.count("\n")
+            if self._lines >= self.flush_every:
+                self.flush()
+                return
+        if self._chars >= self.size:
+            self._drain()
+
+    def line(self, text: str = "") -> None:
+        """寫入一行文字"""
+        self.write(text + "\n")
+
+    def repeat(self, text: str, count: int) -> None:
+        """
+        把同一段文字重複寫入 count 次
+
+        重複的內容只組成一次 (約 size 個字元的區塊)，再整塊重複寫入，
+        執行時間只受 I/O 限制；有 flush_every 時每塊不超過 flush_every 行。
+        """
+        if count <= 0 or not text:
+            return
+        per_chunk = max(1, self.size // len(text))
+        if self.flush_every:
+            lines = text.count("\n") or 1
+            per_chunk = min(per_chunk, max(1, self.flush_every // lines))
+        chunk = text * min(per_chunk, count)
+        full, rest = divmod(count, per_chunk)
+        for _ in range(full):
+            self.write(chunk)
+        if rest:
+            self.write(text * rest)
+
+    def _drain(self) -> None:
+        if self._parts:
+            self.stream.write("".join(self._parts))
+            self._parts = []
+            self._chars = 0
+
+    def flush(self) -> None:
+        """把緩衝的內容寫入串流並 flush"""
+        self._drain()
+        self._lines = 0
+        self.stream.flush()
+
+    def __enter__(self) -> "LineBuffer":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.flush()
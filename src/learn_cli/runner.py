@@ -0,0 +1,152 @@
+"""
+在同一個行程中執行 CLI 命令
+
+常駐伺服器 (server.py) 與 batch 命令共用這裡的函式：
+以已經導入的 Click 命令物件 (Typer 應用程式也會轉成 Click 命令) 執行參數列，
+並把結束方式統一轉成結束代碼，省去每個命令都啟動一次 Python 的成本。
+"""
+
+import io
+import shlex
+import sys
+import traceback
+from collections.abc import Iterable, Iterator
+from contextlib import redirect_stderr, redirect_stdout
+from functools import partial
+from itertools import batched
+from typing import NamedTuple
+
+import click
+
+from . import engine
+
+# 平行執行時每個工作單位包含的命令行數
+BATCH_LINES = 256
+
+# batch 裡不能再執行的命令
+NESTED_COMMANDS = frozenset({"batch"})
+
+
+class LineResult(NamedTuple):
+    """batch 中一行命令的執行結果"""
+
+    line: int
+    code: int
+    stdout: bytes
+    stderr: bytes
+
+
+def load_command(framework: str) -> click.Command:
+    """取得框架對應的 Click 命令物件 ("click" 或 "typer")"""
+    if framework == "click":
+        from .click_app import cli
+
+        return cli
+    if framework == "typer":
+        import typer
+
+        from .typer_app import app
+
+        return typer.main.get_command(app)
+    raise ValueError(f"未知的框架: {framework!r}")
+
+
+def exit_code(e: SystemExit) -> int:
+    """把 SystemExit 轉成結束代碼 (比照直譯器結束時的規則)"""
+    if e.code is None:
+        return 0
+    if isinstance(e.code, int):
+        return e.code
+    print(e.code, file=sys.stderr)
+    return 1
+
+
+def run_command(command: click.Command, prog_name: str, args: list[str]) -> int:
+    """執行一次命令並回傳結束代碼；未預期的例外印出追蹤訊息後回傳 1"""
+    try:
+        command.main(args=args, prog_name=prog_name)
+    except SystemExit as e:
+        return exit_code(e)
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def _text_stream(data: io.BytesIO) -> io.TextIOWrapper:
+    """
+    以記憶體中的位元組為底的文字串流
+
+    和真正的標準串流一樣有 .buffer，以二進位輸出 (或讀取標準輸入) 的命令也能執行；
+    write_through 讓文字與位元組的輸出依照寫入的順序排列。
+    """
+    return io.TextIOWrapper(data, encoding="utf-8", write_through=True)
+
+
+def run_captured(
+    command: click.Command, prog_name: str, args: list[str]
+) -> tuple[int, bytes, bytes]:
+    """
+    執行一次命令並收集輸出，回傳 (結束代碼, stdout, stderr) 的位元組
+
+    標準輸入換成空的串流，需要互動輸入的命令會直接結束而不會讀走 batch 的內容。
+    """
+    stdout, stderr = io.BytesIO(), io.BytesIO()
+    # 文字串流被回收時會關閉底下的 BytesIO，取出內容前都要保留著
+    text_stdout, text_stderr = _text_stream(stdout), _text_stream(stderr)
+    saved_stdin = sys.stdin
+    sys.stdin = _text_stream(io.BytesIO())
+    try:
+        with redirect_stdout(text_stdout), redirect_stderr(text_stderr):
+            code = run_command(command, prog_name, args)
+    finally:
+        sys.stdin = saved_stdin
+    return code, stdout.getvalue(), stderr.getvalue()
+
+
+def run_line(
+    command: click.Command, prog_name: str, number: int, line: str
+) -> LineResult | None:
+    """執行 batch 的一行；空白行與 # 開頭的註解行回傳 None"""
+    try:
+        args = shlex.split(line, comments=True)
+    except ValueError as e:
+        return LineResult(number, 2, b"", f"錯誤: 無法解析命令: {e}\n".encode())
+    if not args:
+        return None
+    if args[0] in NESTED_COMMANDS:
+        message = f"錯誤: batch 中不能執行 {args[0]}\n"
+        return LineResult(number, 2, b"", message.encode())
+    return LineResult(number, *run_captured(command, prog_name, args))
+
+
+def run_lines(
+    framework: str, prog_name: str, lines: Iterable[tuple[int, str]]
+) -> list[LineResult]:
+    """在目前的行程中依序執行多行命令 (也是平行執行時的工作單位)"""
+    command = load_command(framework)
+    results = (run_line(command, prog_name, number, line) for number, line in lines)
+    return [result for result in results if result is not None]
+
+
+def run_batch(
+    framework: str, prog_name: str, lines: Iterable[str], *, jobs: int = 1
+) -> Iterator[LineResult]:
+    """
+    逐行執行命令，依輸入順序產出每一行的結果
+
+    jobs > 1 時把命令行分批交給多個工作行程執行，輸出順序仍與輸入相同。
+    """
+    numbered = enumerate(lines, 1)
+    if jobs == 1:
+        command = load_command(framework)
+        for number, line in numbered:
+            result = run_line(command, prog_name, number, line)
+            if result is not None:
+                yield result
+        return
+
+    run = partial(run_lines, framework, prog_name)
+    chunks = batched(numbered, BATCH_LINES, strict=False)
+    for results in engine.parallel_map(run, chunks, jobs=jobs):
+        yield from results
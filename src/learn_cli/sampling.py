@@ -0,0 +1,319 @@
+"""
+大量隨機整數 - random-numbers 的生成與輸出
+
+隨機數以位元組為單位大量取得，再整塊轉成範圍內的整數：
+
+    secure: os.urandom (作業系統的 CSPRNG)
+    fast:   random.Random(seed).randbytes (可指定種子，重現同樣的測試資料)
+
+每個樣本取最少需要的位元組數，遮罩到範圍所需的位元數後，
+丟棄超出範圍的值 (拒絕取樣)，所以結果沒有取模造成的偏差。
+安裝了 NumPy 時轉換以向量運算完成；兩種方式的結果完全相同，
+同一個種子在有沒有 NumPy 的環境都會產生同樣的數列。
+"""
+
+import os
+import sys
+from array import array
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from itertools import batched, chain, repeat
+from typing import Any
+
+from . import compat
+
+GENERATORS = ("secure", "fast")
+
+OUTPUT_FORMATS = ("list", "text", "binary", "npy")
+
+# 每次取樣的目標數量
+RANDOM_BLOCK = 1 << 16
+
+# 排序時每段 (記憶體中排序、必要時寫入暫存檔) 的數字數量
+SORT_RUN = 1 << 20
+
+# 外部合併排序一次最多合併的暫存檔數，超過時分多輪合併
+MERGE_FAN_IN = 128
+
+# 範圍不超過這個大小時以計數排序取代比較排序
+COUNTING_SORT_SPAN = 1 << 20
+
+# binary 與 npy 輸出為 int64
+INT64_MIN = -(1 << 63)
+INT64_MAX = (1 << 63) - 1
+
+# 無號整數的寬度 (位元組) → array 的型別代碼
+_UNSIGNED_TYPECODES = {array(code).itemsize: code for code in ("Q", "L", "I", "H", "B")}
+
+
+def byte_source(generator: str, seed: int | None = None) -> Callable[[int], bytes]:
+    """回傳產生 n 個隨機位元組的函式"""
+    if generator == "secure":
+        if seed is not None:
+            raise ValueError("secure 產生器不能指定種子")
+        return os.urandom
+    if generator == "fast":
+        import random
+
+        return random.Random(seed).randbytes
+    raise ValueError(f"未知的產生器: {generator!r}")
+
+
+def _draw(data: bytes, width: int, mask: int, span: int, low: int) -> Any:
+    """把位元組轉成 [low, low + span) 內的整數，丟棄超出範圍的值"""
+    np = compat.load_numpy()
+    if (
+        np is not None
+        and width in (1, 2, 4, 8)
+        and INT64_MIN <= low
+        and low + span - 1 <= INT64_MAX
+        and span <= INT64_MAX
+    ):
+        values = np.frombuffer(data, dtype=f"<u{width}") & np.uint64(mask)
+        return values[values < span].astype(np.int64) + low
+    if width in _UNSIGNED_TYPECODES:
+        values = array(_UNSIGNED_TYPECODES[width], data)
+        if sys.byteorder == "big":
+            values.byteswap()
+    else:
+        values = [
+            int.from_bytes(data[i : i + width], "little")
+            for i in range(0, len(data), width)
+        ]
+    return [m + low for v in values if (m := v & mask) < span]
+
+
+def random_blocks(
+    count: int,
+    low: int,
+    high: int,
+    *,
+    generator: str = "secure",
+    seed: int | None = None,
+    block_size: int = RANDOM_BLOCK,
+) -> Iterator[Any]:
+    """
+    逐塊產生 count 個 [low, high] 之間的均勻隨機整數
+
+    每塊為 list 或 (有 NumPy 時) int64 的 ndarray。
+    參數錯誤時立即丟出 ValueError，而不是等到開始迭代。
+    """
+    if low > high:
+        raise ValueError("最小值不能大於最大值")
+    source = byte_source(generator, seed)
+    span = high - low + 1
+    bits = (span - 1).bit_length() or 1
+    width = (bits + 7) // 8
+    # 位元組數補齊到 array / NumPy 支援的寬度，讓轉換可以整塊進行
+    width = next((w for w in (1, 2, 4, 8) if w >= width), width)
+    mask = (1 << bits) - 1
+
+    def blocks() -> Iterator[Any]:
+        remaining = count
+        while remaining > 0:
+            n = min(remaining, block_size)
+            block = _draw(source(n * width), width, mask, span, low)[:remaining]
+            remaining -= len(block)
+            if len(block):
+                yield block
+
+    return blocks()
+
+
+def _concat(parts: list[Any]) -> Any:
+    """把數字塊接成一個 list 或 (都是 ndarray 時) 一個 ndarray"""
+    np = compat.load_numpy()
+    if np is not None and all(hasattr(p, "dtype") for p in parts):
+        return np.concatenate(parts)
+    return [value for part in parts for value in part]
+
+
+def _runs(blocks: Iterable[Any], run_size: int) -> Iterator[Any]:
+    """把數字塊合併成大約 run_size 個數字的段落"""
+    parts: list[Any] = []
+    size = 0
+    for block in blocks:
+        parts.append(block)
+        size += len(block)
+        if size >= run_size:
+            run = _concat(parts)
+            parts, size = [], 0
+            yield run
+    if parts:
+        yield _concat(parts)
+
+
+def _split(values: Any, block_size: int) -> Iterator[Any]:
+    for start in range(0, len(values), block_size):
+        yield values[start : start + block_size]
+
+
+def _expand_counts(values: Any, counts: Any, block_size: int) -> Iterator[Any]:
+    """依照 (值, 出現次數) 逐塊產生排序好的數字"""
+    if hasattr(counts, "dtype"):
+        np = compat.load_numpy()
+        ends = np.cumsum(counts)
+        starts = ends - counts
+        total = int(ends[-1]) if len(ends) else 0
+        for start in range(0, total, block_size):
+            end = min(start + block_size, total)
+            # 與 [start, end) 這一塊重疊的值，以及各自落在這一塊的次數
+            i = np.searchsorted(ends, start, "right")
+            j = np.searchsorted(starts, end, "left")
+            repeats = np.minimum(ends[i:j], end) - np.maximum(starts[i:j], start)
+            yield np.repeat(values[i:j], repeats)
+        return
+    block: list[int] = []
+    for value, n in zip(values, counts, strict=True):
+        while n:
+            take = min(n, block_size - len(block))
+            block.extend(repeat(value, take))
+            n -= take
+            if len(block) == block_size:
+                yield block
+                block = []
+    if block:
+        yield block
+
+
+def _counting_sort(
+    runs: Iterable[Any], low: int, span: int, block_size: int
+) -> Iterator[Any]:
+    """計數排序：只記錄每個值出現的次數，記憶體用量與範圍大小成正比"""
+    runs = iter(runs)
+    first = next(runs)
+    if hasattr(first, "dtype"):
+        np = compat.load_numpy()
+        histogram = np.zeros(span, dtype=np.int64)
+        for run in chain([first], runs):
+            histogram += np.bincount(run - low, minlength=span)
+        offsets = np.flatnonzero(histogram)
+        return _expand_counts(offsets + low, histogram[offsets], block_size)
+    counter: Counter[int] = Counter()
+    for run in chain([first], runs):
+        counter.update(run)
+    values = sorted(counter)
+    return _expand_counts(values, [counter[v] for v in values], block_size)
+
+
+def _merge_runs(runs: Iterable[Any], block_size: int) -> Iterator[Any]:
+    """
+    外部合併排序：每段排序後寫入暫存檔，再以 heapq.merge 做 k 路合併
+
+    暫存檔超過 MERGE_FAN_IN 個時先分組合併成較大的暫存檔，避免同時開啟太多檔案。
+    """
+    import heapq
+    import pickle
+    import tempfile
+
+    def spill(pieces: Iterable[Any]) -> Any:
+        f = tempfile.TemporaryFile()
+        for piece in pieces:
+            pickle.dump(piece, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.seek(0)
+        return f
+
+    def read_run(f: Any) -> Iterator[int]:
+        while True:
+            try:
+                piece = pickle.load(f)
+            except EOFError:
+                return
+            yield from piece.tolist() if hasattr(piece, "tolist") else piece
+
+    def merge(group: list[Any]) -> Iterator[Any]:
+        merged = heapq.merge(*(read_run(f) for f in group))
+        for chunk in batched(merged, block_size, strict=False):
+            yield list(chunk)
+
+    files = []
+    try:
+        for run in runs:
+            run.sort()
+            files.append(spill(_split(run, block_size)))
+            del run
+        while len(files) > MERGE_FAN_IN:
+            group = files[:MERGE_FAN_IN]
+            files = [*files[MERGE_FAN_IN:], spill(merge(group))]
+            for f in group:
+                f.close()
+        yield from merge(files)
+    finally:
+        for f in files:
+            f.close()
+
+
+def sort_blocks(
+    blocks: Iterable[Any],
+    low: int,
+    high: int,
+    *,
+    run_size: int = SORT_RUN,
+    block_size: int = RANDOM_BLOCK,
+) -> Iterator[Any]:
+    """
+    把 [low, high] 之間的數字塊排序，逐塊產生排序好的結果
+
+    範圍不大於 COUNTING_SORT_SPAN (也不大於資料量) 時以計數排序完成；
+    否則全部放得進一段 (run_size 個數字) 時直接在記憶體中排序，
+    超過時改為外部合併排序，記憶體用量只與 run_size 有關。
+    """
+    runs = _runs(blocks, run_size)
+    first = next(runs, None)
+    if first is None:
+        return iter(())
+    span = high - low + 1
+    if span <= min(COUNTING_SORT_SPAN, len(first)):
+        return _counting_sort(chain([first], runs), low, span, block_size)
+    second = next(runs, None)
+    if second is None:
+        first.sort()
+        return _split(first, block_size)
+    return _merge_runs(chain([first, second], runs), block_size)
+
+
+def npy_header(count: int, descr: str = "<i8") -> bytes:
+    """一維陣列的 NPY (1.0 版) 檔頭，資料長度以 64 位元組對齊"""
+    header = f"{{'descr': '{descr}', 'fortran_order': False, 'shape': ({count},), }}"
+    # 魔術字串 (6) + 版本 (2) + 檔頭長度 (2) + 檔頭 + 換行
+    padding = -(10 + len(header) + 1) % 64
+    header = (header + " " * padding + "\n").encode("latin1")
+    return b"\x93NUMPY\x01\x00" + len(header).to_bytes(2, "little") + header
+
+
+def _int64_bytes(block: Any) -> bytes:
+    if hasattr(block, "dtype"):
+        return block.astype("<i8", copy=False).tobytes()
+    values = array("q", block)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def encode_blocks(
+    blocks: Iterable[Any], output_format: str, count: int
+) -> Iterator[bytes]:
+    """
+    把數字塊編碼成輸出的位元組
+
+    text 每行一個數字；binary 為 little-endian int64；
+    npy 為 NumPy 可以直接 numpy.load 的 int64 一維陣列 (count 為總數)。
+    """
+    if output_format == "npy":
+        yield npy_header(count)
+    for block in blocks:
+        if output_format == "text":
+            values = block.tolist() if hasattr(block, "tolist") else block
+            yield ("\n".join(map(str, values)) + "\n").encode()
+        else:
+            yield _int64_bytes(block)
+
+
+def listing_lines(blocks: Iterable[Any]) -> Iterator[str]:
+    """random-numbers 預設的編號清單，每塊合併成一段文字輸出"""
+    number = 0
+    for block in blocks:
+        values = block.tolist() if hasattr(block, "tolist") else block
+        lines = [f"  {i:2d}. {value}" for i, value in enumerate(values, number + 1)]
+        number += len(values)
+        yield "\n".join(lines)
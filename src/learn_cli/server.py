@@ -0,0 +1,127 @@
+"""
+常駐伺服器模式
+
+在本機 Unix socket 上等待用戶端 (見 client.py) 轉送的命令，
+以已經導入完成的 Click / Typer 應用程式在同一個行程中執行。
+每次呼叫只剩下 socket 往返與命令本身的成本，不必重新啟動 Python。
+
+命令在執行期間會替換 sys.stdin / sys.stdout / sys.stderr 與工作目錄，
+這些都是整個行程共用的狀態，所以請求一次只處理一個，依序執行。
+環境變數沿用伺服器啟動時的設定，不會取用用戶端的環境。
+"""
+
+import io
+import os
+import socket
+import socketserver
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import click
+
+from .client import decode_request, recv_exactly
+from .runner import load_command, run_command
+
+# 第一次接收時的緩衝區大小 (檔案描述符隨這段資料一起送達)
+RECV_SIZE = 64 << 10
+
+
+def load_commands() -> dict[str, click.Command]:
+    """導入兩個 CLI 應用程式，回傳 框架名稱 → Click 命令物件"""
+    return {framework: load_command(framework) for framework in ("click", "typer")}
+
+
+@contextmanager
+def redirected(cwd: str, fds: list[int]) -> Iterator[None]:
+    """在區塊內把標準輸入輸出換成用戶端的檔案描述符，並切換到用戶端的工作目錄"""
+    saved = sys.stdin, sys.stdout, sys.stderr
+    saved_cwd = os.getcwd()
+    stdin_fd, stdout_fd, stderr_fd = fds
+    sys.stdin = io.TextIOWrapper(open(stdin_fd, "rb"), encoding="utf-8")
+    sys.stdout = io.TextIOWrapper(open(stdout_fd, "wb"), encoding="utf-8")
+    sys.stderr = io.TextIOWrapper(
+        open(stderr_fd, "wb", buffering=0), encoding="utf-8", write_through=True
+    )
+    try:
+        os.chdir(cwd)
+        yield
+    finally:
+        os.chdir(saved_cwd)
+        for stream in (sys.stdin, sys.stdout, sys.stderr):
+            try:
+                stream.close()
+            except OSError:
+                # 用戶端可能已經關閉了管線的另一端
+                pass
+        sys.stdin, sys.stdout, sys.stderr = saved
+
+
+class CommandHandler(socketserver.BaseRequestHandler):
+    server: "CommandServer"
+
+    def handle(self) -> None:
+        data, fds, _flags, _addr = socket.recv_fds(self.request, RECV_SIZE, 3)
+        if len(fds) != 3:
+            for fd in fds:
+                os.close(fd)
+            return
+        try:
+            data += recv_exactly(self.request, max(0, 4 - len(data)))
+            size, payload = int.from_bytes(data[:4], "big"), data[4:]
+            payload += recv_exactly(self.request, size - len(payload))
+            cwd, prog_name, framework, args = decode_request(payload)
+        except (ConnectionError, ValueError):
+            for fd in fds:
+                os.close(fd)
+            return
+
+        with redirected(cwd, fds):
+            command = self.server.commands.get(framework)
+            if command is None:
+                print(f"錯誤: 未知的框架 '{framework}'", file=sys.stderr)
+                code = 1
+            else:
+                code = run_command(command, f"{prog_name} {framework}", args)
+        try:
+            self.request.sendall(code.to_bytes(4, "big", signed=True))
+        except OSError:
+            # 用戶端已經離開，結果沒有人接收
+            pass
+
+
+class CommandServer(socketserver.UnixStreamServer):
+    """依序處理請求的 Unix socket 伺服器"""
+
+    def __init__(self, socket_path: str) -> None:
+        self.commands = load_commands()
+        super().__init__(socket_path, CommandHandler)
+        # 命令能讀寫使用者的檔案，只允許同一個使用者連線
+        os.chmod(socket_path, 0o600)
+
+
+def remove_stale_socket(socket_path: str) -> None:
+    """
+    移除上一次沒有正常結束而留下的 socket 檔
+
+    已經有伺服器在同一個位置執行時丟出 RuntimeError。
+    """
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except ConnectionRefusedError:
+            os.unlink(socket_path)
+            return
+    raise RuntimeError(f"已經有伺服器在 {socket_path} 上執行")
+
+
+def serve(socket_path: str) -> None:
+    """在 socket_path 上啟動伺服器，直到收到中斷訊號為止"""
+    remove_stale_socket(socket_path)
+    with CommandServer(socket_path) as server:
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(socket_path)
@@ -0,0 +1,212 @@
+"""
+串流統計
+
+逐塊累加統計量，資料只需要走訪一次，也不必把全部的數字留在記憶體中。
+每一塊可以是 list、array 模組的陣列，或 NumPy 的 ndarray。
+
+    RunningStats: 數量、總和、平均、最小值、最大值、變異數與近似百分位數
+    TDigest:      近似百分位數的 t-digest 摘要 (記憶體用量只與壓縮參數有關)
+"""
+
+import math
+from bisect import bisect_left
+from collections.abc import Sequence
+from itertools import accumulate, repeat
+from operator import sub
+from typing import Any
+
+# t-digest 的壓縮參數：群集數量約為這個值，越大越精確
+DEFAULT_COMPRESSION = 100
+
+# random-numbers 統計輸出的百分位數
+PERCENTILES = (50, 90, 99)
+
+
+def _block_extent(values: Any) -> tuple[Any, Any, int]:
+    """回傳一塊數字的 (最小值, 最大值, 總和)"""
+    if hasattr(values, "dtype"):
+        lo, hi = values.min().item(), values.max().item()
+        if values.dtype.kind in "iu" and max(-lo, hi) * len(values) >= 1 << 63:
+            # 整數加總可能超過 int64，改用 Python 的整數
+            return lo, hi, sum(values.tolist())
+        return lo, hi, values.sum().item()
+    return min(values), max(values), sum(values)
+
+
+def _block_m2(values: Any, mean: float) -> float:
+    """一塊數字對其平均的離差平方和 (兩次走訪，數值穩定)"""
+    if hasattr(values, "dtype"):
+        deviations = values - mean
+        return float(deviations @ deviations)
+    deviations = list(map(sub, values, repeat(mean)))
+    return math.sumprod(deviations, deviations)
+
+
+def _sorted_list(values: Any) -> list[Any]:
+    if hasattr(values, "dtype"):
+        import numpy
+
+        return numpy.sort(values).tolist()
+    return sorted(values)
+
+
+class TDigest:
+    """
+    近似百分位數的 t-digest (合併式)
+
+    資料以 (平均, 權重) 的群集表示；靠近兩端的群集較小，所以極端百分位數
+    (例如 p99) 的誤差也很小。每加入一塊數字就與既有的群集合併並重新壓縮，
+    群集數量維持在壓縮參數的數量級。
+    """
+
+    def __init__(self, compression: int = DEFAULT_COMPRESSION) -> None:
+        self.compression = compression
+        self.count = 0
+        self.minimum: Any = None
+        self.maximum: Any = None
+        self._means: list[float] = []
+        self._weights: list[float] = []
+
+    def _k(self, q: float) -> float:
+        """尺度函數：分位數 → k 值 (兩端變化快，讓端點的群集較小)"""
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _k_inverse(self, k: float) -> float:
+        """尺度函數的反函數：k 值 → 分位數"""
+        return (math.sin(k * 2 * math.pi / self.compression) + 1) / 2
+
+    def update(self, values: "Sequence[Any] | Any") -> None:
+        """加入一塊數字"""
+        if not len(values):
+            return
+        ordered = _sorted_list(values)
+        n = len(ordered)
+        lo, hi = ordered[0], ordered[-1]
+        self.minimum = lo if self.minimum is None else min(self.minimum, lo)
+        self.maximum = hi if self.maximum is None else max(self.maximum, hi)
+
+        # 先把排序好的這一塊依 k 值的整數邊界切成群集，每個群集只需一次切片加總
+        start = 0
+        k = self._k(0)
+        means, weights = [], []
+        while start < n:
+            k += 1
+            end = max(start + 1, min(n, math.floor(self._k_inverse(k) * n)))
+            piece = ordered[start:end]
+            means.append(sum(piece) / len(piece))
+            weights.append(len(piece))
+            start = end
+
+        self._merge(means, weights)
+        self.count += n
+
+    def _merge(self, means: list[float], weights: list[float]) -> None:
+        """把新的群集與既有的群集依平均排序後合併，再壓縮"""
+        pairs = sorted(zip(self._means + means, self._weights + weights, strict=True))
+        total = sum(w for _m, w in pairs)
+        merged_means, merged_weights = [], []
+        cur_mean, cur_weight = pairs[0]
+        done = 0.0
+        limit = self._k_inverse(self._k(0) + 1) * total
+        for mean, weight in pairs[1:]:
+            if done + cur_weight + weight <= limit:
+                cur_weight += weight
+                cur_mean += (mean - cur_mean) * weight / cur_weight
+            else:
+                merged_means.append(cur_mean)
+                merged_weights.append(cur_weight)
+                done += cur_weight
+                limit = self._k_inverse(self._k(done / total) + 1) * total
+                cur_mean, cur_weight = mean, weight
+        merged_means.append(cur_mean)
+        merged_weights.append(cur_weight)
+        self._means, self._weights = merged_means, merged_weights
+
+    def quantile(self, q: float) -> float | None:
+        """
+        估計第 q 分位數 (0 ≤ q ≤ 1)；沒有資料時回傳 None
+
+        以每個群集的中心位置 (累積權重) 與平均值做線性內插，兩端以最小值與最大值為界。
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("分位數必須介於 0 與 1 之間")
+        if not self.count:
+            return None
+        centers = [
+            done + weight / 2
+            for done, weight in zip(
+                accumulate(self._weights, initial=0), self._weights, strict=False
+            )
+        ]
+        positions = [0.0, *centers, float(self.count)]
+        values = [self.minimum, *self._means, self.maximum]
+        target = q * self.count
+        i = bisect_left(positions, target)
+        if i == 0:
+            return float(self.minimum)
+        if i >= len(positions):
+            return float(self.maximum)
+        x0, x1 = positions[i - 1], positions[i]
+        y0, y1 = values[i - 1], values[i]
+        if x1 == x0:
+            return float(y1)
+        return y0 + (y1 - y0) * (target - x0) / (x1 - x0)
+
+
+class RunningStats:
+    """
+    串流統計累加器
+
+    以 update() 逐塊加入數字。總和以原本的型別精確累加；
+    變異數以 Welford 的方式合併每一塊的平均與離差平方和 (Chan 等人的平行公式)，
+    不會因為資料很大而失去精確度；百分位數由 TDigest 估計。
+    沒有任何數字時 mean、minimum、maximum 等為 None。
+    """
+
+    def __init__(self, compression: int = DEFAULT_COMPRESSION) -> None:
+        self.count = 0
+        self.total: Any = 0
+        self.minimum: Any = None
+        self.maximum: Any = None
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._digest = TDigest(compression)
+
+    def update(self, values: "Sequence[Any] | Any") -> None:
+        """加入一塊數字"""
+        n = len(values)
+        if not n:
+            return
+        lo, hi, total = _block_extent(values)
+        block_mean = total / n
+        block_m2 = _block_m2(values, block_mean)
+
+        combined = self.count + n
+        delta = block_mean - self._mean
+        self._mean += delta * n / combined
+        self._m2 += block_m2 + delta * delta * self.count * n / combined
+
+        self.count = combined
+        self.total += total
+        self.minimum = lo if self.minimum is None else min(self.minimum, lo)
+        self.maximum = hi if self.maximum is None else max(self.maximum, hi)
+        self._digest.update(values)
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    @property
+    def variance(self) -> float | None:
+        """樣本變異數 (n - 1)；少於兩個數字時為 None"""
+        return self._m2 / (self.count - 1) if self.count > 1 else None
+
+    @property
+    def stdev(self) -> float | None:
+        """樣本標準差"""
+        variance = self.variance
+        return math.sqrt(variance) if variance is not None else None
+
+    def quantile(self, q: float) -> float | None:
+        """近似的第 q 分位數 (0 ≤ q ≤ 1)"""
+        return self._digest.quantile(q)
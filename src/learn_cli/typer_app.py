@@ -5,66 +5,194 @@ Typer CLI 範例 - 一個簡單的文字處理工具
 Typer 是基於 type hints 的 CLI 框架，語法簡潔易懂。
 """
 
+from contextlib import ExitStack
+from itertools import chain
 from pathlib import Path
 
 import typer
 
+from . import calculator, engine, output
+from .cache import default_cache_path
+
 # 創建主要的 Typer 應用程式
 app = typer.Typer(help="一個簡單的文字處理 CLI 工具 (使用 Typer)")
 
 
+def buffered_stdout(flush_every: int | None) -> output.LineBuffer:
+    """標準輸出的緩衝區，取代熱迴圈中逐行的 typer.echo"""
+    return output.LineBuffer(typer.get_text_stream("stdout"), flush_every=flush_every)
+
+
 @app.command()
 def greet(
     name: str = typer.Argument(..., help="要問候的人的名字"),
     count: int = typer.Option(1, "--count", "-c", help="重複問候的次數"),
     polite: bool = typer.Option(False, "--polite", "-p", help="使用禮貌的問候方式"),
+    flush_every: int | None = typer.Option(
+        None,
+        "--flush-every",
+        min=1,
+        help="每輸出 N 行就 flush 一次 (預設：終端機逐行，否則緩衝後大塊寫入)",
+    ),
 ):
     """
     問候指定的人
     """
     greeting = "您好" if polite else "你好"
-    for _ in range(count):
-        typer.echo(f"{greeting}, {name}!")
+    # 每次的內容都相同，組成一次後整塊重複寫入
+    with buffered_stdout(flush_every) as out:
+        out.repeat(f"{greeting}, {name}!\n", count)
 
 
 @app.command()
 def greet_all(
     prefix: str = typer.Argument(">>> ", help="問候詞前綴"),
-    names: list[str] = typer.Argument(..., help="要問候的人名列表（模仿 mv 的 srcs）"),
+    names: list[str] | None = typer.Argument(
+        None, help="要問候的人名列表（模仿 mv 的 srcs）"
+    ),
     title: str = typer.Option(
         "先生/小姐", "--title", "-t", help="稱謂"
     ),  # typer 不支援 narg -1 的選項，所以用 Option
     greeting: list[str] | None = typer.Option(
         None, "--greeting", "-g", help="多種問候詞"
     ),
+    names_file: Path | None = typer.Option(
+        None,
+        "--names-file",
+        exists=True,
+        dir_okay=False,
+        allow_dash=True,
+        help="從檔案讀取更多人名 (每行一個，- 表示標準輸入)",
+    ),
+    greetings_file: Path | None = typer.Option(
+        None,
+        "--greetings-file",
+        exists=True,
+        dir_okay=False,
+        allow_dash=True,
+        help="從檔案讀取更多問候詞 (每行一個，- 表示標準輸入)",
+    ),
+    dry_run: bool = typer.Option(
+        False, "--dry-run", help="只計算會輸出的行數與位元組數"
+    ),
+    flush_every: int | None = typer.Option(
+        None,
+        "--flush-every",
+        min=1,
+        help="每輸出 N 行就 flush 一次 (預設：終端機逐行，否則緩衝後大塊寫入)",
+    ),
 ):
     """
     綜合測試：問候 + 多選項 + 類似 mv 介面
+
+    人名檔案逐批讀取並輸出，不必全部放進記憶體。
     """
+    from . import greetings
+
+    names = names or []
+    greeting = greeting or []
+    if names_file is None and not names:
+        typer.echo("錯誤: 請指定人名或以 --names-file 指定人名檔案", err=True)
+        raise typer.Exit(1)
+    if str(names_file) == "-" and str(greetings_file) == "-":
+        typer.echo("錯誤: 人名與問候詞不能都從標準輸入讀取", err=True)
+        raise typer.Exit(1)
+
     typer.echo(f"prefix: {prefix}")
     typer.echo(f"人名列表: {names}")
     typer.echo(f"稱謂: {title}")
     typer.echo(f"問候詞: {greeting}")
-    typer.echo("===== 問候結果 =====")
-    for name in names:
-        for g in greeting:
-            typer.echo(f"{prefix}{g}, {title} {name}!")
+    if names_file:
+        typer.echo(f"人名檔案: {names_file}")
+    if greetings_file:
+        typer.echo(f"問候詞檔案: {greetings_file}")
+
+    with ExitStack() as stack:
+        all_greetings = list(greeting)
+        if greetings_file:
+            f = stack.enter_context(
+                typer.open_file(str(greetings_file), encoding="utf-8")
+            )
+            all_greetings.extend(greetings.read_values(f))
+        all_names = iter(names)
+        if names_file:
+            f = stack.enter_context(typer.open_file(str(names_file), encoding="utf-8"))
+            all_names = chain(names, greetings.read_values(f))
+        heads = greetings.line_heads(all_greetings, prefix, title)
+
+        if dry_run:
+            result = greetings.estimate(all_names, heads)
+            typer.echo(f"將輸出 {result.lines} 行，共 {result.bytes} 位元組 (UTF-8)")
+            return
+
+        typer.echo("===== 問候結果 =====")
+        with buffered_stdout(flush_every) as out:
+            for text in greetings.greeting_chunks(all_names, heads):
+                out.write(text)
 
 
 @app.command()
 def count_words(
-    text: str = typer.Argument(..., help="要計算字數的文字"),
+    text: str | None = typer.Argument(None, help="要計算字數的文字"),
     show_chars: bool = typer.Option(False, "--chars", "-c", help="同時顯示字元數"),
+    show_lines: bool = typer.Option(False, "--lines", "-l", help="同時顯示行數"),
+    file_paths: list[Path] | None = typer.Option(
+        None,
+        "--file",
+        "-f",
+        exists=True,
+        dir_okay=False,
+        allow_dash=True,
+        help="改為計算 UTF-8 檔案的字數 (可重複指定，- 表示標準輸入)",
+    ),
+    jobs: int = typer.Option(
+        1, "--jobs", "-j", help="平行處理的行程數 (0 表示使用所有 CPU)"
+    ),
+    top: int | None = typer.Option(
+        None,
+        "--top",
+        min=1,
+        help="改為以 JSON 輸出出現最多的 K 個單字 (記憶體用量有上限)",
+    ),
+    compact: bool = typer.Option(
+        False, "--compact", help="JSON 不縮排也不含空白 (給程式讀取)"
+    ),
 ):
     """
     計算文字的字數
+
+    檔案以二進位逐塊串流計算，不建立單字列表；
+    多個檔案或大檔案可以用 --jobs 分給多個行程計算。
     """
-    words = len(text.split())
-    typer.echo(f"字數: {words}")
+    file_paths = file_paths or []
+    if (text is None) == (not file_paths):
+        typer.echo("錯誤: 請指定文字或以 --file 指定檔案 (擇一)", err=True)
+        raise typer.Exit(1)
 
-    if show_chars:
-        chars = len(text)
-        typer.echo(f"字元數: {chars}")
+    if top:
+        from . import wordfreq
+
+        try:
+            if file_paths:
+                stdin = typer.get_binary_stream("stdin")
+                counts = wordfreq.file_word_counts(file_paths, jobs=jobs, stdin=stdin)
+            else:
+                counts = wordfreq.text_word_counts(text)
+            report = wordfreq.top_words(counts, top)
+            typer.echo(wordfreq.format_json(report, compact=compact))
+        except OSError as e:
+            typer.echo(f"錯誤: {e}", err=True)
+            raise typer.Exit(1) from e
+        return
+
+    stdin = typer.get_binary_stream("stdin")
+    scan = engine.WordCountScan(text, file_paths, jobs=jobs, stdin=stdin)
+    try:
+        for line in engine.format_word_counts(scan, chars=show_chars, lines=show_lines):
+            typer.echo(line)
+    except OSError as e:
+        typer.echo(f"錯誤: {e}", err=True)
+        raise typer.Exit(1) from e
 
 
 @app.command()
@@ -73,31 +201,31 @@ def process_file(
     output: Path | None = typer.Option(None, "--output", "-o", help="輸出檔案路徑"),
     uppercase: bool = typer.Option(False, "--uppercase", "-u", help="轉換為大寫"),
     line_numbers: bool = typer.Option(False, "--line-numbers", "-n", help="加上行號"),
+    flush_every: int | None = typer.Option(
+        None,
+        "--flush-every",
+        min=1,
+        help="每輸出 N 行就 flush 一次 (預設：終端機逐行，否則緩衝後大塊寫入)",
+    ),
 ):
     """
     處理文字檔案
     """
     try:
-        # 讀取檔案
-        content = file_path.read_text(encoding="utf-8")
-        lines = content.splitlines()
-
-        # 處理內容
-        processed_lines = []
-        for i, line in enumerate(lines, 1):
-            processed_line = line.upper() if uppercase else line
-            if line_numbers:
-                processed_line = f"{i:3}: {processed_line}"
-            processed_lines.append(processed_line)
-
-        result = "\n".join(processed_lines)
+        # 逐塊讀取、處理並寫出，記憶體用量與檔案大小無關
+        pieces = engine.process_file(
+            file_path, uppercase=uppercase, line_numbers=line_numbers
+        )
 
         # 輸出結果
         if output:
-            output.write_text(result, encoding="utf-8")
+            engine.write_file(output, pieces, source=file_path)
             typer.echo(f"處理完成，結果已儲存至: {output}")
         else:
-            typer.echo(result)
+            with buffered_stdout(flush_every) as out:
+                for piece in pieces:
+                    out.write(piece)
+                out.line()
 
     except FileNotFoundError:
         typer.echo(f"錯誤: 找不到檔案 {file_path}", err=True)
@@ -116,71 +244,117 @@ def calc(
     """
     簡單的計算器
     """
-    operations = {
-        "add": lambda x, y: x + y,
-        "sub": lambda x, y: x - y,
-        "mul": lambda x, y: x * y,
-        "div": lambda x, y: x / y if y != 0 else None,
-    }
-
-    if operation not in operations:
+    if operation not in calculator.OPERATIONS:
         typer.echo(
-            f"錯誤: 不支援的操作 '{operation}'。支援的操作: {', '.join(operations.keys())}",
+            f"錯誤: 不支援的操作 '{operation}'。支援的操作: {', '.join(calculator.OPERATIONS)}",
             err=True,
         )
         raise typer.Exit(1)
 
-    result = operations[operation](a, b)
+    result = calculator.calculate(operation, a, b)
     if result is None:
         typer.echo("錯誤: 除數不能為零", err=True)
         raise typer.Exit(1)
 
-    op_symbols = {"add": "+", "sub": "-", "mul": "*", "div": "/"}
-    typer.echo(f"{a} {op_symbols[operation]} {b} = {result}")
+    typer.echo(f"{a} {calculator.SYMBOLS[operation]} {b} = {result}")
 
 
 @app.command()
-def search_replace(
-    file_path: Path = typer.Argument(..., help="要搜尋的檔案路徑"),
-    search_term: str = typer.Argument(..., help="要搜尋的文字"),
-    replace_term: str = typer.Argument(..., help="要替換的文字"),
+def calc_bulk(
+    input_file: Path = typer.Argument(..., help="輸入檔案路徑"),
+    input_format: str = typer.Option(
+        "csv", "--format", "-f", help="輸入格式 (csv/ndjson/binary)"
+    ),
+    operation: str | None = typer.Option(
+        None, "--op", help="所有列套用同一個運算 (輸入只有 a、b 兩欄)"
+    ),
     output: Path | None = typer.Option(None, "--output", "-o", help="輸出檔案路徑"),
-    case_sensitive: bool = typer.Option(
-        True, "--case-sensitive/--ignore-case", help="區分大小寫"
+    output_format: str = typer.Option(
+        "text",
+        "--output-format",
+        help="輸出格式 (text 每列一個數字，binary 為 float64)",
     ),
 ):
     """
-    在檔案中搜尋並替換文字
-    """
-    try:
-        content = file_path.read_text(encoding="utf-8")
+    大量計算 - 對檔案中的每一列 (operation, a, b) 進行計算
 
-        if case_sensitive:
-            new_content = content.replace(search_term, replace_term)
-        else:
-            # 大小寫不敏感的替換
-            import re
-
-            new_content = re.sub(
-                re.escape(search_term), replace_term, content, flags=re.IGNORECASE
-            )
-
-        count = (
-            content.count(search_term)
-            if case_sensitive
-            else len(re.findall(re.escape(search_term), content, re.IGNORECASE))
-        )
+    CSV 與 NDJSON 的欄位為 operation、a、b；二進位檔為 little-endian float64，
+    運算代碼 0-3 依序為 add/sub/mul/div。除數為零的列結果為 nan，不會中斷計算。
+    """
+    if output_format not in calculator.OUTPUT_FORMATS:
+        typer.echo(f"錯誤: 不支援的輸出格式 '{output_format}'", err=True)
+        raise typer.Exit(1)
 
+    try:
+        scan = calculator.BulkCalc(input_file, input_format, operation=operation)
+        chunks = calculator.format_results(scan, output_format)
         if output:
-            output.write_text(new_content, encoding="utf-8")
-            typer.echo(f"已替換 {count} 處，結果儲存至: {output}")
+            with engine.open_output(output, source=input_file) as sink:
+                for chunk in chunks:
+                    sink.write(chunk)
         else:
-            typer.echo(new_content)
-            typer.echo(f"\n已替換 {count} 處", err=True)
-
+            stdout = typer.get_binary_stream("stdout")
+            for chunk in chunks:
+                stdout.write(chunk)
+            stdout.flush()
     except FileNotFoundError:
-        typer.echo(f"錯誤: 找不到檔案 {file_path}", err=True)
+        typer.echo(f"錯誤: 找不到檔案 {input_file}", err=True)
         raise typer.Exit(1) from None
+    except (OSError, ValueError) as e:
+        typer.echo(f"錯誤: {e}", err=True)
+        raise typer.Exit(1) from e
+
+    warning = scan.zero_division_warning()
+    if warning:
+        typer.echo(warning, err=True)
+    if output:
+        typer.echo(f"計算完成，共 {scan.rows} 列，結果已儲存至: {output}")
+
+
+@app.command()
+def search_replace(
+    file_path: Path = typer.Argument(..., exists=True, help="要搜尋的檔案路徑"),
+    search_term: str | None = typer.Argument(
+        None, help="要搜尋的文字 (使用 --rules 時省略)"
+    ),
+    replace_term: str | None = typer.Argument(
+        None, help="要替換的文字 (使用 --rules 時省略)"
+    ),
+    output: Path | None = typer.Option(None, "--output", "-o", help="輸出檔案路徑"),
+    case_sensitive: bool = typer.Option(
+        True, "--case-sensitive/--ignore-case", help="區分大小寫"
+    ),
+    jobs: int = typer.Option(
+        1, "--jobs", "-j", help="平行處理的行程數 (0 表示使用所有 CPU)"
+    ),
+    rules_path: Path | None = typer.Option(
+        None,
+        "--rules",
+        "-r",
+        exists=True,
+        dir_okay=False,
+        help="搜尋替換規則檔 (TSV 或 JSON)，一次掃描套用所有規則",
+    ),
+    count_only: bool = typer.Option(
+        False, "--count-only", help="只計算符合次數，不輸出替換結果"
+    ),
+):
+    """
+    在檔案中搜尋並替換文字
+    """
+    messages = engine.search_replace_output(
+        file_path,
+        search_term,
+        replace_term,
+        output=output,
+        rules_path=rules_path,
+        case_sensitive=case_sensitive,
+        jobs=jobs,
+        count_only=count_only,
+    )
+    try:
+        for text, err in messages:
+            typer.echo(text, nl=False, err=err)
     except Exception as e:
         typer.echo(f"錯誤: {e}", err=True)
         raise typer.Exit(1) from e
@@ -193,73 +367,72 @@ def generate_report(
         "*.py", "--pattern", "-p", help="檔案模式 (例如: *.py, *.txt)"
     ),
     output_format: str = typer.Option(
-        "text", "--format", "-f", help="輸出格式 (text/json)"
+        "text",
+        "--format",
+        "-f",
+        help=(
+            "輸出格式 (text/json/ndjson/csv/binary/arrow/parquet，"
+            "ndjson 會逐檔串流輸出，csv/binary/arrow/parquet 為欄位式)"
+        ),
+    ),
+    jobs: int = typer.Option(
+        1, "--jobs", "-j", help="平行處理的工作數 (0 表示使用所有 CPU)"
+    ),
+    executor: str = typer.Option(
+        "thread",
+        "--executor",
+        help="平行方式 (thread/process)：thread 適合 I/O 為主，process 適合大量行數計算",
+    ),
+    no_cache: bool = typer.Option(False, "--no-cache", help="不讀取也不更新行數快取"),
+    rebuild_cache: bool = typer.Option(
+        False, "--rebuild-cache", help="忽略既有快取，重新計算所有檔案"
+    ),
+    compact: bool = typer.Option(
+        False, "--compact", help="JSON 不縮排也不含空白 (給程式讀取)"
+    ),
+    flush_every: int | None = typer.Option(
+        None,
+        "--flush-every",
+        min=1,
+        help="每輸出 N 行就 flush 一次 (預設：終端機逐行，否則緩衝後大塊寫入)",
     ),
 ):
     """
     生成目錄中檔案的統計報告
-    """
-    import glob
-    import json
-    from datetime import datetime
 
+    行數會快取在 $XDG_CACHE_HOME (預設 ~/.cache) 底下，
+    重複執行時只重新讀取大小或修改時間有變的檔案。
+
+    csv、binary、arrow、parquet 每個檔案一列，大小、行數與修改時間保留原始型別，
+    適合載入資料框或直接記憶體映射 (arrow 與 parquet 需要 pyarrow)。
+    """
     try:
-        pattern = str(directory / file_pattern)
-        files = glob.glob(pattern, recursive=True)
-
-        report_data = {
-            "生成時間": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "目錄": str(directory),
-            "檔案模式": file_pattern,
-            "檔案數量": len(files),
-            "檔案詳情": [],
-        }
-
-        total_lines = 0
-        total_size = 0
-
-        for file_path in files:
-            try:
-                path_obj = Path(file_path)
-                stat = path_obj.stat()
-                lines = len(path_obj.read_text(encoding="utf-8").splitlines())
-
-                file_info = {
-                    "檔案名": path_obj.name,
-                    "路徑": str(path_obj),
-                    "大小(bytes)": stat.st_size,
-                    "行數": lines,
-                    "修改時間": datetime.fromtimestamp(stat.st_mtime).strftime(
-                        "%Y-%m-%d %H:%M:%S"
-                    ),
-                }
-
-                report_data["檔案詳情"].append(file_info)
-                total_lines += lines
-                total_size += stat.st_size
-
-            except Exception as e:
-                typer.echo(f"警告: 無法處理檔案 {file_path}: {e}", err=True)
-
-        report_data["總行數"] = total_lines
-        report_data["總大小(bytes)"] = total_size
-
-        if output_format == "json":
-            typer.echo(json.dumps(report_data, ensure_ascii=False, indent=2))
+        scan = engine.ReportScan(
+            directory,
+            file_pattern,
+            on_error=lambda path, e: typer.echo(
+                f"警告: 無法處理檔案 {path}: {e}", err=True
+            ),
+            jobs=jobs,
+            executor=executor,
+            cache_path=None if no_cache else default_cache_path(),
+            rebuild_cache=rebuild_cache,
+        )
+        if output_format not in ("text", "json", "ndjson"):
+            # 欄位式格式：每個檔案一列，保留原始的數值型別
+            from . import columnar
+
+            stdout = typer.get_binary_stream("stdout")
+            columnar.write_report(scan.records(), output_format, stdout)
+            return
+        if output_format == "ndjson":
+            # 每處理完一個檔案就輸出一行，不必等整個目錄掃描完
+            lines = engine.iter_ndjson_report(scan)
         else:
-            typer.echo("📊 檔案分析報告")
-            typer.echo("=" * 40)
-            typer.echo(f"生成時間: {report_data['生成時間']}")
-            typer.echo(f"分析目錄: {report_data['目錄']}")
-            typer.echo(f"檔案模式: {report_data['檔案模式']}")
-            typer.echo(f"檔案數量: {report_data['檔案數量']}")
-            typer.echo(f"總行數: {report_data['總行數']:,}")
-            typer.echo(f"總大小: {report_data['總大小(bytes)']:,} bytes")
-            typer.echo("\n📁 檔案詳情:")
-            for file_info in report_data["檔案詳情"]:
-                typer.echo(
-                    f"  • {file_info['檔案名']} ({file_info['行數']} 行, {file_info['大小(bytes)']} bytes)"
-                )
+            lines = engine.format_report(scan.report(), output_format, compact=compact)
+        with buffered_stdout(flush_every) as out:
+            for line in lines:
+                out.line(line)
 
     except Exception as e:
         typer.echo(f"錯誤: {e}", err=True)
@@ -323,5 +496,40 @@ def interactive_demo():
     typer.echo(success_msg)
 
 
+@app.command()
+def batch(
+    ctx: typer.Context,
+    input_file: typer.FileText = typer.Argument(
+        "-", encoding="utf-8", help="每行一個命令的檔案 (- 表示標準輸入)"
+    ),
+    jobs: int = typer.Option(
+        1, "--jobs", "-j", help="平行執行的工作行程數 (0 表示 CPU 核心數)"
+    ),
+):
+    """
+    批次執行命令 - 每行一個命令 (例如 calc add 1 2)，依序輸出結果
+
+    從檔案或標準輸入 (-) 讀取，全部在同一個行程中執行；
+    空白行與 # 開頭的行會被略過，失敗的命令會在 stderr 標示行號與結束代碼。
+    """
+    from . import runner
+
+    prog_name = ctx.find_root().info_name
+    failed = 0
+    lines = engine.read_lines(input_file)
+    for result in runner.run_batch("typer", prog_name, lines, jobs=jobs):
+        if result.stdout:
+            typer.echo(result.stdout, nl=False)
+        if result.stderr:
+            typer.echo(result.stderr, nl=False, err=True)
+        if result.code:
+            failed += 1
+            typer.echo(f"第 {result.line} 行: 結束代碼 {result.code}", err=True)
+
+    if failed:
+        typer.echo(f"{failed} 個命令執行失敗", err=True)
+        raise typer.Exit(1)
+
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,203 @@
+"""
+詞頻統計 - count-words --top K
+
+單字以 str.split() 的規則切出，總字數與 count-words 一致。檔案切成片段後
+由行程池各自計數，再在主行程合併。不同的單字太多時，把計數依單字的雜湊
+分成 SPILL_BUCKETS 份寫入暫存檔；最後每份各自合併並取前 K 名，
+所以記憶體用量約為單字種類的 1/SPILL_BUCKETS，而結果仍然是精確的。
+"""
+
+import heapq
+import os
+import sys
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from . import engine, jsonfmt
+
+# 記憶體中最多保留的不同單字數，超過時寫入暫存檔
+MAX_WORDS = 1 << 20
+
+# 暫存檔依單字雜湊分成的份數
+SPILL_BUCKETS = 64
+
+# ASCII 空白位元組 → b" "，其他 → b"x"；片段的切點放在空白之後
+_SPACE_MARKS = bytes(
+    0x20 if byte in b"\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f " else 0x78 for byte in range(256)
+)
+
+
+def count_tokens(chunks: Iterable[bytes]) -> Counter[str]:
+    """計算 UTF-8 資料塊中每個單字的出現次數；跨越資料塊的單字接起來算一次"""
+    counter: Counter[str] = Counter()
+    carry = ""
+    for chunk in chunks:
+        text = carry + chunk.decode("utf-8", "replace")
+        words = text.split()
+        carry = words.pop() if words and not text[-1].isspace() else ""
+        counter.update(words)
+    if carry:
+        counter[carry] += 1
+    return counter
+
+
+def text_word_counts(text: str) -> Iterator[Counter[str]]:
+    """命令列文字的詞頻"""
+    yield Counter(text.split())
+
+
+def _word_segments(path: Path, size: int) -> list[tuple[str, int, int]]:
+    """把檔案切成約 size 位元組的片段，切點往後移到空白之後，不會切開單字"""
+    with path.open("rb") as f:
+        total = os.fstat(f.fileno()).st_size
+        cuts = [0]
+        offset = size
+        while offset < total:
+            f.seek(offset)
+            while data := f.read(1 << 16):
+                found = data.translate(_SPACE_MARKS).find(b" ")
+                if found >= 0:
+                    offset += found + 1
+                    break
+                offset += len(data)
+            if offset >= total:
+                break
+            cuts.append(offset)
+            offset += size
+        cuts.append(total)
+    return [(str(path), start, end) for start, end in zip(cuts, cuts[1:], strict=False)]
+
+
+def _count_segment_words(segment: tuple[str, int, int]) -> Counter[str]:
+    """計算檔案中一個片段的詞頻 (平行工作的單位)"""
+    path, start, end = segment
+    with open(path, "rb") as f:
+        f.seek(start)
+        return count_tokens(engine.utf8_chunks(f, end - start))
+
+
+def file_word_counts(
+    paths: Iterable[Path],
+    *,
+    jobs: int = 1,
+    stdin: BinaryIO | None = None,
+    segment_size: int = engine.COUNT_SEGMENT_SIZE,
+) -> Iterator[Counter[str]]:
+    """逐片段產生檔案的詞頻，路徑為 - 時讀取 stdin (jobs 為 0 時使用所有 CPU)"""
+    paths = list(paths)
+    for path in paths:
+        if str(path) == "-":
+            stream = stdin if stdin is not None else sys.stdin.buffer
+            yield count_tokens(engine.utf8_chunks(stream))
+    segments = (
+        segment
+        for path in paths
+        if str(path) != "-"
+        for segment in _word_segments(path, segment_size)
+    )
+    yield from engine.parallel_map(_count_segment_words, segments, jobs=jobs)
+
+
+def _ranking(item: tuple[str, int]) -> tuple[int, str]:
+    """次數多的在前，次數相同時依單字排序，結果與是否寫入暫存檔無關"""
+    word, count = item
+    return -count, word
+
+
+class WordFrequency:
+    """
+    詞頻累加器
+
+    以 update() 加入計數，以 most_common() 取得前 K 名；
+    以 with 使用，離開時關閉暫存檔。
+    """
+
+    def __init__(
+        self, max_words: int = MAX_WORDS, buckets: int = SPILL_BUCKETS
+    ) -> None:
+        self.max_words = max_words
+        self.buckets = buckets
+        self.total = 0
+        self._counter: Counter[str] = Counter()
+        self._files: list[Any] = []
+
+    def update(self, counts: Counter[str]) -> None:
+        self.total += counts.total()
+        self._counter.update(counts)
+        if len(self._counter) > self.max_words:
+            self._spill()
+
+    def _spill(self) -> None:
+        """把目前的計數依單字的雜湊分份寫入暫存檔"""
+        import pickle
+        import tempfile
+
+        if not self._files:
+            self._files = [tempfile.TemporaryFile() for _ in range(self.buckets)]
+        parts: list[list[tuple[str, int]]] = [[] for _ in range(self.buckets)]
+        for item in self._counter.items():
+            parts[hash(item[0]) % self.buckets].append(item)
+        for f, part in zip(self._files, parts, strict=True):
+            if part:
+                pickle.dump(part, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._counter = Counter()
+
+    def _merged_buckets(self) -> Iterator[Counter[str]]:
+        import pickle
+
+        for f in self._files:
+            f.seek(0)
+            merged: Counter[str] = Counter()
+            while True:
+                try:
+                    part = pickle.load(f)
+                except EOFError:
+                    break
+                # 同一次寫入的單字不重複，可以直接以 dict 合併
+                merged.update(dict(part))
+            yield merged
+
+    def most_common(self, k: int) -> tuple[list[tuple[str, int]], int]:
+        """回傳 (前 k 名的 (單字, 次數), 不同單字數)"""
+        if not self._files:
+            top = heapq.nsmallest(k, self._counter.items(), key=_ranking)
+            return top, len(self._counter)
+        self._spill()
+        candidates: list[tuple[str, int]] = []
+        distinct = 0
+        for merged in self._merged_buckets():
+            distinct += len(merged)
+            candidates.extend(heapq.nsmallest(k, merged.items(), key=_ranking))
+        return heapq.nsmallest(k, candidates, key=_ranking), distinct
+
+    def close(self) -> None:
+        for f in self._files:
+            f.close()
+        self._files = []
+
+    def __enter__(self) -> "WordFrequency":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def top_words(
+    counts: Iterable[Counter[str]], k: int, *, max_words: int = MAX_WORDS
+) -> dict[str, Any]:
+    """合併所有詞頻，回傳總字數、不同單字數與前 k 名"""
+    with WordFrequency(max_words) as frequency:
+        for counter in counts:
+            frequency.update(counter)
+        top, distinct = frequency.most_common(k)
+    return {
+        "總字數": frequency.total,
+        "不同單字數": distinct,
+        "最常見單字": [{"單字": word, "次數": count} for word, count in top],
+    }
+
+
+def format_json(report: dict[str, Any], *, compact: bool = False) -> str:
+    return jsonfmt.dumps(report, compact=compact)
@@ -6,25 +6,24 @@ Learn CLI - Typer 和 Click 學習專案
 使用方式:
 - typer: 使用 Typer 框架的 CLI 應用程式
 - click: 使用 Click 框架的 CLI 應用程式
+- serve: 啟動常駐伺服器；設定 LEARN_CLI_SOCKET 後 typer / click 命令會轉送給它執行
 """
 
 __version__ = "0.1.0"
 
 
+# 子命令 → (模組, 應用程式物件)；只導入實際被選到的框架
+CLI_APPS = {
+    "typer": ("learn_cli.typer_app", "app"),
+    "click": ("learn_cli.click_app", "cli"),
+}
+
+
 def main() -> None:
     """
     主要進入點 - 讓使用者選擇要使用哪個 CLI 框架
     """
-    import importlib.util
     import sys
-    from pathlib import Path
-
-    # 動態導入 CLI 模組
-    def import_module_from_path(module_name, file_path):
-        spec = importlib.util.spec_from_file_location(module_name, file_path)
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
-        return module
 
     if len(sys.argv) < 2:
         print("學習 Typer 和 Click CLI 框架")
@@ -32,6 +31,7 @@ def main() -> None:
         print("使用方式:")
         print("  learn-clicktyper-automation typer [命令]  # 使用 Typer 版本")
         print("  learn-clicktyper-automation click [命令]  # 使用 Click 版本")
+        print("  learn-clicktyper-automation serve [SOCKET]  # 啟動常駐伺服器")
         print("")
         print("範例:")
         print("  learn-clicktyper-automation typer greet Alice")
@@ -41,30 +41,57 @@ def main() -> None:
         return
 
     framework = sys.argv[1]
+    if framework not in CLI_APPS and framework != "serve":
+        print(f"錯誤: 未知的框架 '{framework}'. 請使用 'typer' 或 'click'")
+        sys.exit(1)
 
-    # 找到 CLI 模組的路徑
-    current_dir = Path(__file__).parent.parent
-    typer_path = current_dir / "learn_cli" / "typer_app.py"
-    click_path = current_dir / "learn_cli" / "click_app.py"
-
-    if framework == "typer":
-        # 移除 'typer' 參數，讓 typer 處理剩餘的參數
-        sys.argv = [sys.argv[0]] + sys.argv[2:]
-        if typer_path.exists():
-            typer_module = import_module_from_path("typer_app", typer_path)
-            typer_module.app()
-        else:
-            print("錯誤: 找不到 typer_app.py")
-            sys.exit(1)
-    elif framework == "click":
-        # 移除 'click' 參數，讓 click 處理剩餘的參數
-        sys.argv = [sys.argv[0]] + sys.argv[2:]
-        if click_path.exists():
-            click_module = import_module_from_path("click_app", click_path)
-            click_module.cli()
-        else:
-            print("錯誤: 找不到 click_app.py")
+    import importlib
+    import os
+
+    # learn_cli 與本套件並列於 src 底下；以一般的套件導入載入，
+    # 讓模組內的相對導入可以運作，也能使用 __pycache__ 的位元組碼快取
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if src_dir not in sys.path:
+        sys.path.insert(0, src_dir)
+
+    if framework == "serve":
+        import signal
+
+        from learn_cli.client import default_socket_path
+        from learn_cli.server import serve
+
+        # 以 SIGTERM 停止時也要正常結束，才會移除 socket 檔
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        socket_path = sys.argv[2] if len(sys.argv) > 2 else default_socket_path()
+        print(f"伺服器在 {socket_path} 上等待命令 (Ctrl+C 結束)", file=sys.stderr)
+        try:
+            serve(socket_path)
+        except RuntimeError as e:
+            print(f"錯誤: {e}", file=sys.stderr)
             sys.exit(1)
-    else:
-        print(f"錯誤: 未知的框架 '{framework}'. 請使用 'typer' 或 'click'")
+        except KeyboardInterrupt:
+            pass
+        return
+
+    # 有常駐伺服器時直接轉送，不必導入 CLI 框架
+    socket_path = os.environ.get("LEARN_CLI_SOCKET")
+    if socket_path:
+        from learn_cli.client import forward
+
+        prog_name = os.path.basename(sys.argv[0])
+        code = forward(socket_path, framework, sys.argv[2:], prog_name=prog_name)
+        if code is not None:
+            sys.exit(code)
+
+    module_name, attr = CLI_APPS[framework]
+    try:
+        module = importlib.import_module(module_name)
+    except ModuleNotFoundError as e:
+        if e.name is None or not module_name.startswith(e.name):
+            raise
+        print(f"錯誤: 找不到 {module_name}")
         sys.exit(1)
+
+    # 移除框架名稱參數，讓 CLI 處理剩餘的參數
+    sys.argv = [sys.argv[0]] + sys.argv[2:]
+    getattr(module, attr)()
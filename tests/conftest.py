@@ -0,0 +1,11 @@
+"""
+pytest 共用設定
+"""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_home(tmp_path_factory, monkeypatch):
+    """讓 generate_report 的行數快取寫到暫存目錄，不影響使用者的 ~/.cache"""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path_factory.mktemp("cache")))
@@ -0,0 +1,146 @@
+"""
+測試大量計算
+
+三種輸入格式、NumPy 與 array 兩種運算方式的結果都必須與單筆計算相同。
+"""
+
+import json
+import math
+import random
+import sys
+from array import array
+from pathlib import Path
+
+import pytest
+
+current_dir = Path(__file__).parent
+src_path = current_dir.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from learn_cli import calculator, compat  # noqa: E402
+
+
+def random_rows(n, seed=0):
+    rng = random.Random(seed)
+    ops = list(calculator.OPERATIONS)
+    return [
+        (rng.choice(ops), rng.uniform(-100, 100), float(rng.randrange(-2, 3)))
+        for _ in range(n)
+    ]
+
+
+def write_inputs(tmp_path, rows):
+    """把同一組資料寫成 CSV、NDJSON 與二進位檔"""
+    csv_path = tmp_path / "rows.csv"
+    csv_path.write_text(
+        "operation,a,b\n" + "".join(f"{op},{a!r},{b!r}\n" for op, a, b in rows),
+        encoding="utf-8",
+    )
+    ndjson_path = tmp_path / "rows.ndjson"
+    ndjson_path.write_text(
+        "".join(
+            json.dumps({"operation": op, "a": a, "b": b}) + "\n" for op, a, b in rows
+        ),
+        encoding="utf-8",
+    )
+    binary_path = tmp_path / "rows.bin"
+    values = array("d")
+    for op, a, b in rows:
+        values.extend((calculator.OP_CODES[op], a, b))
+    if sys.byteorder == "big":
+        values.byteswap()
+    binary_path.write_bytes(values.tobytes())
+    return {"csv": csv_path, "ndjson": ndjson_path, "binary": binary_path}
+
+
+def expected(rows):
+    results = [calculator.calculate(op, a, b) for op, a, b in rows]
+    return [math.nan if r is None else r for r in results]
+
+
+def run_bulk(path, input_format, **options):
+    scan = calculator.BulkCalc(path, input_format, chunk_rows=7, **options)
+    values = [value for chunk in scan for value in chunk.tolist()]
+    return scan, values
+
+
+def assert_same(actual, wanted):
+    assert len(actual) == len(wanted)
+    for x, y in zip(actual, wanted, strict=True):
+        assert x == y or (math.isnan(x) and math.isnan(y))
+
+
+@pytest.fixture(params=["array", "numpy"])
+def backend(request, monkeypatch):
+    """分別以 array 與 NumPy 運算 (沒有安裝 NumPy 時略過)"""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(compat, "load_numpy", lambda: None)
+    return request.param
+
+
+@pytest.mark.parametrize("input_format", calculator.INPUT_FORMATS)
+def test_bulk_matches_single(tmp_path, backend, input_format):
+    """測試大量計算與逐筆 calculate 的結果相同，除數為零的列被記錄"""
+    rows = random_rows(100)
+    path = write_inputs(tmp_path, rows)[input_format]
+    scan, values = run_bulk(path, input_format)
+
+    assert_same(values, expected(rows))
+    zero_rows = [i for i, (op, _a, b) in enumerate(rows, 1) if op == "div" and b == 0]
+    assert scan.rows == len(rows)
+    assert scan.zero_division == len(zero_rows)
+    assert scan.zero_division_rows == zero_rows[: calculator.MAX_REPORTED_ROWS]
+
+
+def test_bulk_single_operation(tmp_path, backend):
+    """測試以 --op 對 a、b 兩欄套用同一個運算 (CSV 沒有標題列)"""
+    path = tmp_path / "ab.csv"
+    path.write_text("6,3\n1,0\n\n-2,4\n", encoding="utf-8")
+    scan, values = run_bulk(path, "csv", operation="div")
+    assert_same(values, [2.0, math.nan, -0.5])
+    assert scan.zero_division_rows == [2]
+    assert scan.zero_division_warning() == "警告: 1 列除數為零，結果記為 nan (第 2 列)"
+
+    binary = tmp_path / "ab.bin"
+    pairs = array("d", [6, 3, 1, 0, -2, 4])
+    if sys.byteorder == "big":
+        pairs.byteswap()
+    binary.write_bytes(pairs.tobytes())
+    _scan, values = run_bulk(binary, "binary", operation="mul")
+    assert values == [18.0, 0.0, -8.0]
+
+
+def test_bulk_binary_output(tmp_path, backend):
+    """測試二進位輸出為 little-endian float64"""
+    rows = random_rows(20, seed=1)
+    path = write_inputs(tmp_path, rows)["csv"]
+    data = b"".join(
+        calculator.format_results(calculator.BulkCalc(path, chunk_rows=6), "binary")
+    )
+    values = array("d", data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    assert_same(values.tolist(), expected(rows))
+
+
+@pytest.mark.parametrize(
+    "input_format, content, message",
+    [
+        ("csv", "add,1,2\nadd,x,2\n", "第 2 列"),
+        ("csv", "pow,1,2\n", "第 1 列"),
+        ("csv", "op,a,b\nadd,1,2\n", "缺少欄位: operation"),
+        ("ndjson", '{"operation": "add", "a": 1}\n', "第 1 列"),
+        ("binary", b"\0" * 20, "整數倍"),
+    ],
+)
+def test_bulk_invalid_input(tmp_path, input_format, content, message):
+    """測試無法解析的輸入回報列號"""
+    path = tmp_path / "input"
+    if isinstance(content, bytes):
+        path.write_bytes(content)
+    else:
+        path.write_text(content, encoding="utf-8")
+    with pytest.raises(ValueError, match=message):
+        list(calculator.BulkCalc(path, input_format))
@@ -4,6 +4,8 @@
 這個檔案包含針對兩個 CLI 框架的基本功能測試。
 """
 
+import json
+import os
 import sys
 from pathlib import Path
 
@@ -226,3 +228,455 @@ def test_click_greet_all():
     assert ">>> 您好, 女士 Alice!" in result.output
     assert ">>> 你好, 女士 Bob!" in result.output
     assert ">>> 您好, 女士 Bob!" in result.output
+
+
+def test_click_process_file_in_place():
+    """測試 Click 處理檔案時輸出可以覆寫來源檔案"""
+    runner = ClickCliRunner()
+    with runner.isolated_filesystem():
+        with open("test.txt", "w", encoding="utf-8") as f:
+            f.write("hello\r\nworld\n")
+
+        result = runner.invoke(
+            click_app, ["process-file", "test.txt", "-u", "-n", "-o", "test.txt"]
+        )
+        assert result.exit_code == 0
+        assert Path("test.txt").read_text(encoding="utf-8") == "  1: HELLO\n  2: WORLD"
+
+
+def test_typer_process_file():
+    """測試 Typer 處理檔案並輸出到標準輸出"""
+    runner = TyperCliRunner()
+    with runner.isolated_filesystem():
+        with open("test.txt", "w", encoding="utf-8") as f:
+            f.write("hello\nworld")
+
+        result = runner.invoke(typer_app, ["process-file", "test.txt", "-u"])
+        assert result.exit_code == 0
+        assert result.stdout == "HELLO\nWORLD\n"
+
+
+def test_click_search_replace_rules():
+    """測試 Click 以規則檔一次套用多組搜尋替換"""
+    runner = ClickCliRunner()
+    with runner.isolated_filesystem():
+        with open("test.txt", "w", encoding="utf-8") as f:
+            f.write("Hello world\nHello Python\nGoodbye world")
+        with open("rules.tsv", "w", encoding="utf-8") as f:
+            f.write("Hello\tHi\nworld\t世界\n")
+
+        result = runner.invoke(
+            click_app,
+            ["search-replace", "test.txt", "--rules", "rules.tsv", "-o", "out.txt"],
+        )
+        assert result.exit_code == 0
+        assert "已替換 4 處" in result.output
+        assert "Hello → Hi: 2 處" in result.output
+        assert (
+            Path("out.txt").read_text(encoding="utf-8")
+            == "Hi 世界\nHi Python\nGoodbye 世界"
+        )
+
+
+def test_typer_search_replace_missing_rules():
+    """測試 Typer 的規則檔不存在時是用法錯誤，訊息指出規則檔而不是輸入檔"""
+    runner = TyperCliRunner()
+    with runner.isolated_filesystem():
+        with open("test.txt", "w", encoding="utf-8") as f:
+            f.write("Hello world")
+
+        args = ["search-replace", "test.txt", "--rules", "missing.tsv"]
+        result = runner.invoke(typer_app, args)
+        assert result.exit_code == 2
+        assert "missing.tsv" in result.output
+        assert "找不到檔案 test.txt" not in result.output
+
+        result = runner.invoke(typer_app, ["search-replace", "nope.txt", "a", "b"])
+        assert result.exit_code == 2
+
+
+def test_typer_count_words_file():
+    """測試 Typer 計算檔案字數"""
+    runner = TyperCliRunner()
+    with runner.isolated_filesystem():
+        with open("test.txt", "w", encoding="utf-8") as f:
+            f.write("你好 世界\nhello world\n")
+
+        result = runner.invoke(typer_app, ["count-words", "--file", "test.txt", "-c"])
+        assert result.exit_code == 0
+        assert "字數: 4" in result.stdout
+        assert "字元數: 18" in result.stdout
+
+
+def test_click_search_replace_count_only():
+    """測試 Click 只計算符合次數"""
+    runner = ClickCliRunner()
+    with runner.isolated_filesystem():
+        with open("test.txt", "w", encoding="utf-8") as f:
+            f.write("Hello world\nhello Python\n")
+
+        result = runner.invoke(
+            click_app,
+            ["search-replace", "test.txt", "HELLO", "--ignore-case", "--count-only"],
+        )
+        assert result.exit_code == 0
+        assert result.output == "找到 2 處\n"
+
+
+def test_click_generate_report_ndjson():
+    """測試 Click 以 NDJSON 串流輸出報告"""
+    runner = ClickCliRunner()
+    with runner.isolated_filesystem():
+        for name in ("a.py", "b.py"):
+            with open(name, "w", encoding="utf-8") as f:
+                f.write("print('hello')\nprint('world')")
+
+        result = runner.invoke(
+            click_app, ["generate-report", ".", "--format", "ndjson", "--no-cache"]
+        )
+        assert result.exit_code == 0
+        records = [json.loads(line) for line in result.output.splitlines()]
+        assert sorted(record["檔案名"] for record in records[:-1]) == ["a.py", "b.py"]
+        assert records[-1]["摘要"]["檔案數量"] == 2
+        assert records[-1]["摘要"]["總行數"] == 4
+
+
+BATCH_INPUT = """calc add 1 2
+# 註解與空白行會被略過
+
+count-words "a b c"
+calc div 1 0
+greet Bob
+"""
+
+
+def test_click_batch():
+    """測試 Click 批次執行：依序輸出，失敗的行在 stderr 標示結束代碼"""
+    runner = ClickCliRunner()
+    result = runner.invoke(click_app, ["batch"], input=BATCH_INPUT)
+    assert result.exit_code == 1
+    assert result.stdout == "1.0 + 2.0 = 3.0\n字數: 3\n你好, Bob!\n"
+    assert "第 5 行: 結束代碼 1" in result.stderr
+    assert "1 個命令執行失敗" in result.stderr
+
+    # 平行執行的輸出順序與依序執行相同
+    lines = "".join(f"calc add {i} 1\n" for i in range(600))
+    serial = runner.invoke(click_app, ["batch"], input=lines)
+    parallel = runner.invoke(click_app, ["batch", "--jobs", "2"], input=lines)
+    assert parallel.exit_code == serial.exit_code == 0
+    assert parallel.stdout == serial.stdout
+
+
+def test_batch_binary_and_stdin_commands():
+    """測試 batch 中以二進位輸出或讀取標準輸入的命令也能執行"""
+    import struct
+
+    runner = ClickCliRunner()
+    lines = (
+        "random-numbers -c 3 --seed 1 -f binary\n"
+        "count-words --file -\n"
+        "calc add 1 2\n"
+    )
+    result = runner.invoke(click_app, ["batch"], input=lines)
+    assert result.exit_code == 0
+    assert "Traceback" not in result.stderr
+    # batch 的標準輸入不會交給其中的命令，count-words 讀到的是空的輸入
+    binary, text = result.stdout_bytes[:24], result.stdout_bytes[24:].decode()
+    assert all(1 <= value <= 100 for value in struct.unpack("<3q", binary))
+    assert text == "字數: 0\n1.0 + 2.0 = 3.0\n"
+    assert "平均值" in result.stderr
+
+    # Typer 版本沒有 random-numbers，改以寫入二進位串流的 CSV 報告測試
+    lines = "generate-report . -p '*.none' -f csv --no-cache\ncount-words --file -\n"
+    result = TyperCliRunner().invoke(typer_app, ["batch"], input=lines)
+    assert result.exit_code == 0
+    assert result.stdout_bytes == "path,name,size,lines,mtime\r\n字數: 0\n".encode()
+
+
+def test_typer_batch_file():
+    """測試 Typer 從檔案批次執行，batch 中不能再執行 batch"""
+    runner = TyperCliRunner()
+    with runner.isolated_filesystem():
+        with open("commands.txt", "w", encoding="utf-8") as f:
+            f.write("calc mul 2 3\nbatch commands.txt\n")
+
+        result = runner.invoke(typer_app, ["batch", "commands.txt"])
+        assert result.exit_code == 1
+        assert result.stdout == "2.0 * 3.0 = 6.0\n"
+        assert "第 2 行: 結束代碼 2" in result.stderr
+
+
+def test_click_calc_bulk():
+    """測試 Click 大量計算：除數為零的列記為 nan 並在 stderr 回報"""
+    runner = ClickCliRunner()
+    with runner.isolated_filesystem():
+        with open("rows.csv", "w", encoding="utf-8") as f:
+            f.write("operation,a,b\nadd,1,2\ndiv,1,0\nmul,3,4\n")
+
+        result = runner.invoke(click_app, ["calc-bulk", "rows.csv"])
+        assert result.exit_code == 0
+        assert result.stdout == "3.0\nnan\n12.0\n"
+        assert "1 列除數為零" in result.stderr
+        assert "第 2 列" in result.stderr
+
+
+def test_typer_calc_bulk_output():
+    """測試 Typer 大量計算寫入輸出檔案"""
+    runner = TyperCliRunner()
+    with runner.isolated_filesystem():
+        with open("rows.ndjson", "w", encoding="utf-8") as f:
+            f.write('{"a": 6, "b": 3}\n{"a": 1, "b": 4}\n')
+
+        result = runner.invoke(
+            typer_app,
+            ["calc-bulk", "rows.ndjson", "-f", "ndjson", "--op", "sub", "-o", "out"],
+        )
+        assert result.exit_code == 0
+        assert "共 2 列" in result.stdout
+        with open("out", encoding="utf-8") as f:
+            assert f.read() == "3.0\n-3.0\n"
+
+
+def test_click_random_numbers_bulk():
+    """測試 Click 以固定種子輸出純文字，統計資訊改到 stderr"""
+    runner = ClickCliRunner()
+    args = ["random-numbers", "-c", "1000", "--seed", "5", "--format", "text"]
+    result = runner.invoke(click_app, args)
+    assert result.exit_code == 0
+    values = [int(line) for line in result.stdout.splitlines()]
+    assert len(values) == 1000
+    assert all(1 <= value <= 100 for value in values)
+    assert f"最大值: {max(values)}" in result.stderr
+    assert runner.invoke(click_app, args).stdout == result.stdout
+
+    sorted_result = runner.invoke(click_app, [*args, "--sort"])
+    assert sorted_result.stdout.splitlines() == [str(v) for v in sorted(values)]
+
+
+def test_click_random_numbers_list_output():
+    """測試預設的編號清單格式也會寫入 --output 指定的檔案"""
+    runner = ClickCliRunner()
+    args = ["random-numbers", "-c", "3", "--seed", "1"]
+    with runner.isolated_filesystem():
+        result = runner.invoke(click_app, [*args, "-o", "out.txt"])
+        assert result.exit_code == 0
+        assert "結果已儲存至: out.txt" in result.output
+        with open("out.txt", encoding="utf-8") as f:
+            content = f.read()
+        assert content.startswith("生成 3 個隨機數字 (範圍: 1-100):\n")
+        assert "   1. " not in result.output
+        # 檔案內容與輸出到終端機的清單相同
+        printed = runner.invoke(click_app, args).output
+        assert printed.startswith(content)
+
+
+def test_click_random_numbers_no_print():
+    """測試 --no-print 只輸出統計 (標準差與百分位數)"""
+    runner = ClickCliRunner()
+    args = ["random-numbers", "-c", "20000", "--seed", "1", "--no-print", "--sort"]
+    result = runner.invoke(click_app, args)
+    assert result.exit_code == 0
+    assert "生成" not in result.stdout
+    assert "標準差:" in result.stdout
+    assert "p50=" in result.stdout and "p99=" in result.stdout
+    assert result.stderr == ""
+
+    result = runner.invoke(click_app, [*args, "-o", "out.bin"])
+    assert result.exit_code != 0
+    assert "--no-print" in result.stderr
+
+
+def test_greet_flush_every():
+    """測試 --flush-every 不改變輸出內容"""
+    runner = ClickCliRunner()
+    result = runner.invoke(
+        click_app, ["greet", "Alice", "-c", "5", "--flush-every", "2"]
+    )
+    assert result.exit_code == 0
+    assert result.output == "你好, Alice!\n" * 5
+    result = runner.invoke(click_app, ["greet", "Alice", "--flush-every", "0"])
+    assert result.exit_code != 0
+
+    runner = TyperCliRunner()
+    result = runner.invoke(typer_app, ["greet", "Bob", "-c", "3", "--flush-every", "1"])
+    assert result.exit_code == 0
+    assert result.output == "你好, Bob!\n" * 3
+
+
+def test_click_greet_mom_count():
+    """測試 greet-mom 重複輸出兩行問候"""
+    runner = ClickCliRunner()
+    result = runner.invoke(click_app, ["greet-mom", "A", "B", "-c", "3", "-p"])
+    assert result.exit_code == 0
+    assert result.output == "您好, A!\n您好, B!\n" * 3
+
+
+def test_greet_all_names_file():
+    """測試從檔案與標準輸入讀取人名與問候詞，並以 --dry-run 估計輸出大小"""
+    runner = ClickCliRunner()
+    with runner.isolated_filesystem():
+        with open("names.txt", "w", encoding="utf-8") as f:
+            f.write("Alice\n\n  Bob \n")
+        args = ["greet-all", "Carol", "女士", "-g", "你好", "--names-file"]
+        result = runner.invoke(click_app, [*args, "names.txt"])
+        assert result.exit_code == 0
+        lines = result.output.split("===== 問候結果 =====\n")[1]
+        assert (
+            lines
+            == ">>> 你好, 女士 Carol!\n>>> 你好, 女士 Alice!\n>>> 你好, 女士 Bob!\n"
+        )
+
+        result = runner.invoke(click_app, [*args, "-", "--dry-run"], input="Dan\n")
+        assert result.exit_code == 0
+        assert "問候結果" not in result.output
+        expected = ">>> 你好, 女士 Carol!\n>>> 你好, 女士 Dan!\n".encode()
+        assert f"將輸出 2 行，共 {len(expected)} 位元組" in result.output
+
+        result = TyperCliRunner().invoke(
+            typer_app,
+            ["greet-all", "--greetings-file", "-", "--names-file", "names.txt"],
+            input="嗨\n哈囉\n",
+        )
+        assert result.exit_code == 0
+        assert result.stdout.endswith(
+            ">>> 嗨, 先生/小姐 Alice!\n>>> 哈囉, 先生/小姐 Alice!\n"
+            ">>> 嗨, 先生/小姐 Bob!\n>>> 哈囉, 先生/小姐 Bob!\n"
+        )
+
+        result = runner.invoke(
+            click_app, [*args, "-", "--greetings-file", "-"], input="x\n"
+        )
+        assert result.exit_code != 0
+
+
+def test_typer_greet_all_without_greeting():
+    """測試 Typer 沒有指定問候詞時不會出錯，只是沒有問候結果"""
+    runner = TyperCliRunner()
+    result = runner.invoke(typer_app, ["greet-all", ">>> ", "Alice"])
+    assert result.exit_code == 0
+    assert result.stdout.endswith("===== 問候結果 =====\n")
+    result = runner.invoke(typer_app, ["greet-all"])
+    assert result.exit_code != 0
+
+
+def test_click_count_words_files_and_stdin():
+    """測試 Click 計算多個檔案與標準輸入的字數與行數"""
+    runner = ClickCliRunner()
+    with runner.isolated_filesystem():
+        with open("a.txt", "w", encoding="utf-8") as f:
+            f.write("你好 世界\nhello world\n")
+        args = ["count-words", "-f", "a.txt", "-f", "-", "-c", "-l", "-j", "2"]
+        result = runner.invoke(click_app, args, input="one two three")
+        assert result.exit_code == 0
+        assert "a.txt: 字數 4，字元數 18，行數 2" in result.output
+        assert "-: 字數 3，字元數 13，行數 1" in result.output
+        assert result.output.endswith("字數: 7\n字元數: 31\n行數: 3\n")
+
+        result = runner.invoke(click_app, ["count-words", "a b\nc", "--lines"])
+        assert result.output == "字數: 3\n行數: 2\n"
+
+
+def test_count_words_missing_file():
+    """測試兩個版本都把不存在的檔案當作用法錯誤，- 仍然可以使用"""
+    for app, runner in [(click_app, ClickCliRunner()), (typer_app, TyperCliRunner())]:
+        result = runner.invoke(app, ["count-words", "-f", "missing.txt"])
+        assert result.exit_code == 2
+        assert "missing.txt" in result.output
+        result = runner.invoke(app, ["count-words", "-f", "-"], input="a b")
+        assert result.exit_code == 0
+
+
+def test_count_words_top():
+    """測試 --top 以 JSON 輸出詞頻，總字數與 count-words 一致"""
+    runner = TyperCliRunner()
+    result = runner.invoke(typer_app, ["count-words", "b a b c b a", "--top", "2"])
+    assert result.exit_code == 0
+    assert json.loads(result.stdout) == {
+        "總字數": 6,
+        "不同單字數": 3,
+        "最常見單字": [{"單字": "b", "次數": 3}, {"單字": "a", "次數": 2}],
+    }
+
+    runner = ClickCliRunner()
+    with runner.isolated_filesystem():
+        with open("a.txt", "w", encoding="utf-8") as f:
+            f.write("貓 狗\n貓")
+        args = ["count-words", "-f", "a.txt", "-f", "-", "--top", "1", "-j", "2"]
+        result = runner.invoke(click_app, args, input="狗 狗")
+        assert result.exit_code == 0
+        report = json.loads(result.output)
+        assert report["總字數"] == 5
+        assert report["最常見單字"] == [{"單字": "狗", "次數": 3}]
+
+
+def test_click_list_items_files():
+    """測試 Click 從檔案與標準輸入讀取項目，CSV 正確加上引號"""
+    runner = ClickCliRunner()
+    with runner.isolated_filesystem():
+        with open("items.txt", "w", encoding="utf-8") as f:
+            f.write("b,c\nd\n")
+        args = ["list-items", "a", "-i", "items.txt", "-i", "-", "-f", "csv"]
+        result = runner.invoke(click_app, args, input="e\n")
+        assert result.exit_code == 0
+        assert result.output == 'a,"b,c",d,e\n'
+
+        result = runner.invoke(click_app, ["list-items", "-i", "items.txt"])
+        assert result.output == "- b,c\n- d\n"
+        assert runner.invoke(click_app, ["list-items"]).exit_code != 0
+
+
+def test_compact_json():
+    """測試 --compact 輸出單行 JSON，內容與縮排的輸出相同"""
+    runner = ClickCliRunner()
+    result = runner.invoke(click_app, ["list-items", "-f", "json", "--compact", "a"])
+    assert result.output == '["a"]\n'
+
+    with runner.isolated_filesystem():
+        with open("a.py", "w", encoding="utf-8") as f:
+            f.write("x = 1\n")
+        args = ["generate-report", ".", "--format", "json", "--no-cache"]
+        for app, app_runner in [(click_app, runner), (typer_app, TyperCliRunner())]:
+            indented = json.loads(app_runner.invoke(app, args).output)
+            compact = app_runner.invoke(app, [*args, "--compact"])
+            assert compact.exit_code == 0
+            assert compact.output.count("\n") == 1
+            report = json.loads(compact.output)
+            # 兩次執行的生成時間可能跨秒
+            del report["生成時間"], indented["生成時間"]
+            assert report == indented
+
+    result = TyperCliRunner().invoke(
+        typer_app, ["count-words", "b a b", "--top", "1", "--compact"]
+    )
+    assert result.stdout == (
+        '{"總字數":3,"不同單字數":2,"最常見單字":[{"單字":"b","次數":2}]}\n'
+    )
+
+
+def test_generate_report_columnar():
+    """測試 generate-report 的 binary 與 csv 輸出與 JSON 報告的數值相同"""
+    from learn_cli import columnar
+
+    runner = ClickCliRunner()
+    with runner.isolated_filesystem():
+        for name, text in [("a.py", "x = 1\n"), ("b.py", "1\n2\n3")]:
+            with open(name, "w", encoding="utf-8") as f:
+                f.write(text)
+        args = ["generate-report", ".", "--no-cache", "--format"]
+        report = json.loads(runner.invoke(click_app, [*args, "json"]).output)
+        expected = [
+            (info["路徑"], info["大小(bytes)"], info["行數"])
+            for info in report["檔案詳情"]
+        ]
+
+        result = runner.invoke(click_app, [*args, "binary"])
+        assert result.exit_code == 0
+        records = list(columnar.read_binary(result.stdout_bytes))
+        assert [(r.path, r.size, r.lines) for r in records] == expected
+        assert records[0].mtime_ns == os.stat(records[0].path).st_mtime_ns
+
+        result = TyperCliRunner().invoke(typer_app, [*args, "csv"])
+        assert result.exit_code == 0
+        rows = result.stdout.splitlines()
+        assert rows[0] == "path,name,size,lines,mtime"
+        assert len(rows) == len(expected) + 1
@@ -0,0 +1,93 @@
+"""
+測試 generate-report 的欄位式輸出
+"""
+
+import csv
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+current_dir = Path(__file__).parent
+src_path = current_dir.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from learn_cli import columnar, compat, engine  # noqa: E402
+
+RECORDS = [
+    engine.FileRecord("src/a.py", "a.py", 12, 3, 1_700_000_000_123_456_789),
+    engine.FileRecord('資料/檔案 1,"b".txt', '檔案 1,"b".txt', 1 << 40, 0, 0),
+    engine.FileRecord("/tmp/c", "c", 0, 1, -1),
+]
+
+
+def write(records, output_format):
+    stream = io.BytesIO()
+    rows = columnar.write_report(iter(records), output_format, stream)
+    assert rows == len(records)
+    return stream.getvalue()
+
+
+@pytest.mark.parametrize("count", [0, 1, 7, 20])
+def test_binary_round_trip(monkeypatch, count):
+    """測試 binary 格式跨批寫出後可以逐筆讀回，字串區溢出到暫存檔也一樣"""
+    monkeypatch.setattr(columnar, "ROW_BATCH", 3)
+    monkeypatch.setattr(columnar, "SPOOL_SIZE", 16)
+    records = [RECORDS[i % len(RECORDS)] for i in range(count)]
+    data = write(records, "binary")
+    assert len(data) == (
+        count * columnar.RECORD.size
+        + sum(len(r.path.encode()) for r in records)
+        + columnar.TRAILER.size
+    )
+    assert list(columnar.read_binary(data)) == records
+
+    with pytest.raises(ValueError):
+        list(columnar.read_binary(data[:-1]))
+
+
+def test_binary_memory_map(tmp_path):
+    """測試 binary 格式可以直接記憶體映射讀取"""
+    path = tmp_path / "report.bin"
+    path.write_bytes(write(RECORDS, "binary"))
+    with engine.map_file(path) as mapped:
+        assert list(columnar.read_binary(mapped)) == RECORDS
+
+
+def test_csv_typed_columns():
+    """測試 CSV 的數值欄位為整數，修改時間為精確到奈秒的 UTC 時間"""
+    rows = list(csv.reader(io.StringIO(write(RECORDS, "csv").decode())))
+    assert rows[0] == list(columnar.COLUMNS)
+    assert rows[1] == ["src/a.py", "a.py", "12", "3", "2023-11-14T22:13:20.123456789Z"]
+    assert rows[2][:4] == [RECORDS[1].path, RECORDS[1].name, str(1 << 40), "0"]
+    assert rows[3][4] == "1969-12-31T23:59:59.999999999Z"
+
+
+@pytest.mark.parametrize("output_format", ["arrow", "parquet"])
+def test_arrow_formats(monkeypatch, output_format):
+    """測試 arrow 與 parquet 保留欄位型別 (沒有安裝 pyarrow 時略過)"""
+    pa = pytest.importorskip("pyarrow")
+    monkeypatch.setattr(columnar, "ROW_BATCH", 2)
+    data = write(RECORDS, output_format)
+    if output_format == "arrow":
+        table = pa.ipc.open_file(pa.BufferReader(data)).read_all()
+    else:
+        import pyarrow.parquet
+
+        table = pyarrow.parquet.read_table(pa.BufferReader(data))
+    assert table.schema.field("size").type == pa.int64()
+    assert table.schema.field("mtime").type == pa.timestamp("ns", tz="UTC")
+    assert table.column("mtime").cast(pa.int64()).to_pylist() == [
+        r.mtime_ns for r in RECORDS
+    ]
+    assert table.column("path").to_pylist() == [r.path for r in RECORDS]
+
+
+def test_arrow_without_pyarrow(monkeypatch):
+    """測試沒有安裝 pyarrow 時回報錯誤並建議改用其他格式"""
+    monkeypatch.setattr(compat, "load_pyarrow", lambda: None)
+    with pytest.raises(ValueError, match="binary"):
+        write(RECORDS, "parquet")
+    with pytest.raises(ValueError, match="不支援"):
+        write(RECORDS, "xml")
@@ -0,0 +1,467 @@
+"""
+測試 Click 與 Typer 共用的文字處理引擎
+"""
+
+import io
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加 src 目錄到 Python 路徑
+current_dir = Path(__file__).parent
+src_path = current_dir.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from learn_cli import engine  # noqa: E402
+
+
+def _reference_process(content, uppercase, line_numbers):
+    """原本一次讀入整個檔案的處理方式"""
+    processed_lines = []
+    for i, line in enumerate(content.splitlines(), 1):
+        processed_line = line.upper() if uppercase else line
+        if line_numbers:
+            processed_line = f"{i:3}: {processed_line}"
+        processed_lines.append(processed_line)
+    return "\n".join(processed_lines)
+
+
+def _split_bytes(data, size):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def test_process_lines_matches_splitlines():
+    """測試串流處理與整檔處理的結果完全相同 (包含區塊邊界與結尾換行)"""
+    samples = [
+        "",
+        "\n",
+        "\n\n",
+        "single",
+        "a\nb\n",
+        "a\nb",
+        "crlf\r\nline\rmac\r\n",
+        "héllo wörld\nstraße\x0cnext line\n\nlast line without newline",
+    ]
+    for content in samples:
+        for chunk_size in (1, 2, 3, 7, 1 << 20):
+            for uppercase in (False, True):
+                for line_numbers in (False, True):
+                    result = "".join(
+                        engine.run_pipeline(
+                            _split_bytes(content.encode("utf-8"), chunk_size),
+                            engine.decode("utf-8"),
+                            engine.process_lines(
+                                uppercase=uppercase, line_numbers=line_numbers
+                            ),
+                        )
+                    )
+                    assert result == _reference_process(
+                        content, uppercase, line_numbers
+                    )
+
+
+def test_replace_text_counts():
+    """測試搜尋替換回傳新內容與替換次數"""
+    assert engine.replace_text("aXa xa", "a", "b") == ("bXb xb", 3)
+    assert engine.replace_text("Hello hello", "HELLO", "hi", case_sensitive=False) == (
+        "hi hi",
+        2,
+    )
+
+
+def test_split_at_safe_points_matches_whole_text_replace():
+    """測試分塊替換與整份文字一次替換的結果與次數完全相同"""
+    rng = random.Random(0)
+    cases = [("aa", True), ("aba", True), ("AB", False), ("x", True), ("abab", False)]
+    for search_term, case_sensitive in cases:
+        for _ in range(50):
+            content = "".join(rng.choice("abABx\n") for _ in range(rng.randint(0, 80)))
+            expected = engine.replace_text(
+                content, search_term, "<>", case_sensitive=case_sensitive
+            )
+            for chunk_size in (1, 2, 5, 16):
+                texts = [content[i : i + 3] for i in range(0, len(content), 3)]
+                chunks = list(
+                    engine.split_at_safe_points(
+                        texts,
+                        search_term,
+                        case_sensitive=case_sensitive,
+                        chunk_size=chunk_size,
+                    )
+                )
+                assert "".join(chunks) == content
+                results = [
+                    engine.replace_text(
+                        chunk, search_term, "<>", case_sensitive=case_sensitive
+                    )
+                    for chunk in chunks
+                ]
+                assert "".join(text for text, _ in results) == expected[0]
+                assert sum(count for _, count in results) == expected[1]
+
+
+def test_split_at_safe_points_dense_overlapping_matches():
+    """測試符合項密集重疊時仍會逐塊切分，結果與一次替換相同"""
+    cases = [("a" * 5000, "aa", True), ("Ab" * 2500 + "A", "aBa", False)]
+    for content, search_term, case_sensitive in cases:
+        texts = [content[i : i + 7] for i in range(0, len(content), 7)]
+        chunks = list(
+            engine.split_at_safe_points(
+                texts, search_term, case_sensitive=case_sensitive, chunk_size=64
+            )
+        )
+        assert "".join(chunks) == content
+        # 不會因為找不到切點而把整份文字累積成一塊
+        assert max(map(len, chunks)) < 64 + 2 * 7
+        results = [
+            engine.replace_text(chunk, search_term, "<>", case_sensitive=case_sensitive)
+            for chunk in chunks
+        ]
+        expected = engine.replace_text(
+            content, search_term, "<>", case_sensitive=case_sensitive
+        )
+        assert "".join(text for text, _ in results) == expected[0]
+        assert sum(count for _, count in results) == expected[1]
+
+
+def test_search_replace_file_parallel(tmp_path):
+    """測試以多個行程分塊替換檔案"""
+    path = tmp_path / "big.txt"
+    path.write_text("Hello world\n" * 5000, encoding="utf-8")
+
+    result = engine.search_replace_file(
+        path, "hello", "Hi", case_sensitive=False, jobs=2, chunk_size=1000
+    )
+    assert "".join(result) == "Hi world\n" * 5000
+    assert result.count == 5000
+
+
+def test_replace_rules_leftmost_longest():
+    """測試多規則替換採最左最長語意，且替換後的文字不再被比對"""
+    rules = engine.ReplaceRules([("he", "X"), ("hello", "Y"), ("lo", "he"), ("o", "0")])
+    assert rules.replace("hello helo oh") == ("Y Xhe 0h", [1, 1, 1, 1])
+
+    ignore_case = engine.ReplaceRules([("abc", "1"), ("AB", "2")], case_sensitive=False)
+    assert ignore_case.replace("ABCab aBx") == ("12 2x", [1, 2])
+
+
+def test_replace_rules_chunks_match_whole_text(tmp_path):
+    """測試多規則分塊替換與整份文字一次替換的結果完全相同"""
+    rng = random.Random(1)
+    rules = engine.ReplaceRules([("ab", "1"), ("aba", "2"), ("b", "3"), ("bbab", "4")])
+    content = "".join(rng.choice("ab\n") for _ in range(3000))
+    path = tmp_path / "rules.txt"
+    path.write_text(content, encoding="utf-8")
+
+    for jobs in (1, 2):
+        result = engine.search_replace_rules_file(path, rules, jobs=jobs, chunk_size=7)
+        assert ("".join(result), result.counts) == rules.replace(content)
+
+
+def test_load_rules(tmp_path):
+    """測試讀取 TSV 與 JSON 規則檔"""
+    tsv = tmp_path / "rules.tsv"
+    tsv.write_text("# 註解\nfoo\tbar\n\na b\t\n", encoding="utf-8")
+    assert engine.load_rules(tsv) == [("foo", "bar"), ("a b", "")]
+
+    json_file = tmp_path / "rules.json"
+    json_file.write_text('{"foo": "bar", "貓": "狗"}', encoding="utf-8")
+    assert engine.load_rules(json_file) == [("foo", "bar"), ("貓", "狗")]
+
+
+def test_search_replace_output(tmp_path):
+    """測試 search-replace 的輸出：替換結果走 stdout，統計訊息走 stderr"""
+    path = tmp_path / "a.txt"
+    path.write_text("foo bar foo\n", encoding="utf-8")
+    rules = tmp_path / "rules.tsv"
+    rules.write_text("foo\tX\nbar\tY\n", encoding="utf-8")
+
+    assert list(engine.search_replace_output(path, "foo", "Z")) == [
+        ("Z bar Z\n", False),
+        ("\n", False),
+        ("\n已替換 2 處\n", True),
+    ]
+    assert list(
+        engine.search_replace_output(
+            path, None, None, rules_path=rules, count_only=True
+        )
+    ) == [
+        ("找到 3 處\n", False),
+        ("  foo → X: 2 處\n", False),
+        ("  bar → Y: 1 處\n", False),
+    ]
+
+    with pytest.raises(ValueError, match="需要搜尋與替換文字"):
+        list(engine.search_replace_output(path, "foo", None))
+    with pytest.raises(ValueError, match="不能再指定"):
+        list(engine.search_replace_output(path, "foo", "Z", rules_path=rules))
+    with pytest.raises(FileNotFoundError, match="找不到檔案"):
+        list(engine.search_replace_output(tmp_path / "missing.txt", "foo", "Z"))
+
+
+def test_count_utf8_blocks_match_str_split():
+    """測試直接在 UTF-8 位元組上計數與 str.split() / len() 的結果相同"""
+    rng = random.Random(2)
+    alphabet = "ab 字\t\n\x1c\x85\xa0　 é🙂"
+    for _ in range(200):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        data = text.encode("utf-8")
+        for size in (1, 2, 5, 64):
+            result = engine.count_stream(io.BytesIO(data), chunk_size=size)
+            assert result == expected_text_count(text)
+
+
+def expected_text_count(text):
+    data = text.encode("utf-8")
+    return engine.TextCount(
+        lines=len(text.splitlines()),
+        words=len(text.split()),
+        chars=len(text),
+        size=len(data),
+    )
+
+
+def test_count_stream_chunk_boundaries():
+    """測試串流讀取時，跨越區塊的單字、\r\n 與多位元組字元都只算一次"""
+    rng = random.Random(3)
+    alphabet = "ab 字\t\r\n\x1c\x85\u2028　é🙂"
+    for _ in range(200):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        data = text.encode("utf-8")
+        for size in (1, 2, 3, 7):
+            chunks = list(engine.utf8_chunks(io.BytesIO(data), chunk_size=size))
+            assert b"".join(chunks) == data
+            assert all(chunk.decode("utf-8") for chunk in chunks)
+            count = engine.count_stream(io.BytesIO(data), chunk_size=size)
+            assert count == expected_text_count(text)
+        assert engine.count_text(text) == expected_text_count(text)
+
+
+def test_count_files_parallel_segments(tmp_path):
+    """測試把檔案切成片段平行計算的結果與整個計算相同，- 讀取標準輸入"""
+    rng = random.Random(4)
+    texts = [
+        "".join(rng.choice("ab 字\r\n🙂") for _ in range(rng.randint(0, 3000)))
+        for _ in range(4)
+    ]
+    paths = []
+    for i, text in enumerate(texts):
+        path = tmp_path / f"{i}.txt"
+        path.write_bytes(text.encode("utf-8"))
+        paths.append(path)
+    paths.insert(2, Path("-"))
+    stdin = io.BytesIO("從 標準輸入\n".encode())
+
+    for jobs in (1, 2):
+        stdin.seek(0)
+        results = list(
+            engine.count_files(paths, jobs=jobs, stdin=stdin, segment_size=101)
+        )
+        assert [path for path, _ in results] == paths
+        counts = [count for _, count in results]
+        assert counts.pop(2) == expected_text_count("從 標準輸入\n")
+        assert counts == [expected_text_count(text) for text in texts]
+
+
+def test_count_files_segment_at_multibyte_end(tmp_path):
+    """測試多位元組字元跨越最後一個片段的切點時不會被切開"""
+    for i, text in enumerate(["\x85", "a\u2028", "字\u3000", "b 🙂", "\u3000\n"]):
+        path = tmp_path / f"{i}.txt"
+        path.write_bytes(text.encode("utf-8"))
+        for segment_size in (1, 2, 3):
+            [(_, count)] = engine.count_files([path], segment_size=segment_size)
+            assert count == expected_text_count(text)
+
+
+def test_count_matches_mmap_matches_decoded_count(tmp_path):
+    """測試以記憶體映射計數與解碼後計數的結果相同"""
+    path = tmp_path / "text.txt"
+    path.write_text("Kiss KISS kiß Kıſs İS\r\nmiss\n", encoding="utf-8")
+    content = engine.read_text(path)
+
+    for search_term in ("ss", "KI", "is", "ß", "s\n", "miss"):
+        for case_sensitive in (True, False):
+            expected = engine.replace_text(
+                content, search_term, "", case_sensitive=case_sensitive
+            )[1]
+            assert (
+                engine.count_matches(path, search_term, case_sensitive=case_sensitive)
+                == expected
+            )
+
+    empty = tmp_path / "empty.txt"
+    empty.write_bytes(b"")
+    assert engine.count_matches(empty, "a") == 0
+    [(_, count)] = engine.count_files([empty])
+    assert count == engine.TextCount(lines=0, words=0, chars=0, size=0)
+
+
+def test_word_count_scan_totals(tmp_path):
+    """測試字數計算的逐檔結果與總計"""
+    a = tmp_path / "a.txt"
+    a.write_text("one two\n", encoding="utf-8")
+    b = tmp_path / "b.txt"
+    b.write_text("三 四 五\n六\n", encoding="utf-8")
+
+    scan = engine.WordCountScan(None, [a, b])
+    assert list(engine.format_word_counts(scan, lines=True)) == [
+        f"{a}: 字數 2，行數 1",
+        f"{b}: 字數 4，行數 2",
+        "字數: 6",
+        "行數: 3",
+    ]
+    assert scan.total == engine.TextCount(lines=3, words=6, chars=16, size=24)
+
+    text_scan = engine.WordCountScan("hello world", [])
+    assert list(engine.format_word_counts(text_scan, chars=True)) == [
+        "字數: 2",
+        "字元數: 11",
+    ]
+
+
+def test_report_scan_parallel_matches_serial(tmp_path, monkeypatch):
+    """測試平行生成的報告與逐一處理的結果完全相同 (包含警告順序)"""
+    monkeypatch.setattr(engine, "REPORT_BATCH_SIZE", 4)
+    for i in range(40):
+        (tmp_path / f"f{i:02}.txt").write_text("line\n" * i, encoding="utf-8")
+    (tmp_path / "bad.txt").mkdir()
+
+    def report(**kwargs):
+        errors = []
+        data = engine.ReportScan(
+            tmp_path,
+            "*.txt",
+            on_error=lambda path, e: errors.append(path),
+            **kwargs,
+        ).report()
+        del data["生成時間"]
+        return data, errors
+
+    serial = report()
+    assert len(serial[1]) == 1
+    for executor in ("thread", "process"):
+        assert report(jobs=3, executor=executor) == serial
+
+
+def test_report_scan_line_cache(tmp_path):
+    """測試行數快取：未變更的檔案不重新讀取，已刪除的檔案紀錄會被清除"""
+    from learn_cli.cache import LineCountCache
+
+    cache_path = tmp_path / "cache" / "lines.sqlite3"
+    directory = tmp_path / "src"
+    directory.mkdir()
+    old = directory / "old.txt"
+    old.write_text("a\nb\n", encoding="utf-8")
+    gone = directory / "gone.txt"
+    gone.write_text("x\n", encoding="utf-8")
+    for path in (old, gone):
+        # 讓修改時間早於快取的時間刻度保護範圍
+        os.utime(path, ns=(0, 1_000_000_000))
+
+    first = engine.ReportScan(directory, "*.txt", cache_path=cache_path).report()
+    with LineCountCache(cache_path) as cache:
+        assert len(cache.load(directory)) == 2
+
+    # 內容換掉但大小與修改時間不變：使用快取的行數
+    old.write_text("abc\n", encoding="utf-8")
+    os.utime(old, ns=(0, 1_000_000_000))
+    gone.unlink()
+    second = engine.ReportScan(directory, "*.txt", cache_path=cache_path).report()
+    assert second["總行數"] == first["總行數"] - 1
+    with LineCountCache(cache_path) as cache:
+        assert list(cache.load(directory)) == [os.path.abspath(old)]
+
+    rebuilt = engine.ReportScan(
+        directory, "*.txt", cache_path=cache_path, rebuild_cache=True
+    ).report()
+    assert rebuilt["總行數"] == 1
+
+
+def test_report_scan_line_cache_parent_pattern(tmp_path):
+    """測試含 .. 的檔案模式也能命中快取"""
+    cache_path = tmp_path / "cache" / "lines.sqlite3"
+    directory = tmp_path / "work"
+    directory.mkdir()
+    data = tmp_path / "data"
+    data.mkdir()
+    path = data / "a.txt"
+    path.write_text("a\nb\n", encoding="utf-8")
+    os.utime(path, ns=(0, 1_000_000_000))
+
+    first = engine.ReportScan(directory, "../data/*.txt", cache_path=cache_path)
+    assert first.report()["總行數"] == 2
+
+    # 大小與修改時間不變：命中快取就不會讀到新內容
+    path.write_text("abc\n", encoding="utf-8")
+    os.utime(path, ns=(0, 1_000_000_000))
+    second = engine.ReportScan(directory, "../data/*.txt", cache_path=cache_path)
+    assert second.report()["總行數"] == 2
+
+
+def test_report_scan_closes_cache_when_abandoned(tmp_path, monkeypatch):
+    """測試中途放棄迭代時快取連線也會關閉"""
+    from learn_cli.cache import LineCountCache
+
+    closed = []
+    close = LineCountCache.close
+
+    def record_close(self):
+        closed.append(self)
+        close(self)
+
+    monkeypatch.setattr(LineCountCache, "close", record_close)
+    for name in ("a.txt", "b.txt"):
+        (tmp_path / name).write_text("x\n", encoding="utf-8")
+
+    scan = iter(
+        engine.ReportScan(tmp_path, "*.txt", cache_path=tmp_path / "lines.sqlite3")
+    )
+    next(scan)
+    assert closed == []
+    scan.close()
+    assert len(closed) == 1
+
+
+def test_count_lines_matches_splitlines(tmp_path):
+    """測試位元組層級的行數與 len(read_text().splitlines()) 相同"""
+    rng = random.Random(3)
+    alphabet = [
+        "a",
+        "字",
+        "\n",
+        "\r",
+        "\r\n",
+        "\x0b",
+        "\x1e",
+        "\x85",
+        "\u2028",
+        "\u2029",
+    ]
+    path = tmp_path / "lines.txt"
+    for _ in range(200):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        path.write_bytes(text.encode("utf-8"))
+        expected = len(path.read_text(encoding="utf-8").splitlines())
+        for chunk_size in (1, 2, 3, 1 << 20):
+            assert engine.count_lines(path, chunk_size) == expected
+
+    path.write_bytes("café\nnaïve".encode("latin-1"))
+    assert engine.count_lines(path) == 2
+
+
+class EOFStream(io.StringIO):
+    """像 CliRunner 的輸入串流一樣，迭代到結尾時丟出 EOFError"""
+
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise EOFError
+        return line
+
+
+def test_read_lines_stops_at_eof():
+    """測試 read_lines 以 readline 讀到結尾，不會丟出 EOFError"""
+    assert list(engine.read_lines(EOFStream("a\n\nb"))) == ["a\n", "\n", "b"]
@@ -0,0 +1,59 @@
+"""
+測試 JSON 輸出的各個後端
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+current_dir = Path(__file__).parent
+src_path = current_dir.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from learn_cli import compat, jsonfmt  # noqa: E402
+
+REPORT = {
+    "生成時間": "2025-01-01 00:00:00",
+    "檔案數量": 2,
+    "檔案詳情": [
+        {"檔案名": 'a "b".py', "行數": 0, "大小(bytes)": 12},
+        {"檔案名": "é 🙂\n\t\\.txt", "行數": 3, "大小(bytes)": 1 << 40},
+    ],
+    "空": {"列表": [], "物件": {}},
+    "旗標": [True, False, None],
+}
+
+
+@pytest.fixture(params=["json", "orjson", "msgspec"])
+def backend(request, monkeypatch):
+    """分別以標準函式庫、orjson 與 msgspec 編碼 (沒有安裝時略過)"""
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(compat, "load_orjson", lambda: None)
+    if request.param == "msgspec":
+        pytest.importorskip("msgspec")
+    elif request.param == "json":
+        monkeypatch.setattr(compat, "load_msgspec_json", lambda: None)
+    assert jsonfmt.backend() == request.param
+    return request.param
+
+
+def test_dumps_matches_stdlib(backend):
+    """測試各後端的輸出與標準函式庫完全相同"""
+    assert jsonfmt.dumps(REPORT) == json.dumps(REPORT, ensure_ascii=False, indent=2)
+    assert jsonfmt.dumps(REPORT, compact=True) == json.dumps(
+        REPORT, ensure_ascii=False, separators=(",", ":")
+    )
+
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("count", [0, 1, 7, 50])
+def test_encode_array_matches_dumps(backend, count, compact):
+    """測試逐段產生的陣列與一次編碼整個列表相同"""
+    items = [REPORT["檔案詳情"][i % 2] for i in range(count)]
+    text = "".join(jsonfmt.encode_array(iter(items), compact=compact, batch_size=7))
+    assert text == jsonfmt.dumps(items, compact=compact)
+    assert json.loads(text) == items
@@ -0,0 +1,42 @@
+"""
+測試 list-items 的逐段編碼
+"""
+
+import csv
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+current_dir = Path(__file__).parent
+src_path = current_dir.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from learn_cli import listing  # noqa: E402
+
+ITEMS = ["項目1", 'a,"b"', "", "line\nbreak", "é 🙂", "x"]
+
+
+@pytest.mark.parametrize("count", [0, 1, 5, 3000])
+def test_encode_json_matches_dumps(monkeypatch, count):
+    """測試逐段產生的 JSON 與一次 json.dumps 完全相同"""
+    monkeypatch.setattr(listing, "ENCODE_BATCH", 7)
+    items = [ITEMS[i % len(ITEMS)] for i in range(count)]
+    text = "".join(listing.encode_json(iter(items)))
+    assert text == json.dumps(items, ensure_ascii=False, indent=2)
+
+
+def test_encode_csv_quoting(monkeypatch):
+    """測試 CSV 以 csv 模組加上引號，逗號與換行不會切開項目"""
+    monkeypatch.setattr(listing, "ENCODE_BATCH", 4)
+    text = "".join(listing.encode_csv(iter(ITEMS)))
+    assert next(csv.reader(io.StringIO(text))) == ITEMS
+
+
+def test_read_items():
+    """測試逐行讀取項目並略過空行"""
+    stream = io.StringIO("a\r\n\n b \nc")
+    assert list(listing.read_items(stream)) == ["a", " b ", "c"]
+    assert "".join(listing.encode_text(listing.read_items(io.StringIO("")))) == ""
@@ -0,0 +1,92 @@
+"""
+測試緩衝輸出
+"""
+
+import io
+import sys
+from pathlib import Path
+
+current_dir = Path(__file__).parent
+src_path = current_dir.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from learn_cli.output import LineBuffer  # noqa: E402
+
+
+class CountingStream(io.StringIO):
+    """記錄 write 與 flush 次數的文字串流"""
+
+    def __init__(self, tty=False):
+        super().__init__()
+        self.tty = tty
+        self.writes = 0
+        self.flushes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+    def flush(self):
+        self.flushes += 1
+
+    def isatty(self):
+        return self.tty
+
+
+def test_line_buffer_batches_writes():
+    """測試輸出累積到指定大小才寫入，離開時寫出剩下的內容"""
+    stream = CountingStream()
+    with LineBuffer(stream, size=100) as out:
+        for i in range(50):
+            out.line(f"line {i}")
+        assert 0 < stream.writes < 10
+    assert stream.getvalue() == "".join(f"line {i}\n" for i in range(50))
+    assert stream.flushes == 1
+
+
+def test_line_buffer_flush_every():
+    """測試 --flush-every 每 N 行 flush 一次，終端機預設逐行 flush"""
+    stream = CountingStream()
+    with LineBuffer(stream, flush_every=3) as out:
+        for i in range(7):
+            out.line(str(i))
+        assert stream.flushes == 2
+        out.write("a\nb\nc\n")
+        assert stream.flushes == 3
+
+    tty = CountingStream(tty=True)
+    with LineBuffer(tty) as out:
+        out.line("x")
+        assert tty.getvalue() == "x\n"
+        out.write("partial")
+        assert tty.getvalue() == "x\n"
+    assert tty.getvalue() == "x\npartial"
+
+
+def test_line_buffer_flushes_on_error():
+    """測試發生例外時已寫入的內容仍然輸出"""
+    stream = CountingStream()
+    try:
+        with LineBuffer(stream) as out:
+            out.line("before")
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert stream.getvalue() == "before\n"
+
+
+def test_line_buffer_repeat():
+    """測試重複寫入的內容正確，並以大區塊寫入"""
+    stream = CountingStream()
+    with LineBuffer(stream, size=1000) as out:
+        out.line("head")
+        out.repeat("ab\n", 10_001)
+        out.repeat("x\n", 0)
+    assert stream.getvalue() == "head\n" + "ab\n" * 10_001
+    assert stream.writes < 40
+
+    stream = CountingStream()
+    with LineBuffer(stream, flush_every=4) as out:
+        out.repeat("a\nb\n", 5)
+        assert stream.getvalue() == "a\nb\n" * 4
+    assert stream.getvalue() == "a\nb\n" * 5
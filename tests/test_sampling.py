@@ -0,0 +1,186 @@
+"""
+測試大量隨機整數與串流統計
+"""
+
+import ast
+import random
+import statistics
+import sys
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+
+import pytest
+
+current_dir = Path(__file__).parent
+src_path = current_dir.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from learn_cli import compat, sampling, stats  # noqa: E402
+
+
+@pytest.fixture(params=["array", "numpy"])
+def backend(request, monkeypatch):
+    """分別以 array 與 NumPy 轉換 (沒有安裝 NumPy 時略過)"""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(compat, "load_numpy", lambda: None)
+    return request.param
+
+
+def draw(count, low, high, **options):
+    blocks = sampling.random_blocks(count, low, high, block_size=100, **options)
+    return [value for block in blocks for value in list(block)]
+
+
+@pytest.mark.parametrize(
+    "low, high",
+    [(1, 6), (-5, 5), (0, 255), (0, 256), (-(1 << 40), 1 << 40), (0, 10**20)],
+)
+def test_random_blocks_range(backend, low, high):
+    """測試數量正確、都在範圍內，且同一個種子產生同樣的數列"""
+    values = draw(1000, low, high, generator="fast", seed=7)
+    assert len(values) == 1000
+    assert all(low <= value <= high for value in values)
+    assert values == draw(1000, low, high, generator="fast", seed=7)
+    assert values != draw(1000, low, high, generator="fast", seed=8)
+
+
+def test_random_blocks_backends_agree(monkeypatch):
+    """測試同一個種子在有沒有 NumPy 時產生完全相同的數列"""
+    pytest.importorskip("numpy")
+    with_numpy = draw(5000, -1000, 123456, generator="fast", seed=3)
+    monkeypatch.setattr(compat, "load_numpy", lambda: None)
+    assert draw(5000, -1000, 123456, generator="fast", seed=3) == with_numpy
+
+
+def test_random_blocks_uniform():
+    """測試小範圍的每個值都大致平均地出現 (拒絕取樣沒有偏差)"""
+    values = draw(60000, 1, 6, generator="fast", seed=1)
+    counts = [values.count(face) for face in range(1, 7)]
+    assert all(9000 < c < 11000 for c in counts)
+
+
+def test_random_blocks_invalid():
+    """測試參數錯誤在呼叫時就丟出 ValueError"""
+    with pytest.raises(ValueError):
+        sampling.random_blocks(3, 1, 10, generator="secure", seed=1)
+    with pytest.raises(ValueError):
+        sampling.random_blocks(3, 10, 1)
+
+
+def test_npy_header():
+    """測試 NPY 檔頭的格式與 64 位元組對齊"""
+    header = sampling.npy_header(12345)
+    assert header.startswith(b"\x93NUMPY\x01\x00")
+    assert len(header) % 64 == 0
+    length = int.from_bytes(header[8:10], "little")
+    assert len(header) == 10 + length
+    meta = ast.literal_eval(header[10:].decode("latin1"))
+    assert meta == {"descr": "<i8", "fortran_order": False, "shape": (12345,)}
+
+
+def test_encode_blocks_binary(backend):
+    """測試 binary 與 npy 輸出為 little-endian int64"""
+    blocks = list(sampling.random_blocks(50, -3, 3, generator="fast", seed=2))
+    expected = [value for block in blocks for value in list(block)]
+    data = b"".join(sampling.encode_blocks(blocks, "npy", 50))
+    values = array("q", data[len(sampling.npy_header(50)) :])
+    if sys.byteorder == "big":
+        values.byteswap()
+    assert values.tolist() == expected
+
+
+def test_running_stats(backend):
+    """測試逐塊累加的統計與一次計算的結果相同"""
+    values = draw(1000, -50, 50, generator="fast", seed=4)
+    summary = stats.RunningStats()
+    for block in sampling.random_blocks(
+        1000, -50, 50, generator="fast", seed=4, block_size=100
+    ):
+        summary.update(block)
+    assert summary.count == len(values)
+    assert summary.total == sum(values)
+    assert (summary.minimum, summary.maximum) == (min(values), max(values))
+    assert summary.mean == pytest.approx(sum(values) / len(values))
+    assert stats.RunningStats().mean is None
+    assert stats.RunningStats().variance is None
+
+
+def test_running_stats_variance(backend):
+    """測試逐塊合併的變異數與一次計算相同，平均很大時也不失去精確度"""
+    low, high = 10**12, 10**12 + 1000
+    values = [int(v) for v in draw(3000, low, high, generator="fast", seed=9)]
+    summary = stats.RunningStats()
+    for block in sampling.random_blocks(
+        3000, low, high, generator="fast", seed=9, block_size=250
+    ):
+        summary.update(block)
+    assert summary.variance == pytest.approx(statistics.variance(values))
+    assert summary.stdev == pytest.approx(statistics.stdev(values))
+
+
+@pytest.mark.parametrize("q", [0.01, 0.1, 0.5, 0.9, 0.99])
+def test_tdigest_quantiles(q):
+    """測試 t-digest 的百分位數誤差 (以排名計) 在 0.5% 以內"""
+    rng = random.Random(0)
+    values = [rng.gauss(0, 1) for _ in range(100_000)]
+    digest = stats.TDigest()
+    for i in range(0, len(values), 4096):
+        digest.update(values[i : i + 4096])
+    ordered = sorted(values)
+    rank = bisect_left(ordered, digest.quantile(q)) / len(ordered)
+    assert rank == pytest.approx(q, abs=0.005)
+    assert len(digest._means) < 2 * digest.compression
+    assert digest.quantile(0) == ordered[0]
+    assert digest.quantile(1) == ordered[-1]
+
+
+def test_tdigest_small():
+    """測試資料很少時百分位數為精確值"""
+    digest = stats.TDigest()
+    assert digest.quantile(0.5) is None
+    digest.update([5, 1, 3])
+    assert digest.quantile(0.5) == 3
+    with pytest.raises(ValueError):
+        digest.quantile(1.5)
+
+
+@pytest.mark.parametrize(
+    "low, high, run_size",
+    [
+        (1, 6, 10_000),  # 計數排序
+        (-(1 << 40), 1 << 40, 10_000),  # 一段，記憶體中排序
+        (-(1 << 40), 1 << 40, 700),  # 外部合併排序
+        (0, 10**20, 700),  # 超過 int64 的範圍
+    ],
+)
+def test_sort_blocks(backend, low, high, run_size):
+    """測試三種排序方式的結果都與 sorted 相同，且逐塊輸出"""
+    values = draw(5000, low, high, generator="fast", seed=6)
+    blocks = sampling.random_blocks(
+        5000, low, high, generator="fast", seed=6, block_size=100
+    )
+    result = list(sampling.sort_blocks(blocks, low, high, run_size=run_size))
+    assert all(len(block) <= sampling.RANDOM_BLOCK for block in result)
+    assert [value for block in result for value in list(block)] == sorted(values)
+
+
+def test_sort_blocks_counting_block_size(backend):
+    """測試計數排序在同一個值大量重複時也依 block_size 分塊"""
+    blocks = sampling.random_blocks(1000, 0, 1, generator="fast", seed=1)
+    result = list(sampling.sort_blocks(blocks, 0, 1, block_size=300))
+    assert [len(block) for block in result] == [300, 300, 300, 100]
+    flat = [value for block in result for value in list(block)]
+    assert flat == sorted(flat) and set(flat) == {0, 1}
+    assert list(sampling.sort_blocks(iter(()), 0, 1)) == []
+
+
+def test_sort_blocks_multi_pass(monkeypatch):
+    """測試暫存檔超過 MERGE_FAN_IN 個時分多輪合併"""
+    monkeypatch.setattr(sampling, "MERGE_FAN_IN", 3)
+    values = draw(2000, 0, 10**9, generator="fast", seed=2)
+    blocks = sampling.random_blocks(2000, 0, 10**9, generator="fast", seed=2)
+    result = sampling.sort_blocks(blocks, 0, 10**9, run_size=150, block_size=64)
+    assert [value for block in result for value in list(block)] == sorted(values)
@@ -0,0 +1,111 @@
+"""
+測試常駐伺服器模式
+
+伺服器在背景執行緒中執行，用戶端把暫存檔的檔案描述符當作標準輸入輸出傳給它。
+"""
+
+import os
+import socket
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+current_dir = Path(__file__).parent
+src_path = current_dir.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from learn_cli.client import decode_request, encode_request, forward  # noqa: E402
+from learn_cli.server import CommandServer, remove_stale_socket  # noqa: E402
+
+
+@pytest.fixture
+def server(tmp_path):
+    socket_path = str(tmp_path / "cli.sock")
+    with CommandServer(socket_path) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield socket_path
+        server.shutdown()
+        thread.join()
+
+
+def call(socket_path, framework, args, tmp_path, stdin=b""):
+    """轉送一次命令，回傳 (結束代碼, stdout, stderr)"""
+    (tmp_path / "stdin").write_bytes(stdin)
+    with (
+        open(tmp_path / "stdin", "rb") as fin,
+        open(tmp_path / "stdout", "wb") as fout,
+        open(tmp_path / "stderr", "wb") as ferr,
+    ):
+        fds = (fin.fileno(), fout.fileno(), ferr.fileno())
+        code = forward(socket_path, framework, args, fds=fds)
+    return (
+        code,
+        (tmp_path / "stdout").read_text(encoding="utf-8"),
+        (tmp_path / "stderr").read_text(encoding="utf-8"),
+    )
+
+
+def test_forward_runs_both_frameworks(server, tmp_path):
+    """測試 Click 與 Typer 命令在伺服器中執行並取回輸出與結束代碼"""
+    assert call(server, "click", ["calc", "add", "2", "3"], tmp_path)[:2] == (
+        0,
+        "2.0 + 3.0 = 5.0\n",
+    )
+    assert call(server, "typer", ["calc", "mul", "4", "5"], tmp_path)[:2] == (
+        0,
+        "4.0 * 5.0 = 20.0\n",
+    )
+
+    code, _out, err = call(server, "click", ["calc", "div", "1", "0"], tmp_path)
+    assert code == 1
+    assert "除數不能為零" in err
+
+    code, _out, err = call(server, "click", ["no-such-command"], tmp_path)
+    assert code == 2
+    assert "No such command" in err
+
+
+def test_forward_uses_client_cwd_and_stdin(server, tmp_path, monkeypatch):
+    """測試相對路徑以用戶端的工作目錄解析，並能讀取用戶端的標準輸入"""
+    work = tmp_path / "work"
+    work.mkdir()
+    (work / "input.txt").write_text("abc\n", encoding="utf-8")
+    monkeypatch.chdir(work)
+
+    code, out, _err = call(server, "click", ["process-file", "input.txt", "-u"], work)
+    assert (code, out) == (0, "ABC\n")
+
+    code, out, _err = call(
+        server, "click", ["interactive-demo"], work, stdin=b"Bob\nn\n30\nn\n1\n"
+    )
+    assert code == 0
+    assert "姓名: Bob" in out
+    assert "喜歡的程式語言: Python" in out
+
+
+def test_request_round_trip():
+    """測試請求訊息的編碼與解碼 (含非 UTF-8 的路徑)"""
+    args = ["search-replace", "a b.txt", "", "替換", os.fsdecode(b"\xff.txt")]
+    request = encode_request("/工作", "prog", "click", args)
+    assert int.from_bytes(request[:4], "big") == len(request) - 4
+    assert decode_request(request[4:]) == ("/工作", "prog", "click", args)
+
+
+def test_forward_without_server(tmp_path):
+    """測試伺服器沒有在執行時回傳 None"""
+    assert forward(str(tmp_path / "missing.sock"), "click", ["--help"]) is None
+
+
+def test_remove_stale_socket(server, tmp_path):
+    """測試只移除沒有伺服器在執行的 socket 檔"""
+    with pytest.raises(RuntimeError):
+        remove_stale_socket(server)
+
+    stale = str(tmp_path / "stale.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(stale)
+    remove_stale_socket(stale)
+    assert not os.path.exists(stale)
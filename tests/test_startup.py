@@ -0,0 +1,111 @@
+"""
+測試啟動時的導入預算
+
+在子行程中以 `python -X importtime` 載入 CLI，確認只用到其中一個框架時
+不會導入另一個框架，也不會導入只有個別命令才需要的重量級模組。
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+# 只有個別命令才需要、啟動時不應載入的模組
+# (re、datetime 由 click 本身導入，glob 由 pathlib 導入，不在控制範圍內)
+COMMAND_ONLY_MODULES = {
+    "json",
+    "sqlite3",
+    "tempfile",
+    "mmap",
+    "random",
+    "concurrent.futures",
+}
+
+# learn_cli 自己的模組在啟動時花費的時間上限 (不含框架本身)
+OWN_IMPORT_BUDGET_US = 100_000
+
+
+def import_times(code: str) -> dict[str, int]:
+    """
+    在子行程中執行程式碼，回傳每個被導入的模組與其自身的導入時間 (微秒)
+    """
+    env = {**os.environ, "PYTHONPATH": str(src_path)}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=False,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(self_us)
+    return times
+
+
+def test_package_import_loads_no_framework():
+    """測試導入 learn_cli 本身不會載入任何 CLI 框架"""
+    modules = import_times("import learn_cli")
+    assert "learn_cli" in modules
+    assert "click" not in modules
+    assert "typer" not in modules
+
+
+@pytest.mark.parametrize(
+    "module, framework, other_framework",
+    [
+        ("learn_cli.click_app", "click", "typer"),
+        ("learn_cli.typer_app", "typer", None),
+    ],
+)
+def test_cli_import_budget(module, framework, other_framework):
+    """測試載入 CLI 時不導入命令專用的模組，且自身的導入時間在預算內"""
+    modules = import_times(f"import {module}")
+    assert module in modules
+    # 框架本身導入的模組不算在 CLI 的帳上
+    baseline = import_times(f"import {framework}")
+    assert not COMMAND_ONLY_MODULES & (modules.keys() - baseline.keys())
+    if other_framework:
+        assert other_framework not in modules
+    own = sum(t for name, t in modules.items() if name.startswith("learn_cli"))
+    assert own < OWN_IMPORT_BUDGET_US
+
+
+def test_main_imports_only_selected_framework(tmp_path):
+    """測試進入點只導入被選到的框架"""
+    # importlib.import_module 不會出現在 -X importtime 的輸出中，改為記錄 sys.modules
+    loaded = tmp_path / "modules.txt"
+    import_times(
+        "import sys\n"
+        "from learn_clicktyper_automation import main\n"
+        "sys.argv = ['learn-clicktyper-automation', 'click', '--help']\n"
+        "try:\n"
+        "    main()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        f"open({str(loaded)!r}, 'w').write('\\n'.join(sys.modules))\n"
+    )
+    modules = set(loaded.read_text().split("\n"))
+    assert "learn_cli.click_app" in modules
+    assert "typer" not in modules
+    assert not COMMAND_ONLY_MODULES & modules
+
+
+def test_lazy_package_attributes():
+    """測試 learn_cli 的公開名稱在存取時才導入對應的應用程式"""
+    import learn_cli
+    import learn_cli.typer_app
+
+    # 導入同名的子模組後，公開名稱仍指向應用程式物件
+    assert learn_cli.typer_app is sys.modules["learn_cli.typer_app"].app
+    assert learn_cli.click_cli is sys.modules["learn_cli.click_app"].cli
+    with pytest.raises(AttributeError):
+        learn_cli.missing  # noqa: B018
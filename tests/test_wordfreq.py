@@ -0,0 +1,70 @@
+"""
+測試詞頻統計
+
+片段切點、暫存檔與平行計算都不能改變結果：
+必須與整個檔案 str.split() 後以 Counter 計數的結果相同。
+"""
+
+import io
+import random
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+current_dir = Path(__file__).parent
+src_path = current_dir.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from learn_cli import engine, wordfreq  # noqa: E402
+
+
+def random_text(seed, n=3000):
+    rng = random.Random(seed)
+    words = ["貓", "狗", "cat", "dog", "🙂", "é", "a", "bb"]
+    spaces = [" ", "\n", "\r\n", "\t", "　", " "]
+    return "".join(rng.choice(words) + rng.choice(spaces) for _ in range(n))
+
+
+def test_count_tokens_chunk_boundaries():
+    """測試跨越資料塊的單字只算一次"""
+    text = random_text(1, 300)
+    data = text.encode("utf-8")
+    for size in (1, 2, 7, 100):
+        chunks = engine.utf8_chunks(io.BytesIO(data), chunk_size=size)
+        assert wordfreq.count_tokens(chunks) == Counter(text.split())
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_file_word_counts_segments(tmp_path, jobs):
+    """測試切成片段 (平行) 計數的結果與整個檔案相同，- 讀取標準輸入"""
+    texts = [random_text(seed) for seed in range(3)]
+    paths = []
+    for i, text in enumerate(texts):
+        path = tmp_path / f"{i}.txt"
+        path.write_bytes(text.encode("utf-8"))
+        paths.append(path)
+    paths.append(Path("-"))
+    stdin = io.BytesIO("貓 stdin\n".encode())
+
+    counts = wordfreq.file_word_counts(paths, jobs=jobs, stdin=stdin, segment_size=97)
+    total = sum(counts, Counter())
+    assert total == Counter("".join(texts).split()) + Counter(["貓", "stdin"])
+
+
+def test_word_frequency_spill_matches_memory():
+    """測試寫入暫存檔後的前 K 名與全部在記憶體中的結果相同"""
+    rng = random.Random(5)
+    batches = [
+        Counter(f"w{int(rng.paretovariate(1.2))}" for _ in range(500))
+        for _ in range(20)
+    ]
+    in_memory = wordfreq.top_words(batches, 10)
+    spilled = wordfreq.top_words(batches, 10, max_words=8)
+    assert spilled == in_memory
+    assert in_memory["總字數"] == 20 * 500
+    assert in_memory["不同單字數"] == len(sum(batches, Counter()))
+    expected = sorted(sum(batches, Counter()).items(), key=lambda x: (-x[1], x[0]))
+    top = [(item["單字"], item["次數"]) for item in in_memory["最常見單字"]]
+    assert top == expected[:10]